@@ -0,0 +1,125 @@
+"""
+Benchmark da renderização e entrega dos emails de feedback.
+
+Gera feedbacks sintéticos no formato produzido pelo modelo (títulos, listas,
+blocos de código e tabelas) e mede, para uma turma de cada tamanho, o tempo
+de cada etapa do envio: conversão markdown2, template Jinja, montagem e
+serialização da mensagem MIME e entrega pelos backends locais (null, eml e
+mbox). Nenhuma conta de email é necessária.
+
+Uso: python -m benchmarks.email_rendering [alunos ...]
+"""
+
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from core.delivery import EmlSink, MboxSink, NullSink
+from core.email import EmailSender
+from models import Course, CourseWork, EmailBackend, FeedbackResult, TeacherProfile
+
+COURSE = Course.model_construct(id="1", name="Introdução à Programação", description=None)
+COURSEWORK = CourseWork.model_construct(
+    courseId="1",
+    id="2",
+    title="Lista 3 - Funções e Recursão",
+    description="Resolva as questões no notebook e envie o arquivo.",
+    maxPoints=10.0,
+)
+PROFILE = TeacherProfile(
+    name="Professor",
+    whatsapp="5511999999999",
+    email="professor@example.com",
+    email_backend=EmailBackend.NULL,
+)
+
+
+def make_feedback(student: int) -> FeedbackResult:
+    random.seed(student)
+    questions = []
+    for q in range(1, 6):
+        grade = random.choice(["Correta", "Parcialmente correta", "Incorreta"])
+        questions.append(
+            f"### Questão {q}: {grade}\n\n"
+            f"- Ponto positivo: a função `f{q}` trata o caso base corretamente.\n"
+            f"- A complexidade é O(n^{q % 3 + 1}); considere memoização.\n\n"
+            f"```python\ndef f{q}(n):\n    if n <= 1:\n        return n\n"
+            f"    return f{q}(n - 1) + f{q}(n - 2)\n```\n"
+        )
+    table = "| Critério | Pontos |\n|---|---|\n" + "\n".join(
+        f"| Critério {c} | {random.randint(0, 2)}/2 |" for c in range(1, 6)
+    )
+    text = (
+        f"## Feedback\n\nOlá, Aluno {student}! **Bom trabalho** no geral.\n\n"
+        + "\n".join(questions)
+        + f"\n## Resumo\n\n{table}\n\n> Revise recursão de cauda antes da prova.\n"
+    )
+    return FeedbackResult(feedback=text, grade=round(random.uniform(4, 10), 1))
+
+
+def timed(fn, items) -> tuple[float, list]:
+    started = time.perf_counter()
+    results = [fn(item) for item in items]
+    return time.perf_counter() - started, results
+
+
+def main(cohorts: list[int]) -> None:
+    sender = EmailSender(PROFILE)
+    print(f"{'alunos':>6} {'etapa':<20} {'total':>8} {'por email':>10} {'emails/s':>9}")
+    for cohort in cohorts:
+        feedbacks = [make_feedback(student) for student in range(cohort)]
+        context = {
+            "feedback_grade": 8.0,
+            "whatsapp_link": PROFILE.whatsapp_link,
+            "teacher_name": PROFILE.name,
+            "course_name": COURSE.name,
+            "assignment_title": COURSEWORK.title,
+            "assignment_points": "10.0",
+        }
+
+        stages: list[tuple[str, float]] = []
+        elapsed, contents = timed(
+            lambda f: sender._convert_markdown_to_html(f.feedback), feedbacks
+        )
+        stages.append(("markdown2", elapsed))
+        elapsed, _ = timed(
+            lambda html: sender.template.render(feedback_content=html, **context),
+            contents,
+        )
+        stages.append(("template jinja", elapsed))
+        elapsed, messages = timed(
+            lambda f: sender._create_html_message(
+                "aluno@example.com", "Feedback", f, course=COURSE, coursework=COURSEWORK
+            ),
+            feedbacks,
+        )
+        stages.append(("mensagem completa", elapsed))
+        elapsed, _ = timed(lambda msg: msg.as_bytes(), messages)
+        stages.append(("serialização MIME", elapsed))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            for name, backend in [
+                ("entrega null", NullSink()),
+                ("entrega eml", EmlSink(Path(tmp) / "eml")),
+                ("entrega mbox", MboxSink(Path(tmp) / "emails.mbox")),
+            ]:
+                elapsed, _ = timed(
+                    lambda msg: backend.send_message(
+                        msg, PROFILE.email, ["aluno@example.com"]
+                    ),
+                    messages,
+                )
+                backend.close()
+                stages.append((name, elapsed))
+
+        for name, elapsed in stages:
+            print(
+                f"{cohort:>6} {name:<20} {elapsed:>7.3f}s {elapsed / cohort * 1000:>8.2f}ms "
+                f"{cohort / elapsed:>9.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [50, 150, 500])
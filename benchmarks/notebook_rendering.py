@@ -0,0 +1,143 @@
+"""
+Benchmark de tokens da renderização de notebooks.
+
+Gera notebooks sintéticos com o perfil de entregas reais (figuras do
+matplotlib, DataFrames, laços de treino com muitos prints, tracebacks com
+cores ANSI, widgets) e compara os tokens da renderização antiga (repr das
+células com as saídas brutas) com a renderização compacta de
+`core.notebook.notebook_sections`.
+
+Usa o tiktoken se estiver instalado; caso contrário, estima 4 caracteres por
+token, como `core.llm.estimate_tokens`.
+
+Uso: python -m benchmarks.notebook_rendering
+"""
+
+import base64
+import os
+import random
+import time
+
+import nbformat
+from nbformat.v4 import new_code_cell, new_markdown_cell, new_notebook, new_output
+
+from core.notebook import extract_cells, notebook_sections
+from models import ParsedAttachment
+
+try:
+    import tiktoken
+
+    _encoding = tiktoken.get_encoding("o200k_base")
+
+    def count_tokens(text: str) -> int:
+        return len(_encoding.encode(text, disallowed_special=()))
+
+    TOKENIZER = "tiktoken o200k_base"
+except ImportError:
+
+    def count_tokens(text: str) -> int:
+        return len(text) // 4 + 1
+
+    TOKENIZER = "estimativa len/4"
+
+
+def figure_output(size: int = 40_000) -> dict:
+    png = base64.b64encode(os.urandom(size)).decode()
+    return new_output(
+        "display_data",
+        data={"image/png": png, "text/plain": "<Figure size 640x480 with 1 Axes>"},
+        metadata={"needs_background": "light"},
+    )
+
+
+def dataframe_output(rows: int = 10) -> dict:
+    header = "   " + "  ".join(f"col{i}" for i in range(6))
+    lines = [f"{r:<3}" + "  ".join(f"{random.random():.2f}" for _ in range(6)) for r in range(rows)]
+    html = "<table class='dataframe'>" + "".join(
+        "<tr>" + "".join(f"<td>{random.random():.4f}</td>" for _ in range(6)) + "</tr>"
+        for _ in range(rows)
+    ) + "</table>"
+    return new_output(
+        "execute_result",
+        data={"text/plain": "\n".join([header, *lines]), "text/html": html},
+        execution_count=1,
+    )
+
+
+def training_output(epochs: int) -> dict:
+    text = "".join(
+        f"Epoch {e}/{epochs} - loss: {random.random():.4f} - acc: {random.random():.4f}\n"
+        for e in range(1, epochs + 1)
+    )
+    return new_output("stream", name="stdout", text=text)
+
+
+def error_output() -> dict:
+    frames = [
+        f"\x1b[0;32mFile /usr/lib/python3/site-packages/lib{i}.py:{i * 10}\x1b[0m, in \x1b[0;36mf{i}\x1b[0m\n    return f{i + 1}(x)"
+        for i in range(15)
+    ]
+    return new_output(
+        "error",
+        ename="ValueError",
+        evalue="shapes (3,) and (4,) not aligned",
+        traceback=["\x1b[0;31m---------------------------------------------------------------------------\x1b[0m", *frames],
+    )
+
+
+def widget_output() -> dict:
+    return new_output(
+        "display_data",
+        data={
+            "application/vnd.jupyter.widget-view+json": {"model_id": "a" * 32, "version_major": 2},
+            "text/plain": "IntProgress(value=0, max=100)",
+        },
+    )
+
+
+def make_notebook(figures: int, epochs: int) -> nbformat.NotebookNode:
+    random.seed(figures * 1000 + epochs)
+    cells = [new_markdown_cell("# Lista 3 - Regressão\nResponda as questões abaixo.")]
+    for q in range(1, 11):
+        cells.append(new_markdown_cell(f"## Questão {q}\nExplique o resultado obtido."))
+        code = new_code_cell(f"import numpy as np\nx = np.linspace(0, {q}, 100)\ny = x ** {q}\nplt.plot(x, y)")
+        code.outputs = [figure_output()] if q <= figures else []
+        cells.append(code)
+        table = new_code_cell("df.describe()")
+        table.outputs = [dataframe_output()]
+        cells.append(table)
+    train = new_code_cell("model.fit(X, y, epochs=EPOCHS)")
+    train.outputs = [widget_output(), training_output(epochs)]
+    broken = new_code_cell("np.dot(a, b)")
+    broken.outputs = [error_output()]
+    cells.extend([train, broken])
+    return new_notebook(cells=cells)
+
+
+def legacy_render(title: str, cells: list[dict]) -> str:
+    """Renderização anterior: o repr da lista de células direto no contexto."""
+    return f"{title}\n{cells}"
+
+
+def main() -> None:
+    print(f"Tokenizador: {TOKENIZER}")
+    print(f"{'notebook':<26} {'antes':>9} {'depois':>8} {'redução':>8} {'tempo':>8}")
+    for figures, epochs in [(0, 20), (3, 100), (6, 300), (10, 1000)]:
+        notebook = make_notebook(figures, epochs)
+        title = f"lista3_{figures}fig_{epochs}ep.ipynb"
+        cells = extract_cells(nbformat.from_dict(notebook))
+
+        before = count_tokens(legacy_render(title, cells))
+        started = time.perf_counter()
+        rendered = ParsedAttachment(title=title, sections=notebook_sections(cells)).render()
+        elapsed = time.perf_counter() - started
+        after = count_tokens(rendered)
+
+        print(
+            f"{title:<26} {before:>9} {after:>8} {1 - after / before:>7.0%} "
+            f"{elapsed * 1000:>6.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
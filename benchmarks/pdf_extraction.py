@@ -0,0 +1,69 @@
+"""
+Benchmark da extração de texto de PDFs.
+
+Gera PDFs sintéticos com centenas de páginas e compara a extração antiga
+(concatenação página a página em um único processo) com `core.pdf.extract_pdf`
+em um processo e no pool de processos.
+
+Uso: python -m benchmarks.pdf_extraction [páginas ...]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pymupdf
+
+from core.pdf import PDF_WORKERS, extract_pdf
+
+LINE = "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod. "
+
+
+def make_pdf(path: Path, pages: int) -> None:
+    doc = pymupdf.open()
+    for number in range(pages):
+        page = doc.new_page()
+        text = f"Página {number + 1}\n" + (LINE + "\n") * 50
+        page.insert_textbox(page.rect + (36, 36, -36, -36), text, fontsize=8)
+    doc.save(path)
+    doc.close()
+
+
+def legacy_parse(path: Path) -> str:
+    doc = pymupdf.Document(path, filetype="pdf")
+    text = ""
+    for page in doc:
+        text += page.get_text()
+    doc.close()
+    return text
+
+
+def timed(fn) -> tuple[float, object]:
+    started = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - started, result
+
+
+def main(sizes: list[int]) -> None:
+    print(f"Processos no pool: {PDF_WORKERS}")
+    print(f"{'páginas':>8} {'antigo':>9} {'1 proc':>9} {'pool':>9} {'ganho':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            path = Path(tmp) / f"{size}.pdf"
+            make_pdf(path, size)
+
+            legacy, expected = timed(lambda: legacy_parse(path))
+            single, _ = timed(lambda: extract_pdf(path, workers=1))
+            extract_pdf(path)  # aquece o pool
+            parallel, result = timed(lambda: extract_pdf(path))
+            assert result.text == expected
+
+            print(
+                f"{size:>8} {legacy:>8.2f}s {single:>8.2f}s {parallel:>8.2f}s "
+                f"{legacy / parallel:>6.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [100, 300, 600])
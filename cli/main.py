@@ -3,19 +3,26 @@ from pathlib import Path
 from rich.console import Console
 from rich.status import Status
 
+from core import logger
 from core.classroom import get_assignments, get_courses
-from core.google import get_service
-from core.grader import SubmissionsGrader
+from core.google import get_service, services
+from core.journal import RunJournal
 from models import Course, CourseWork
 
 from .questions import (
     GradingPreference,
+    TeacherCopyPreference,
+    confirm_digest_attachment,
+    confirm_full_regrade,
+    confirm_llm_cache_bypass,
     get_grading_preference,
+    get_max_workers,
+    get_teacher_copy_preference,
     select_assignment,
     select_course,
     select_or_generate_criteria,
-    send_email_copy_confirmation,
     should_send_email,
+    should_use_batch_mode,
 )
 
 console = Console()
@@ -25,8 +32,9 @@ def get_selection() -> tuple[Course | None, CourseWork | None]:
     """Obtém as seleções do usuário."""
     classroom_service = get_service("classroom", "v1")
 
-    with Status("Carregando cursos...", spinner="dots"):
+    with Status("Carregando cursos...", spinner="dots"), services.timed("cursos"):
         courses = get_courses(classroom_service)
+    logger.info(f"[dim]⏱ Inicialização: {services.report()}[/dim]")
 
     if not courses:
         console.print("[red]Nenhum curso encontrado.[/red]")
@@ -75,12 +83,21 @@ def main():
         )
 
         send_email = should_send_email()
-        if send_email:
-            send_email_copy = send_email_copy_confirmation()
-        else:
-            send_email_copy = False
+        teacher_copy = get_teacher_copy_preference(send_email)
+        send_teacher_digest = teacher_copy == TeacherCopyPreference.DIGEST
+        digest_attach_report = send_teacher_digest and confirm_digest_attachment()
+
+        # Importados só aqui: pandas e o cliente da OpenAI atrasariam o primeiro prompt
+        from core.batch import OpenAIBatchBackend
+        from core.grader import SubmissionsGrader
 
         grading_preference = get_grading_preference()
+        max_workers = get_max_workers()
+        batch_backend = OpenAIBatchBackend() if should_use_batch_mode() else None
+        force_regrade = (
+            output_dir / RunJournal.FILENAME
+        ).exists() and confirm_full_regrade()
+        use_llm_cache = not (force_regrade and confirm_llm_cache_bypass())
 
         return_grades = grading_preference == GradingPreference.RETURN
         submissions_grader = SubmissionsGrader(
@@ -91,8 +108,14 @@ def main():
             criteria_path,
             output_dir,
             send_email=send_email,
-            send_email_copy=send_email_copy,
+            send_email_copy=teacher_copy == TeacherCopyPreference.EACH,
+            send_teacher_digest=send_teacher_digest,
+            digest_attach_report=digest_attach_report,
             return_grades=return_grades,
+            max_workers=max_workers,
+            force_regrade=force_regrade,
+            use_llm_cache=use_llm_cache,
+            batch_backend=batch_backend,
         )
 
         submissions_grader.grade()
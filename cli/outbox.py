@@ -0,0 +1,54 @@
+"""Reenvio dos emails que ficaram na caixa de saída de uma atividade.
+
+Uso: python -m cli.outbox output/<curso_id>/<atividade_id>[/outbox]
+"""
+
+import sys
+from pathlib import Path
+
+from rich.console import Console
+
+from core.email import EmailSender
+from core.outbox import Outbox, OutboxSender
+
+console = Console()
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Envia as mensagens pendentes e as que falharam em execuções anteriores."""
+    args = sys.argv[1:] if argv is None else argv
+    if len(args) != 1:
+        console.print(__doc__)
+        sys.exit(2)
+
+    directory = Path(args[0])
+    if directory.name != Outbox.DIRNAME:
+        directory = directory / Outbox.DIRNAME
+    if not directory.is_dir():
+        console.print(f"[red]Caixa de saída não encontrada: {directory}[/red]")
+        sys.exit(1)
+
+    outbox = Outbox(directory)
+    requeued = outbox.requeue_failed()
+    if requeued:
+        console.print(f"{requeued} email(s) com falha voltaram para a fila")
+    if not outbox.pending():
+        console.print("[green]Nenhum email pendente.[/green]")
+        return
+
+    email_sender = EmailSender.get_instance()
+    sender = OutboxSender(outbox, email_sender.backend, workers=email_sender.pool_size)
+    try:
+        sender.drain()
+    finally:
+        email_sender.close()
+
+    counts = outbox.counts()
+    console.print(
+        f"[green]{sender.sent} email(s) enviado(s)[/green], "
+        f"{counts['falhas']} com falha"
+    )
+
+
+if __name__ == "__main__":
+    main()
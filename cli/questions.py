@@ -5,8 +5,7 @@ from typing import Any, Dict, List
 import questionary
 from rich.console import Console
 
-from core.criteria_generator import CriteriaGenerator
-from models import Course, CourseWork, TeacherProfile
+from models import Course, CourseWork, EmailBackend, TeacherProfile
 
 console = Console()
 
@@ -16,6 +15,12 @@ class GradingPreference(str, Enum):
     RETURN = "Retornar notas automaticamente para os alunos"
 
 
+class TeacherCopyPreference(str, Enum):
+    DIGEST = "Receber um único resumo ao final da avaliação"
+    EACH = "Receber uma cópia de cada feedback enviado"
+    NONE = "Não receber nada por email"
+
+
 def get_grading_preference() -> GradingPreference:
     """Pergunta ao usuário como deseja lidar com as notas."""
     return questionary.select(
@@ -24,6 +29,40 @@ def get_grading_preference() -> GradingPreference:
     ).ask()
 
 
+def confirm_full_regrade() -> bool:
+    """Pergunta se submissões já avaliadas em execuções anteriores devem ser refeitas."""
+    return questionary.confirm(
+        "Já existe uma avaliação anterior desta atividade. Deseja reavaliar todas as submissões?",
+        default=False,
+    ).ask()
+
+
+def confirm_llm_cache_bypass() -> bool:
+    """Pergunta se o cache de feedbacks do LLM deve ser ignorado."""
+    return questionary.confirm(
+        "Ignorar feedbacks já gerados pelo LLM para submissões idênticas?",
+        default=False,
+    ).ask()
+
+
+def should_use_batch_mode() -> bool:
+    """Pergunta se a avaliação deve usar a API de lote (offline)."""
+    return questionary.confirm(
+        "Usar a API de lote? (mais barata para turmas grandes, resultados em até 24h)",
+        default=False,
+    ).ask()
+
+
+def get_max_workers() -> int:
+    """Pergunta ao usuário quantas submissões devem ser avaliadas em paralelo."""
+    workers = questionary.text(
+        "Quantas submissões avaliar em paralelo?",
+        default="4",
+        validate=lambda text: text.isdigit() and 1 <= int(text) <= 32,
+    ).ask()
+    return int(workers)
+
+
 def setup_teacher_profile() -> TeacherProfile:
     """Solicita informações do perfil do professor."""
     name = questionary.text("Nome do Professor:").ask()
@@ -35,6 +74,22 @@ def setup_teacher_profile() -> TeacherProfile:
         "Email para envio dos feedbacks:",
         validate=lambda text: "@" in text and "." in text.split("@")[1],
     ).ask()
+    email_backend = EmailBackend(
+        questionary.select(
+            "Como os emails devem ser entregues?",
+            choices=[
+                questionary.Choice("Enviar pelo servidor SMTP", EmailBackend.SMTP.value),
+                questionary.Choice("Salvar arquivos .eml (simulação)", EmailBackend.EML.value),
+                questionary.Choice("Salvar em um arquivo mbox (simulação)", EmailBackend.MBOX.value),
+                questionary.Choice("Descartar (simulação)", EmailBackend.NULL.value),
+            ],
+        ).ask()
+    )
+    if email_backend != EmailBackend.SMTP:
+        return TeacherProfile(
+            name=name, whatsapp=whatsapp, email=email, email_backend=email_backend
+        )
+
     smtp_server = questionary.text("Servidor SMTP (ex: mail.example.com):").ask()
     smtp_port = questionary.text(
         "Porta SMTP:",
@@ -60,10 +115,24 @@ def should_send_email() -> bool:
     ).ask()
 
 
-def send_email_copy_confirmation() -> bool:
-    """Solicita ao usuário se deseja enviar uma copia dos feedbacks por email."""
+def get_teacher_copy_preference(send_email: bool) -> TeacherCopyPreference:
+    """Pergunta ao usuário o que deseja receber por email sobre a avaliação."""
+    choices = [pref.value for pref in TeacherCopyPreference]
+    if not send_email:
+        choices.remove(TeacherCopyPreference.EACH.value)
+    return TeacherCopyPreference(
+        questionary.select(
+            "O que você deseja receber por email?",
+            choices=choices,
+            default=TeacherCopyPreference.DIGEST.value if send_email else None,
+        ).ask()
+    )
+
+
+def confirm_digest_attachment() -> bool:
+    """Pergunta se o relatório em Excel deve ser anexado ao resumo."""
     return questionary.confirm(
-        "Deseja receber uma cópia dos feedbacks enviador por email?", default=False
+        "Anexar o relatório de notas (Excel) ao resumo?", default=True
     ).ask()
 
 
@@ -87,6 +156,8 @@ def select_or_generate_criteria(
     mode = select_criteria_mode()
 
     if mode == "Gerar um novo baseado no enunciado":
+        from core.criteria_generator import CriteriaGenerator
+
         criteria_generator = CriteriaGenerator(
             coursework,
             drive_service,
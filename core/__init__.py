@@ -1,5 +1,8 @@
 """Core module initialization."""
 
+import threading
+from contextlib import nullcontext
+
 from rich.console import Console
 from rich.markdown import Markdown
 from rich.progress import (
@@ -9,6 +12,7 @@ from rich.progress import (
     TextColumn,
     TimeElapsedColumn,
 )
+from rich.table import Table
 
 
 class ConsoleLogger:
@@ -44,9 +48,25 @@ class ConsoleLogger:
         )
 
     def status(self, message: str):
-        """Display a status message with spinner."""
+        """Display a status message with spinner.
+
+        Rich only allows one live display at a time, so worker threads get a
+        plain message instead of a spinner.
+        """
+        if threading.current_thread() is not threading.main_thread():
+            self.console.print(f"[cyan]⋯[/cyan] {message}")
+            return nullcontext()
         return self.console.status(f"[cyan]⋯[/cyan] {message}")
 
+    def table(self, title: str, columns: list[str], rows: list[list[str]]):
+        """Display a table with standard styling."""
+        table = Table(title=title, title_justify="left", header_style="bold")
+        for column in columns:
+            table.add_column(column, justify="left" if column == columns[0] else "right")
+        for row in rows:
+            table.add_row(*row)
+        self.console.print(table)
+
     def preview(self, content: str, title: str | None = None):
         """Display a preview of markdown content."""
         if title:
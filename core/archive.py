@@ -0,0 +1,181 @@
+"""Leitura em streaming de arquivos compactados (ZIP/TAR) enviados pelos alunos."""
+
+import io
+import tarfile
+import zipfile
+from dataclasses import dataclass, field
+from pathlib import Path, PurePosixPath
+from typing import IO, Iterator
+
+ARCHIVE_MAX_MEMBERS = 200
+ARCHIVE_MAX_ENTRIES = 10_000  # entradas percorridas, inclusive as ignoradas
+ARCHIVE_MAX_SKIPPED = 20  # nomes guardados em `skipped`; o restante só é contado
+ARCHIVE_MAX_BYTES = 50 * 1024 * 1024  # total descompactado lido
+ARCHIVE_MEMBER_MAX_BYTES = 10 * 1024 * 1024
+
+ARCHIVE_SUFFIXES = (
+    ".zip",
+    ".tar",
+    ".tar.gz",
+    ".tgz",
+    ".tar.bz2",
+    ".tbz2",
+    ".tar.xz",
+    ".txz",
+)
+
+# Extensões encaminhadas aos parsers; o restante é tratado como binário
+PARSEABLE_EXTENSIONS = set(
+    "ipynb pdf py txt md rst csv tsv json yaml yml toml ini cfg sql r java c h cpp "
+    "hpp cs go rs js ts jsx tsx html css sh m jl kt scala".split()
+)
+
+SKIPPED_DIRS = set(
+    "__pycache__ __MACOSX .git .svn .hg .idea .vscode .ipynb_checkpoints "
+    ".pytest_cache .mypy_cache .venv venv env node_modules build dist target bin "
+    "obj .eggs".split()
+)
+
+_READ_CHUNK = 64 * 1024
+
+
+def is_archive(filename: str) -> bool:
+    """Indica se o nome do arquivo corresponde a um formato compactado suportado."""
+    return filename.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+@dataclass
+class ArchiveMember:
+    name: str
+    data: bytes
+
+
+@dataclass
+class ArchiveReader:
+    """
+    Percorre os membros de um ZIP/TAR sem extraí-los para o disco.
+
+    Apenas arquivos com extensões conhecidas são lidos, e cada leitura é
+    limitada: o tamanho declarado no cabeçalho não é confiável, então os bytes
+    são contados enquanto são descompactados. Ao atingir o limite de membros,
+    de entradas percorridas ou de bytes totais a leitura é interrompida, o que
+    protege contra zip bombs e arquivos com milhares de entradas vazias.
+
+    Apenas os primeiros `max_skipped` arquivos ignorados são listados em
+    `skipped`; `skipped_count` tem o total.
+    """
+
+    source: bytes | Path
+    max_members: int = ARCHIVE_MAX_MEMBERS
+    max_bytes: int = ARCHIVE_MAX_BYTES
+    max_member_bytes: int = ARCHIVE_MEMBER_MAX_BYTES
+    max_entries: int = ARCHIVE_MAX_ENTRIES
+    max_skipped: int = ARCHIVE_MAX_SKIPPED
+    skipped: list[str] = field(default_factory=list)
+    skipped_count: int = 0
+    limit_reached: str | None = None
+    _total_bytes: int = 0
+    _members: int = 0
+    _entries: int = 0
+
+    def __iter__(self) -> Iterator[ArchiveMember]:
+        fileobj: IO[bytes] | Path = (
+            io.BytesIO(self.source) if isinstance(self.source, bytes) else self.source
+        )
+        if zipfile.is_zipfile(fileobj):
+            yield from self._iter_zip(fileobj)
+        else:
+            if isinstance(fileobj, io.BytesIO):
+                fileobj.seek(0)
+            yield from self._iter_tar(fileobj)
+
+    def _skip(self, description: str) -> None:
+        self.skipped_count += 1
+        if len(self.skipped) < self.max_skipped:
+            self.skipped.append(description)
+
+    def _visit(self) -> bool:
+        """Conta uma entrada percorrida; False ao atingir o limite de entradas."""
+        self._entries += 1
+        if self._entries > self.max_entries:
+            self.limit_reached = f"limite de {self.max_entries} entradas"
+            return False
+        return True
+
+    def _accept(self, name: str) -> bool:
+        """Filtra diretórios ignorados e binários, registrando o que foi pulado."""
+        path = PurePosixPath(name)
+        if any(part in SKIPPED_DIRS for part in path.parts[:-1]):
+            return False
+        if path.name.startswith("._") or path.name == ".DS_Store":
+            return False
+        if path.suffix.lstrip(".").lower() not in PARSEABLE_EXTENSIONS:
+            self._skip(name)
+            return False
+        return True
+
+    def _read(self, name: str, stream: IO[bytes]) -> bytes | None:
+        """Lê o membro respeitando os limites; None se ele foi pulado ou um limite foi atingido."""
+        if self._members >= self.max_members:
+            self.limit_reached = f"limite de {self.max_members} arquivos"
+            return None
+
+        limit = min(self.max_member_bytes, self.max_bytes - self._total_bytes)
+        chunks, size = [], 0
+        while chunk := stream.read(min(_READ_CHUNK, limit + 1 - size)):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size > limit:
+                break
+
+        self._total_bytes += min(size, limit)
+        if size > limit:
+            if limit < self.max_member_bytes:
+                self.limit_reached = (
+                    f"limite de {self.max_bytes // 1024**2} MB descompactados"
+                )
+            else:
+                self._skip(f"{name} (maior que {self.max_member_bytes // 1024**2} MB)")
+            return None
+
+        self._members += 1
+        return b"".join(chunks)
+
+    def _iter_zip(self, fileobj: IO[bytes] | Path) -> Iterator[ArchiveMember]:
+        with zipfile.ZipFile(fileobj) as archive:
+            for info in archive.infolist():
+                if not self._visit():
+                    return
+                if info.is_dir() or not self._accept(info.filename):
+                    continue
+                try:
+                    with archive.open(info) as stream:
+                        data = self._read(info.filename, stream)
+                except (RuntimeError, zipfile.BadZipFile, NotImplementedError) as e:
+                    self._skip(f"{info.filename} ({str(e)})")
+                    continue
+                if self.limit_reached:
+                    return
+                if data is not None:
+                    yield ArchiveMember(info.filename, data)
+
+    def _iter_tar(self, fileobj: IO[bytes] | Path) -> Iterator[ArchiveMember]:
+        # Modo "r|*": leitura sequencial, sem carregar o índice do arquivo
+        if isinstance(fileobj, Path):
+            archive = tarfile.open(fileobj, mode="r|*")
+        else:
+            archive = tarfile.open(fileobj=fileobj, mode="r|*")
+        with archive:
+            for info in archive:
+                if not self._visit():
+                    return
+                if not info.isfile() or not self._accept(info.name):
+                    continue
+                stream = archive.extractfile(info)
+                if stream is None:
+                    continue
+                data = self._read(info.name, stream)
+                if self.limit_reached:
+                    return
+                if data is not None:
+                    yield ArchiveMember(info.name, data)
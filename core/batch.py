@@ -0,0 +1,182 @@
+"""Avaliação offline via API de lote (batch) compatível com OpenAI."""
+
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Any, Protocol
+
+import openai
+
+from core import logger
+from core.llm import MODEL_NAME, TokenUsage, build_feedback_messages
+from models import FeedbackResult
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+class BatchBackend(Protocol):
+    """Camada de envio e acompanhamento de lotes (substituível em testes)."""
+
+    def submit(self, requests_file: Path) -> str:
+        """Envia o arquivo JSONL de requisições e retorna o ID do lote."""
+        ...
+
+    def status(self, batch_id: str) -> str:
+        """Retorna o status atual do lote (ex: `in_progress`, `completed`)."""
+        ...
+
+    def results(self, batch_id: str) -> str:
+        """Retorna o conteúdo JSONL com os resultados (e erros) do lote."""
+        ...
+
+
+class OpenAIBatchBackend:
+    """Backend de lote usando a Batch API da OpenAI (ou compatível)."""
+
+    def __init__(
+        self, client: openai.OpenAI | None = None, completion_window: str = "24h"
+    ):
+        self.client = client or openai.OpenAI()
+        self.completion_window = completion_window
+
+    def submit(self, requests_file: Path) -> str:
+        with requests_file.open("rb") as f:
+            input_file = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=self.completion_window,  # type: ignore [arg-type]
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        return self.client.batches.retrieve(batch_id).status
+
+    def results(self, batch_id: str) -> str:
+        batch = self.client.batches.retrieve(batch_id)
+        contents = [
+            self.client.files.content(file_id).text
+            for file_id in (batch.output_file_id, batch.error_file_id)
+            if file_id
+        ]
+        return "\n".join(contents)
+
+
+def _feedback_response_format() -> dict[str, Any]:
+    """Formato de saída estruturada equivalente a `FeedbackResult`."""
+    schema = FeedbackResult.model_json_schema()
+    schema["additionalProperties"] = False
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": "FeedbackResult", "schema": schema, "strict": True},
+    }
+
+
+def build_batch_request(
+    custom_id: str, criteria: str, student_name: str, context: str
+) -> dict[str, Any]:
+    """Monta uma linha do arquivo de lote para avaliar uma submissão."""
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": {
+            "model": MODEL_NAME,
+            "messages": build_feedback_messages(criteria, student_name, context),
+            "response_format": _feedback_response_format(),
+        },
+    }
+
+
+def parse_batch_results(
+    content: str, usage: TokenUsage | None = None
+) -> dict[str, FeedbackResult | str]:
+    """
+    Interpreta o JSONL de resultados do lote.
+
+    Returns:
+        Mapeamento custom_id -> FeedbackResult ou mensagem de erro
+    """
+    results: dict[str, FeedbackResult | str] = {}
+    for line in content.splitlines():
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        custom_id = item["custom_id"]
+        response = item.get("response") or {}
+        if item.get("error") or response.get("status_code") != 200:
+            error = item.get("error") or response.get("body", {}).get("error")
+            results[custom_id] = f"Erro no lote: {error}"
+            continue
+
+        body = response["body"]
+        if usage is not None:
+            usage.add(body.get("usage"))
+        try:
+            content_json = body["choices"][0]["message"]["content"]
+            results[custom_id] = FeedbackResult.model_validate_json(content_json)
+        except Exception as e:
+            results[custom_id] = f"Resposta do lote inválida: {str(e)}"
+    return results
+
+
+def run_batch(
+    backend: BatchBackend,
+    requests: list[dict[str, Any]],
+    work_dir: Path,
+    poll_interval: float = 60,
+    usage: TokenUsage | None = None,
+) -> dict[str, FeedbackResult | str]:
+    """
+    Grava, envia e acompanha um lote até sua conclusão.
+
+    O ID do lote enviado é salvo em `work_dir`, então uma execução interrompida
+    durante a espera retoma o mesmo lote em vez de reenviá-lo (desde que as
+    requisições sejam idênticas).
+    """
+    work_dir.mkdir(parents=True, exist_ok=True)
+    requests_file = work_dir / "requests.jsonl"
+    state_file = work_dir / "batch.json"
+
+    content = "".join(
+        json.dumps(request, ensure_ascii=False) + "\n" for request in requests
+    )
+    digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    state = (
+        json.loads(state_file.read_text(encoding="utf-8"))
+        if state_file.exists()
+        else {}
+    )
+    if state.get("digest") == digest:
+        batch_id = state["batch_id"]
+        logger.info(f"Retomando lote já enviado [bold]{batch_id}[/bold]")
+    else:
+        requests_file.write_text(content, encoding="utf-8")
+        batch_id = backend.submit(requests_file)
+        state_file.write_text(
+            json.dumps({"batch_id": batch_id, "digest": digest}), encoding="utf-8"
+        )
+        logger.info(
+            f"Lote [bold]{batch_id}[/bold] enviado com {len(requests)} requisição(ões)"
+        )
+
+    with logger.status(f"Aguardando conclusão do lote {batch_id}..."):
+        while (status := backend.status(batch_id)) not in TERMINAL_STATUSES:
+            time.sleep(poll_interval)
+
+    if status != "completed":
+        logger.warning(f"Lote {batch_id} finalizado com status: {status}")
+
+    output = backend.results(batch_id)
+    (work_dir / "results.jsonl").write_text(output, encoding="utf-8")
+    state_file.unlink(missing_ok=True)
+
+    results = parse_batch_results(output, usage)
+    for request in requests:
+        results.setdefault(
+            request["custom_id"], f"Sem resultado no lote (status: {status})"
+        )
+    return results
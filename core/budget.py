@@ -0,0 +1,169 @@
+"""Orçamento de tokens para o contexto submetido pelo aluno."""
+
+from collections import Counter
+
+from core.llm import estimate_tokens
+from models import ContentSection, ParsedAttachment
+
+CONTEXT_BUDGET = 50_000  # tokens por submissão
+OUTPUT_MAX_TOKENS = 500  # tokens mantidos de uma saída de célula grande
+PDF_MAX_PAGES = 20  # páginas mantidas de cada PDF
+
+
+def count_tokens(attachments: list[ParsedAttachment]) -> int:
+    """Conta os tokens do contexto renderizado."""
+    return sum(estimate_tokens(attachment.render()) for attachment in attachments)
+
+
+def _truncate_middle(text: str, max_tokens: int) -> str:
+    """Mantém o início e o fim do texto, omitindo o meio."""
+    keep_chars = max_tokens * 4
+    head, tail = text[: keep_chars * 3 // 4], text[-(keep_chars // 4) :]
+    omitted = len(text) - len(head) - len(tail)
+    return f"{head}\n[... {omitted} caracteres omitidos ...]\n{tail}"
+
+
+def _collapse_repeated_lines(text: str) -> str:
+    """Substitui linhas repetidas por um marcador com a contagem."""
+    counts = Counter(text.splitlines())
+    lines, seen = [], set()
+    for line in text.splitlines():
+        if counts[line] <= 2:
+            lines.append(line)
+        elif line not in seen:
+            seen.add(line)
+            lines.append(f"{line}  [linha repetida {counts[line]}x]")
+    return "\n".join(lines)
+
+
+class ContextBudget:
+    """
+    Aplica um limite de tokens ao contexto de uma submissão.
+
+    Quando o limite é excedido, o conteúdo é reduzido nesta ordem, parando assim
+    que couber no orçamento:
+
+    1. Saídas de células muito grandes são truncadas (maiores primeiro)
+    2. Linhas repetidas em saídas são agrupadas
+    3. Páginas de PDF além de `pdf_max_pages` são omitidas
+    4. Como último recurso, o final do maior anexo é cortado
+
+    Cada decisão é registrada em `decisions`, para que o professor saiba
+    exatamente o que o modelo recebeu.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = CONTEXT_BUDGET,
+        output_max_tokens: int = OUTPUT_MAX_TOKENS,
+        pdf_max_pages: int = PDF_MAX_PAGES,
+    ):
+        self.max_tokens = max_tokens
+        self.output_max_tokens = output_max_tokens
+        self.pdf_max_pages = pdf_max_pages
+
+    def apply(
+        self, attachments: list[ParsedAttachment]
+    ) -> tuple[list[ParsedAttachment], list[str]]:
+        """
+        Returns:
+            Os anexos (possivelmente reduzidos) e a lista de decisões de corte
+        """
+        attachments = [attachment.model_copy(deep=True) for attachment in attachments]
+        decisions: list[str] = []
+
+        total = count_tokens(attachments)
+        if total <= self.max_tokens:
+            return attachments, decisions
+
+        decisions.append(
+            "Contexto de ~{} tokens excede o orçamento de {}: {}".format(
+                total,
+                self.max_tokens,
+                ", ".join(
+                    f"{attachment.title or 'anexo'} ~{estimate_tokens(attachment.render())}"
+                    for attachment in attachments
+                ),
+            )
+        )
+
+        # 1. Saídas grandes, das maiores para as menores
+        outputs = [
+            (attachment, section)
+            for attachment in attachments
+            for section in attachment.sections
+            if section.kind == "output"
+            and estimate_tokens(section.text) > self.output_max_tokens
+        ]
+        outputs.sort(key=lambda item: len(item[1].text), reverse=True)
+        for attachment, section in outputs:
+            if total <= self.max_tokens:
+                break
+            before = estimate_tokens(section.text)
+            section.text = _truncate_middle(section.text, self.output_max_tokens)
+            total -= before - estimate_tokens(section.text)
+            decisions.append(
+                f"{attachment.title}: saída de célula truncada (~{before} → ~{self.output_max_tokens} tokens)"
+            )
+
+        # 2. Linhas repetidas nas saídas
+        if total > self.max_tokens:
+            for attachment in attachments:
+                saved = 0
+                for section in attachment.sections:
+                    if section.kind != "output":
+                        continue
+                    before = estimate_tokens(section.text)
+                    section.text = _collapse_repeated_lines(section.text)
+                    saved += before - estimate_tokens(section.text)
+                if saved > 0:
+                    total -= saved
+                    decisions.append(
+                        f"{attachment.title}: linhas repetidas agrupadas nas saídas (~{saved} tokens)"
+                    )
+
+        # 3. Páginas de PDF além do limite
+        if total > self.max_tokens:
+            for attachment in attachments:
+                pages = [s for s in attachment.sections if s.kind == "page"]
+                if len(pages) <= self.pdf_max_pages:
+                    continue
+                dropped = {id(page) for page in pages[self.pdf_max_pages :]}
+                total -= sum(
+                    estimate_tokens(page.text) for page in pages[self.pdf_max_pages :]
+                )
+                attachment.sections = [
+                    s for s in attachment.sections if id(s) not in dropped
+                ] + [
+                    ContentSection(
+                        kind="text",
+                        text=f"[... páginas {self.pdf_max_pages + 1}–{len(pages)} omitidas ...]",
+                    )
+                ]
+                decisions.append(
+                    f"{attachment.title}: páginas {self.pdf_max_pages + 1}–{len(pages)} do PDF omitidas"
+                )
+
+        # 4. Corte final no maior anexo
+        total = count_tokens(attachments)
+        while total > self.max_tokens:
+            largest = max(attachments, key=lambda a: len(a.render()))
+            body = "\n".join(section.render() for section in largest.sections)
+            excess = total - self.max_tokens
+            # Folga para o marcador de corte
+            keep = max(0, len(body) - excess * 4 - 200)
+            largest.sections = [
+                ContentSection(
+                    kind="text",
+                    text=body[:keep] + "\n[... conteúdo cortado por limite de tokens ...]",
+                )
+            ]
+            decisions.append(
+                f"{largest.title or 'anexo'}: final cortado (~{excess} tokens)"
+            )
+            new_total = count_tokens(attachments)
+            if new_total >= total:
+                break
+            total = new_total
+
+        return attachments, decisions
@@ -0,0 +1,191 @@
+"""Cache persistente em disco endereçado por conteúdo."""
+
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import BinaryIO, Callable
+
+from core import logger
+
+
+def shared_cache_dir(output_dir: Path, name: str) -> Path:
+    """Diretório de cache compartilhado entre cursos e atividades (output/.cache/<name>)."""
+    return output_dir.parent.parent / ".cache" / name
+
+
+def make_key(*parts: str) -> str:
+    """Gera uma chave estável (sha256) a partir das partes informadas."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def file_digest(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """sha256 do conteúdo do arquivo, lido em pedaços."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """
+    Cache de valores binários em disco, com despejo por idade, quantidade de
+    entradas e tamanho total (LRU pela data de último acesso).
+
+    As entradas são gravadas atomicamente, então o cache pode ser compartilhado
+    entre threads e execuções.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        *,
+        max_entries: int | None = None,
+        max_bytes: int | None = None,
+        max_age: float | None = None,
+        enabled: bool = True,
+    ):
+        """
+        Args:
+            directory: Diretório onde as entradas são armazenadas
+            max_entries: Quantidade máxima de entradas mantidas
+            max_bytes: Tamanho total máximo das entradas, em bytes
+            max_age: Idade máxima de uma entrada, em segundos
+            enabled: Se False, o cache é ignorado (nenhuma leitura ou escrita)
+        """
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self._lock = threading.Lock()
+
+    def path(self, key: str) -> Path:
+        """Caminho do arquivo da entrada (que pode não existir)."""
+        return self.directory / key[:2] / key
+
+    def get_path(self, key: str) -> Path | None:
+        """Retorna o caminho da entrada, se existir e não expirou."""
+        if not self.enabled:
+            return None
+
+        path = self.path(key)
+        try:
+            stat = path.stat()
+            if self.max_age is not None and time.time() - stat.st_mtime > self.max_age:
+                path.unlink(missing_ok=True)
+                raise FileNotFoundError
+            # Registra o acesso para o despejo LRU
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+            self.bytes_saved += stat.st_size
+        return path
+
+    def get(self, key: str) -> bytes | None:
+        """Retorna o valor armazenado para a chave, se existir e não expirou."""
+        path = self.get_path(key)
+        try:
+            return path.read_bytes() if path is not None else None
+        except FileNotFoundError:
+            # Removida por um despejo concorrente
+            return None
+
+    def set(self, key: str, data: bytes) -> Path | None:
+        """Armazena o valor para a chave e retorna o caminho da entrada."""
+        return self.set_stream(key, lambda f: f.write(data) is not None)
+
+    def set_stream(self, key: str, write: Callable[[BinaryIO], bool]) -> Path | None:
+        """
+        Armazena a entrada escrevendo-a diretamente em um arquivo temporário.
+
+        `write` recebe o arquivo aberto e retorna False para descartá-lo; caso
+        contrário o arquivo é movido atomicamente para o cache, então leitores
+        nunca veem uma entrada incompleta.
+        """
+        if not self.enabled:
+            return None
+
+        path = self.path(key)
+        tmp_path = None
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+            with os.fdopen(fd, "wb") as f:
+                complete = write(f)
+            if not complete:
+                return None
+            os.replace(tmp_path, path)
+            tmp_path = None
+            return path
+        except Exception as e:
+            logger.warning(f"Não foi possível gravar no cache: {str(e)}")
+            return None
+        finally:
+            if tmp_path is not None:
+                Path(tmp_path).unlink(missing_ok=True)
+
+    def get_text(self, key: str) -> str | None:
+        data = self.get(key)
+        return data.decode("utf-8") if data is not None else None
+
+    def set_text(self, key: str, text: str) -> None:
+        self.set(key, text.encode("utf-8"))
+
+    def evict(self) -> int:
+        """Aplica os limites de idade, quantidade e tamanho; retorna quantas entradas removeu."""
+        if not self.enabled or not self.directory.exists():
+            return 0
+
+        entries = []
+        for path in self.directory.glob("*/*"):
+            if path.name.startswith(".tmp-"):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                # Removida por outra thread ou execução durante a listagem
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        # Mais recentes primeiro
+        entries.sort(key=lambda entry: entry[0], reverse=True)
+        now = time.time()
+        kept = total_bytes = removed = 0
+        for mtime, size, path in entries:
+            expired = self.max_age is not None and now - mtime > self.max_age
+            too_many = self.max_entries is not None and kept >= self.max_entries
+            too_big = (
+                self.max_bytes is not None and total_bytes + size > self.max_bytes
+            )
+            if expired or too_many or too_big:
+                path.unlink(missing_ok=True)
+                removed += 1
+            else:
+                kept += 1
+                total_bytes += size
+        return removed
+
+    def summary(self) -> str:
+        """Resumo legível dos acertos e erros do cache."""
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        summary = f"{self.hits} acerto(s), {self.misses} falta(s) ({rate:.0%})"
+        if self.bytes_saved:
+            summary += f", {self.bytes_saved / 1024**2:.1f} MB economizados"
+        return summary
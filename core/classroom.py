@@ -53,82 +53,111 @@ def get_course_work(service, course_id: str, assignment_id: str) -> CourseWork |
         return None
 
 
-def grade_submission(
-    service,
-    course_id: str,
-    course_work_id: str,
-    submission_id: str,
-    draft_grade: float,
-    assigned_grade: float | None = None,
-) -> bool:
+BATCH_SIZE = 50  # limite recomendado de requisições por batch da API
+
+
+def _execute_batch(
+    service, requests: list[tuple[str, Any]], batch_size: int
+) -> dict[str, str | None]:
     """
-    Grade a student submission.
+    Executa requisições em lotes HTTP batch.
 
     Args:
         service: The classroom service object
-        course_id: ID of the course
-        course_work_id: ID of the coursework/assignment
-        submission_id: ID of the student submission
-        draft_grade: The draft grade to assign (not visible to students)
-        assigned_grade: The final grade to return to student (optional)
+        requests: Pares (request_id, requisição) a serem executados
+        batch_size: Quantidade máxima de requisições por batch
 
     Returns:
-        True if grading was successful, False otherwise
+        Mapeamento request_id -> mensagem de erro (None em caso de sucesso)
     """
-    try:
-        # Prepare the grade data
-        grade_data = {"draftGrade": draft_grade}
-        update_mask = "draftGrade"
-
-        # If assigned grade is provided, include it
-        if assigned_grade is not None:
-            grade_data["assignedGrade"] = assigned_grade
-            update_mask += ",assignedGrade"
-            logger.info(f"Definindo nota final como {assigned_grade}...")
-        else:
-            logger.info(f"Definindo rascunho da nota como {draft_grade}...")
-
-        # Update the student submission with the grade
-        service.courses().courseWork().studentSubmissions().patch(
-            courseId=course_id,
-            courseWorkId=course_work_id,
-            id=submission_id,
-            updateMask=update_mask,
-            body=grade_data,
-        ).execute()
-
-        return True
-    except Exception as e:
-        logger.error(f"Erro ao atribuir nota: {str(e)}")
-        return False
+    results: dict[str, str | None] = {}
+
+    def callback(request_id, response, exception):
+        results[request_id] = str(exception) if exception is not None else None
+
+    for start in range(0, len(requests), batch_size):
+        chunk = requests[start : start + batch_size]
+        batch = service.new_batch_http_request(callback=callback)
+        for request_id, request in chunk:
+            batch.add(request, request_id=request_id)
+        try:
+            batch.execute()
+        except Exception as e:
+            for request_id, _ in chunk:
+                results.setdefault(request_id, str(e))
+
+    return results
 
 
-def return_submission(
+def publish_grades(
     service,
     course_id: str,
     course_work_id: str,
-    submission_id: str,
-) -> bool:
+    grades: dict[str, float],
+    return_grades: bool = False,
+    batch_size: int = BATCH_SIZE,
+) -> dict[str, str | None]:
     """
-    Return a student submission to the student.
+    Grade (and optionally return) many submissions using HTTP batch requests.
 
     Args:
         service: The classroom service object
         course_id: ID of the course
-        coursework_id: ID of the coursework/assignment
-        submission_id: ID of the student submission
+        course_work_id: ID of the coursework/assignment
+        grades: Mapping of submission ID to grade
+        return_grades: If True, also set assignedGrade and return the submissions
+        batch_size: Maximum number of requests per batch
 
     Returns:
-        True if returning was successful, False otherwise
+        Mapping of submission ID to an error message (None if successful)
     """
-    try:
-        logger.info("Retornando submissão para o aluno...")
-        service.courses().courseWork().studentSubmissions().return_(
-            courseId=course_id, courseWorkId=course_work_id, id=submission_id, body={}
-        ).execute()
-        logger.success("Submissão retornada com sucesso")
+    submissions = service.courses().courseWork().studentSubmissions()
+    update_mask = "draftGrade,assignedGrade" if return_grades else "draftGrade"
+
+    patches = []
+    for submission_id, grade in grades.items():
+        grade_data = {"draftGrade": grade}
+        if return_grades:
+            grade_data["assignedGrade"] = grade
+        patches.append(
+            (
+                submission_id,
+                submissions.patch(
+                    courseId=course_id,
+                    courseWorkId=course_work_id,
+                    id=submission_id,
+                    updateMask=update_mask,
+                    body=grade_data,
+                ),
+            )
+        )
 
-        return True
-    except Exception as e:
-        logger.error(f"Erro ao retornar submissão: {str(e)}")
-        return False
+    logger.info(f"Atribuindo {len(patches)} nota(s) em lote...")
+    results = {
+        submission_id: error and f"Erro ao atribuir nota: {error}"
+        for submission_id, error in _execute_batch(
+            service, patches, batch_size
+        ).items()
+    }
+
+    if return_grades and any(error is None for error in results.values()):
+        returns = [
+            (
+                submission_id,
+                submissions.return_(
+                    courseId=course_id,
+                    courseWorkId=course_work_id,
+                    id=submission_id,
+                    body={},
+                ),
+            )
+            for submission_id, error in results.items()
+            if error is None
+        ]
+        logger.info(f"Retornando {len(returns)} submissão(ões) em lote...")
+        for submission_id, error in _execute_batch(
+            service, returns, batch_size
+        ).items():
+            results[submission_id] = error and f"Erro ao retornar submissão: {error}"
+
+    return results
@@ -1,8 +1,10 @@
 from pathlib import Path
 
 from core import logger
+from core.downloads import DownloadManager, drive_cache
 from core.llm import generate_criteria
-from core.stringfy import AttachmentParser
+from core.stringfy import AttachmentParser, parsed_cache
+from core.web import WebClient, web_cache
 from models import CourseWork
 
 
@@ -31,11 +33,26 @@ class CriteriaGenerator:
 
         if attachments:
             context += "# Materiais\n"
-            for attachment in attachments:
-                attachment_parser = AttachmentParser(
-                    attachment, self.drive_service, self.output_dir
-                )
-                context += attachment_parser.stringfy() + "\n\n"
+            downloads = DownloadManager(
+                self.drive_service, drive_cache(self.output_dir)
+            )
+            cache = parsed_cache(self.output_dir)
+            web = WebClient(web_cache(self.output_dir))
+            try:
+                for attachment in attachments:
+                    attachment_parser = AttachmentParser(
+                        attachment,
+                        self.drive_service,
+                        self.output_dir,
+                        downloads,
+                        cache,
+                        web=web,
+                    )
+                    context += attachment_parser.stringfy() + "\n\n"
+            finally:
+                downloads.close()
+                web.close()
+                cache.evict()
 
         # TODO: tornar processo interativo perguntando ao usuário se deseja modificar de alguma forma o que foi gerado.
         with logger.status("Gerando critérios de avaliação..."):
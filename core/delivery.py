@@ -0,0 +1,124 @@
+"""Backends de entrega dos emails: SMTP, arquivos locais ou descarte."""
+
+import itertools
+import mailbox
+import re
+import threading
+from email.message import Message
+from pathlib import Path
+from typing import Protocol
+
+from core.smtp import SMTP_POOL_SIZE, SmtpPool
+from models import EmailBackend, TeacherProfile
+
+DEFAULT_EML_DIR = Path("output") / "emails"
+DEFAULT_MBOX_PATH = Path("output") / "emails.mbox"
+
+_UNSAFE = re.compile(r"[^\w.@-]+")
+
+
+class DeliveryBackend(Protocol):
+    def send_message(
+        self,
+        msg: Message,
+        from_addr: str | None = None,
+        to_addrs: list[str] | None = None,
+    ) -> None: ...
+
+    def close(self) -> None: ...
+
+
+class EmlSink:
+    """Grava cada mensagem entregue como um arquivo .eml no diretório."""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._counter = itertools.count(len(list(directory.glob("*.eml"))) + 1)
+        self._lock = threading.Lock()
+
+    def send_message(
+        self,
+        msg: Message,
+        from_addr: str | None = None,
+        to_addrs: list[str] | None = None,
+    ) -> None:
+        recipient = ",".join(to_addrs or [str(msg["To"])])
+        with self._lock:
+            number = next(self._counter)
+        path = self.directory / f"{number:05d}-{_UNSAFE.sub('_', recipient)}.eml"
+        path.write_bytes(msg.as_bytes())
+
+    def close(self) -> None:
+        pass
+
+
+class MboxSink:
+    """Acrescenta as mensagens entregues a um arquivo mbox (reaberto após `close`)."""
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.mbox: mailbox.mbox | None = None
+        self._lock = threading.Lock()
+
+    def send_message(
+        self,
+        msg: Message,
+        from_addr: str | None = None,
+        to_addrs: list[str] | None = None,
+    ) -> None:
+        message = mailbox.mboxMessage(msg)
+        if from_addr:
+            message.set_from(from_addr, True)
+        with self._lock:
+            if self.mbox is None:
+                self.mbox = mailbox.mbox(self.path)
+            self.mbox.add(message)
+            self.mbox.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self.mbox is not None:
+                self.mbox.close()
+                self.mbox = None
+
+
+class NullSink:
+    """Descarta as mensagens, apenas contando quantas foram entregues."""
+
+    def __init__(self):
+        self.sent = 0
+        self._lock = threading.Lock()
+
+    def send_message(
+        self,
+        msg: Message,
+        from_addr: str | None = None,
+        to_addrs: list[str] | None = None,
+    ) -> None:
+        with self._lock:
+            self.sent += 1
+
+    def close(self) -> None:
+        pass
+
+
+def create_backend(
+    profile: TeacherProfile, pool_size: int = SMTP_POOL_SIZE
+) -> DeliveryBackend:
+    """Cria o backend de entrega configurado no perfil do professor."""
+    path = Path(profile.email_backend_path) if profile.email_backend_path else None
+    if profile.email_backend == EmailBackend.EML:
+        return EmlSink(path or DEFAULT_EML_DIR)
+    if profile.email_backend == EmailBackend.MBOX:
+        return MboxSink(path or DEFAULT_MBOX_PATH)
+    if profile.email_backend == EmailBackend.NULL:
+        return NullSink()
+    return SmtpPool(
+        profile.smtp_server,
+        profile.smtp_port,
+        profile.email,
+        profile.smtp_password,
+        size=pool_size,
+    )
@@ -0,0 +1,164 @@
+"""Download paralelo dos anexos do Drive, com cache validado por conteúdo."""
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable
+
+from core import logger
+from core.cache import DiskCache, make_key, shared_cache_dir
+from core.drive import DOWNLOAD_CHUNK_SIZE, download_to, get_files_metadata
+from models import DriveFile, SharedDriveFile, Submission
+
+DOWNLOAD_WORKERS = 8
+DOWNLOAD_TIMEOUT = 300  # segundos por arquivo
+DRIVE_CACHE_MAX_BYTES = 2 * 1024**3  # 2 GiB
+
+
+def drive_cache(output_dir: Path, max_bytes: int = DRIVE_CACHE_MAX_BYTES) -> DiskCache:
+    """Cache de arquivos do Drive compartilhado entre cursos e atividades."""
+    return DiskCache(shared_cache_dir(output_dir, "drive"), max_bytes=max_bytes)
+
+
+def submission_drive_files(submission: Submission) -> list[DriveFile]:
+    """Arquivos do Drive anexados a uma submissão."""
+    if not submission.assignmentSubmission:
+        return []
+    files = []
+    for attachment in submission.assignmentSubmission.attachments or []:
+        drive_file = attachment.driveFile
+        if isinstance(drive_file, SharedDriveFile):
+            drive_file = drive_file.driveFile
+        if drive_file is not None:
+            files.append(drive_file)
+    return files
+
+
+class DownloadManager:
+    """
+    Baixa em paralelo os anexos das próximas submissões.
+
+    `prefetch` busca em lote os metadados dos arquivos e agenda os downloads em
+    um pool com concorrência limitada; `get` aguarda o resultado de um arquivo,
+    agendando-o se ainda não tiver sido pedido. O tempo limite por arquivo é
+    aplicado pelo worker a partir do início do download, então a espera na
+    fila do pool não conta contra ele.
+
+    Cada arquivo é baixado em pedaços direto para um temporário que é movido
+    atomicamente para o cache compartilhado, endereçado por ID do Drive e
+    `md5Checksum` (ou `modifiedTime`), então uma edição do aluno invalida a
+    cópia antiga e materiais repetidos entre atividades são baixados uma vez.
+    """
+
+    def __init__(
+        self,
+        drive_service: ...,
+        cache: DiskCache,
+        max_workers: int = DOWNLOAD_WORKERS,
+        timeout: float = DOWNLOAD_TIMEOUT,
+        chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+    ):
+        self.drive_service = drive_service
+        self.cache = cache
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="drive-download"
+        )
+        self._futures: dict[str, Future[Path | None]] = {}
+        self._cancel = threading.Event()
+        self._metadata: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def _ensure_metadata(self, drive_files: Iterable[DriveFile]) -> None:
+        with self._lock:
+            missing = list(
+                {
+                    drive_file.id
+                    for drive_file in drive_files
+                    if drive_file.id not in self._metadata
+                    and drive_file.id not in self._futures
+                }
+            )
+        if not missing:
+            return
+        metadata = get_files_metadata(missing, self.drive_service)
+        with self._lock:
+            self._metadata.update(metadata)
+
+    def version(self, drive_file: DriveFile) -> str | None:
+        """Identifica o conteúdo atual do arquivo (md5Checksum ou modifiedTime)."""
+        self._ensure_metadata([drive_file])
+        metadata = self._metadata.get(drive_file.id) or {}
+        return metadata.get("md5Checksum") or metadata.get("modifiedTime")
+
+    def _cache_key(self, drive_file: DriveFile) -> str | None:
+        version = self.version(drive_file)
+        return make_key(drive_file.id, version) if version else None
+
+    def _fetch(self, drive_file: DriveFile) -> Path | None:
+        key = self._cache_key(drive_file)
+        if key is not None and (path := self.cache.get_path(key)) is not None:
+            return path
+
+        if key is None:
+            # Sem metadados não há como validar a cópia: usa uma chave única,
+            # que nunca será reaproveitada e sai do cache no próximo despejo
+            key = make_key(drive_file.id, str(time.time_ns()))
+
+        # Os pedaços vão direto para um temporário no cache, sem passar por memória
+        return self.cache.set_stream(
+            key,
+            lambda file: download_to(
+                drive_file.id,
+                self.drive_service,
+                file,
+                silent=True,
+                timeout=self.timeout,
+                chunk_size=self.chunk_size,
+                cancel=self._cancel,
+            ),
+        )
+
+    def _schedule(self, drive_file: DriveFile) -> Future[Path | None]:
+        with self._lock:
+            future = self._futures.get(drive_file.id)
+            if future is None:
+                future = self._executor.submit(self._fetch, drive_file)
+                self._futures[drive_file.id] = future
+            return future
+
+    def prefetch(self, drive_files: Iterable[DriveFile]) -> None:
+        """Busca os metadados em lote e agenda o download dos arquivos, sem aguardar."""
+        drive_files = list(drive_files)
+        self._ensure_metadata(drive_files)
+        for drive_file in drive_files:
+            self._schedule(drive_file)
+
+    def get(self, drive_file: DriveFile) -> Path | None:
+        """Aguarda o download do arquivo e retorna seu caminho (None em caso de erro)."""
+        self._ensure_metadata([drive_file])
+        future = self._schedule(drive_file)
+        try:
+            path = future.result()
+        except Exception as e:
+            logger.error(f"Erro ao baixar {drive_file.title}: {str(e)}")
+            path = None
+
+        if path is None:
+            # Permite nova tentativa se o arquivo for pedido de novo
+            with self._lock:
+                if future.done():
+                    self._futures.pop(drive_file.id, None)
+        return path
+
+    def close(self) -> None:
+        """Cancela downloads pendentes, encerra o pool e aplica o limite do cache.
+
+        Downloads em andamento param no próximo pedaço (ou no tempo limite do
+        socket) e seus temporários são apagados por `DiskCache.set_stream`.
+        """
+        self._cancel.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.cache.evict()
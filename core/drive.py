@@ -1,38 +1,61 @@
 """Google Drive integration module."""
 
-import io
-from typing import Optional
+import threading
+import time
+from typing import BinaryIO
 
 from googleapiclient.errors import HttpError
-from googleapiclient.http import MediaIoBaseDownload
+from googleapiclient.http import DEFAULT_CHUNK_SIZE, MediaIoBaseDownload
 
 from core import logger
 
 
-def download_file(
-    file_id: str, drive_service: ..., silent: bool = False
-) -> Optional[bytes]:
+# Padrão da biblioteca (100 MiB): quase todo anexo vem em uma única requisição
+DOWNLOAD_CHUNK_SIZE = DEFAULT_CHUNK_SIZE
+
+
+def download_to(
+    file_id: str,
+    drive_service: ...,
+    file: BinaryIO,
+    silent: bool = False,
+    timeout: float | None = None,
+    chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+    cancel: threading.Event | None = None,
+) -> bool:
     """
-    Download arquivo do Google Drive com progresso.
+    Download arquivo do Google Drive escrevendo os pedaços diretamente em `file`,
+    sem manter o conteúdo completo em memória.
 
     Args:
         file_id: ID do arquivo no Drive
         drive_service: Serviço autenticado do Google Drive
+        file: Arquivo binário aberto para escrita
         silent: Se True, não exibe progresso do download
+        timeout: Tempo máximo, em segundos, para concluir o download
+        chunk_size: Tamanho, em bytes, de cada requisição ao Drive
+        cancel: Evento que interrompe o download antes do próximo pedaço
 
     Returns:
-        Bytes do arquivo ou None se houver erro
+        True se o download foi concluído, False se houver erro
     """
     try:
         if not silent:
             logger.info(f"Iniciando download do arquivo {file_id}...")
 
+        # O prazo total só é conferido entre pedaços: o tempo limite do socket
+        # das conexões (HTTP_SOCKET_TIMEOUT em core.google) impede que um
+        # pedaço parado prenda a thread indefinidamente
         request = drive_service.files().get_media(fileId=file_id)
-        file = io.BytesIO()
-        downloader = MediaIoBaseDownload(file, request)
+        downloader = MediaIoBaseDownload(file, request, chunksize=chunk_size)
         done = False
+        deadline = time.monotonic() + timeout if timeout is not None else None
 
         while not done:
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"download excedeu {timeout:.0f}s")
+            if cancel is not None and cancel.is_set():
+                raise TimeoutError("download cancelado")
             status, done = downloader.next_chunk()
             if not silent:
                 logger.info(
@@ -41,12 +64,51 @@ def download_file(
 
         if not silent:
             logger.success("Download concluído com sucesso")
-        return file.getvalue()
+        return True
 
     except HttpError as error:
         logger.error(f"Erro ao baixar arquivo: {str(error)}")
-        return None
+        return False
 
     except Exception as e:
         logger.error(f"Erro inesperado: {str(e)}")
-        return None
+        return False
+
+
+METADATA_BATCH_SIZE = 100  # limite de requisições por batch da API do Drive
+METADATA_FIELDS = "id,md5Checksum,modifiedTime,size"
+
+
+def get_files_metadata(
+    file_ids: list[str], drive_service: ..., batch_size: int = METADATA_BATCH_SIZE
+) -> dict[str, dict]:
+    """
+    Busca em lote os metadados (md5Checksum, modifiedTime, size) de arquivos do Drive.
+
+    Args:
+        file_ids: IDs dos arquivos no Drive
+        drive_service: Serviço autenticado do Google Drive
+        batch_size: Quantidade máxima de arquivos por requisição batch
+
+    Returns:
+        Mapeamento ID -> metadados; arquivos com erro ficam de fora
+    """
+    metadata: dict[str, dict] = {}
+
+    def callback(request_id, response, exception):
+        if exception is None:
+            metadata[request_id] = response
+
+    for start in range(0, len(file_ids), batch_size):
+        batch = drive_service.new_batch_http_request(callback=callback)
+        for file_id in file_ids[start : start + batch_size]:
+            batch.add(
+                drive_service.files().get(fileId=file_id, fields=METADATA_FIELDS),
+                request_id=file_id,
+            )
+        try:
+            batch.execute()
+        except Exception as e:
+            logger.warning(f"Erro ao buscar metadados de arquivos: {str(e)}")
+
+    return metadata
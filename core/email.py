@@ -1,12 +1,16 @@
+import mimetypes
+from email.mime.application import MIMEApplication
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from pathlib import Path
-from smtplib import SMTP_SSL
 
 import markdown2
 from jinja2 import Environment, FileSystemLoader
 
 from core import logger
+from core.delivery import create_backend
+from core.outbox import Outbox, OutboxSender
+from core.smtp import SMTP_POOL_SIZE
 from models import Course, CourseWork, FeedbackResult, TeacherProfile
 
 
@@ -26,37 +30,44 @@ class EmailSender:
 
         return cls(profile, send_copy=send_copy)
 
-    def __init__(self, profile: TeacherProfile, *, send_copy: bool = False):
-        """Inicializa o EmailSender com as configurações do perfil."""
+    def __init__(
+        self,
+        profile: TeacherProfile,
+        *,
+        send_copy: bool = False,
+        pool_size: int = SMTP_POOL_SIZE,
+    ):
+        """Inicializa o EmailSender com as configurações do perfil.
+
+        As mensagens são entregues pelo backend configurado no perfil (SMTP,
+        arquivos .eml/mbox ou descarte). Com SMTP, nenhuma conexão é aberta
+        aqui: as sessões são criadas no primeiro envio e compartilhadas entre
+        as threads de avaliação.
+        """
         self.profile = profile
         self.send_copy = send_copy
-        self.smtp = SMTP_SSL(self.profile.smtp_server, self.profile.smtp_port)
-        self.smtp.login(self.profile.email, self.profile.smtp_password)
-        self.smtp.set_debuglevel(0)
+        self.backend = create_backend(profile, pool_size)
+        self.pool_size = pool_size
+        self.outbox: OutboxSender | None = None
 
         # Setup Jinja2 environment
         self.jinja_env = Environment(
             loader=FileSystemLoader(self.TEMPLATE_DIR), autoescape=True
         )
         self.template = self.jinja_env.get_template("feedback_email_template.html")
+        self.digest_template = self.jinja_env.get_template("digest_email_template.html")
 
-    def _create_html_message(
+    def render_html(
         self,
-        to_address: str,
-        subject: str,
         feedback: FeedbackResult,
         *,
         course: Course,
         coursework: CourseWork,
-    ) -> MIMEMultipart:
-        """Cria uma mensagem HTML com o feedback."""
-        msg = MIMEMultipart("alternative")
-        msg["Subject"] = subject
-        msg["From"] = f"{self.profile.name} <{self.profile.email}>"
-        msg["To"] = to_address
-
-        # Render template with context
+        student_name: str | None = None,
+    ) -> str:
+        """Renderiza o corpo HTML do email de feedback (markdown + template)."""
         context = {
+            "student_name": student_name.split()[0] if student_name else None,
             "feedback_content": self._convert_markdown_to_html(feedback.feedback),
             "feedback_grade": feedback.grade,
             "whatsapp_link": f"{self.profile.whatsapp_link}?text=Olá *{self.profile.name}*, gostaria de discutir o feedback recebido sobre a atividade *{coursework.title}* do curso *{course.name}* com você!!",
@@ -74,7 +85,27 @@ class EmailSender:
             if coursework.maxPoints:
                 context["assignment_points"] = str(coursework.maxPoints)
 
-        html = self.template.render(**context)
+        return self.template.render(**context)
+
+    def _create_html_message(
+        self,
+        to_address: str,
+        subject: str,
+        feedback: FeedbackResult,
+        *,
+        course: Course,
+        coursework: CourseWork,
+        student_name: str | None = None,
+    ) -> MIMEMultipart:
+        """Cria uma mensagem HTML com o feedback."""
+        msg = MIMEMultipart("alternative")
+        msg["Subject"] = subject
+        msg["From"] = f"{self.profile.name} <{self.profile.email}>"
+        msg["To"] = to_address
+
+        html = self.render_html(
+            feedback, course=course, coursework=coursework, student_name=student_name
+        )
 
         text_part = MIMEText(feedback.feedback, "plain")
         html_part = MIMEText(html, "html")
@@ -89,6 +120,10 @@ class EmailSender:
         extras = {
             "code-friendly": None,  # Melhor formatação de código
             "fenced-code-blocks": None,  # Suporte a blocos de código com ```
+            # Só a classe da linguagem no <code>, sem colorir com o pygments: o
+            # template não tem o CSS das classes do pygments, e colorir era a
+            # maior parte do tempo de renderização
+            "highlightjs-lang": None,
             "tables": None,  # Suporte a tabelas
             "break-on-newline": True,  # Quebras de linha como no markdown
             "header-ids": None,  # Adiciona IDs nos cabeçalhos
@@ -102,8 +137,13 @@ class EmailSender:
         *,
         course: Course,
         coursework: CourseWork,
+        student_name: str | None = None,
     ) -> None:
-        """Envia um email com o feedback formatado em HTML."""
+        """Envia um email com o feedback formatado em HTML.
+
+        O email cumprimenta o aluno por `student_name`; o feedback em si não
+        cita o nome, para poder ser reaproveitado entre submissões idênticas.
+        """
         email_title = f"[NES] Feedback: {course.name} - {coursework.title}"
         if feedback.grade:
             email_title += f" (Nota: {feedback.grade:.1f}"
@@ -111,17 +151,110 @@ class EmailSender:
                 email_title += f"/{coursework.maxPoints:.1f}"
             email_title += ")"
 
-        with logger.status(f"Enviando email para [blue]{to_address}[/blue]..."):
-            msg = self._create_html_message(
-                to_address,
-                email_title,
-                feedback=feedback,
-                course=course,
-                coursework=coursework,
+        msg = self._create_html_message(
+            to_address,
+            email_title,
+            feedback=feedback,
+            course=course,
+            coursework=coursework,
+            student_name=student_name,
+        )
+        recipients = [[to_address]]
+        if self.send_copy:
+            recipients.append([self.profile.email])
+        self._dispatch(msg, recipients, to_address)
+
+    def _dispatch(
+        self, msg: MIMEMultipart, recipients: list[list[str]], label: str
+    ) -> None:
+        """Guarda a mensagem na caixa de saída, se aberta, ou a envia na hora."""
+        if self.outbox is not None:
+            for to_addrs in recipients:
+                message_id = self.outbox.outbox.put(msg, to_addrs, self.profile.email)
+                self.outbox.submit(message_id)
+            logger.info(f"[dim]✉️  Email para {label} na caixa de saída[/dim]")
+            return
+
+        with logger.status(f"Enviando email para [blue]{label}[/blue]..."):
+            for to_addrs in recipients:
+                self.backend.send_message(
+                    msg, from_addr=self.profile.email, to_addrs=to_addrs
+                )
+        logger.info(f"[dim]✉️  Email enviado para {label}[/dim]")
+
+    def send_digest(
+        self,
+        students: list[dict[str, str]],
+        summary: list[tuple[str, str]],
+        *,
+        course: Course,
+        coursework: CourseWork,
+        attachment: Path | None = None,
+    ) -> None:
+        """
+        Envia ao professor um único resumo da avaliação, em vez de uma cópia
+        de cada feedback.
+
+        Args:
+            students: Linhas da tabela de notas (name, email, grade, late,
+                link e feedback_file)
+            summary: Estatísticas da execução, como pares (rótulo, valor)
+            attachment: Relatório em Excel a anexar, se houver
+        """
+        html = self.digest_template.render(
+            course_name=course.name,
+            assignment_title=coursework.title,
+            assignment_points=coursework.maxPoints,
+            summary=summary,
+            students=students,
+            has_attachment=attachment is not None,
+        )
+        text = "\n".join(f"{label}: {value}" for label, value in summary)
+        text += "\n\n" + "\n".join(
+            f"{student['name']}: {student['grade']} {student['link']}"
+            for student in students
+        )
+
+        msg = MIMEMultipart("mixed")
+        msg["Subject"] = f"[NES] Resumo da avaliação: {course.name} - {coursework.title}"
+        msg["From"] = f"{self.profile.name} <{self.profile.email}>"
+        msg["To"] = self.profile.email
+        body = MIMEMultipart("alternative")
+        body.attach(MIMEText(text, "plain"))
+        body.attach(MIMEText(html, "html"))
+        msg.attach(body)
+        if attachment is not None:
+            subtype = (mimetypes.guess_type(attachment.name)[0] or "").split("/")[-1]
+            part = MIMEApplication(
+                attachment.read_bytes(), subtype or "octet-stream", Name=attachment.name
             )
-            self.smtp.send_message(msg)
-            if self.send_copy:
-                self.smtp.send_message(
-                    msg, from_addr=self.profile.email, to_addrs=self.profile.email
+            part["Content-Disposition"] = f'attachment; filename="{attachment.name}"'
+            msg.attach(part)
+
+        self._dispatch(msg, [[self.profile.email]], f"{self.profile.email} (resumo)")
+
+    def open_outbox(self, directory: Path) -> OutboxSender:
+        """
+        Passa a guardar os emails em uma caixa de saída em disco, enviada em
+        segundo plano, em vez de enviá-los durante a avaliação.
+
+        Pendentes de execuções anteriores no mesmo diretório também são enviadas.
+        """
+        self.outbox = OutboxSender(
+            Outbox(directory), self.backend, workers=self.pool_size
+        ).start()
+        return self.outbox
+
+    def close(self) -> None:
+        """Aguarda a caixa de saída (se houver) e encerra o backend de entrega."""
+        if self.outbox is not None:
+            with logger.status("Enviando emails da caixa de saída..."):
+                self.outbox.stop()
+            counts = self.outbox.outbox.counts()
+            if counts["pendentes"] or counts["falhas"]:
+                logger.warning(
+                    f"{counts['pendentes'] + counts['falhas']} email(s) não enviado(s); "
+                    f"reenvie com: python -m cli.outbox {self.outbox.outbox.directory}"
                 )
-        logger.info(f"[dim]✉️  Email enviado para {to_address}[/dim]")
+            self.outbox = None
+        self.backend.close()
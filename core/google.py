@@ -1,63 +1,209 @@
 from __future__ import print_function
 
+import json
 import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator
 
+import google_auth_httplib2
+import httplib2
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+from googleapiclient.discovery import build, build_from_document
+from googleapiclient.errors import UnknownApiNameOrVersion
+from googleapiclient.http import HttpRequest
 
 from core import logger
+from core.cache import DiskCache, make_key
 
+# Escopos por API
+SCOPES_MAP = {
+    "classroom": [
+        "https://www.googleapis.com/auth/classroom.announcements.readonly",
+        "https://www.googleapis.com/auth/classroom.courses.readonly",
+        "https://www.googleapis.com/auth/classroom.coursework.me",
+        "https://www.googleapis.com/auth/classroom.coursework.students",
+        "https://www.googleapis.com/auth/classroom.rosters.readonly",
+        "https://www.googleapis.com/auth/classroom.profile.emails",
+        "https://www.googleapis.com/auth/classroom.student-submissions.students.readonly",
+        "https://www.googleapis.com/auth/classroom.addons.teacher",
+    ],
+    "drive": [
+        "https://www.googleapis.com/auth/drive.readonly",
+    ],
+}
 
-def get_service(
-    api_name: str,
-    api_version: str,
-    credentials_path="credentials.json",
-    token_dir="tokens",
-):
-    """Autentica e retorna um serviço da API do Google, com token separado por API."""
-    os.makedirs(token_dir, exist_ok=True)
-    token_path = os.path.join(token_dir, f"token_{api_name}.json")
-
-    # Escopos por API
-    SCOPES_MAP = {
-        "classroom": [
-            "https://www.googleapis.com/auth/classroom.announcements.readonly",
-            "https://www.googleapis.com/auth/classroom.courses.readonly",
-            "https://www.googleapis.com/auth/classroom.coursework.me",
-            "https://www.googleapis.com/auth/classroom.coursework.students",
-            "https://www.googleapis.com/auth/classroom.rosters.readonly",
-            "https://www.googleapis.com/auth/classroom.profile.emails",
-            "https://www.googleapis.com/auth/classroom.student-submissions.students.readonly",
-            "https://www.googleapis.com/auth/classroom.addons.teacher",
-        ],
-        "drive": [
-            "https://www.googleapis.com/auth/drive.readonly",
-        ],
-    }
-
-    scopes = SCOPES_MAP.get(api_name)
-    if not scopes:
-        logger.error(f"Escopos não definidos para API: {api_name}")
-        raise ValueError(f"Escopos não definidos para API: {api_name}")
-
-    creds = None
-
-    # Apaga o token se escopos mudarem (previne conflitos)
-    if os.path.exists(token_path):
+DISCOVERY_CACHE_DIR = Path("output") / ".cache" / "discovery"
+DISCOVERY_CACHE_MAX_AGE = 7 * 24 * 3600  # segundos
+DISCOVERY_URL = "https://www.googleapis.com/discovery/v1/apis/{api}/{version}/rest"
+HTTP_SOCKET_TIMEOUT = 60  # segundos sem receber dados antes de desistir
+
+
+class ServiceRegistry:
+    """
+    Serviços autorizados das APIs do Google, criados uma vez por processo.
+
+    As credenciais de cada API são lidas do token uma única vez e
+    compartilhadas entre os serviços; quando expiram, são renovadas e o token
+    renovado é salvo, para que a próxima execução não precise renová-lo de
+    novo. Os serviços são construídos a partir dos documentos de descoberta
+    que acompanham a biblioteca; APIs sem documento local são buscadas uma
+    vez e guardadas em `output/.cache/discovery`.
+
+    Cada thread usa sua própria conexão autorizada (httplib2.Http não é
+    thread-safe), reaproveitada entre as requisições daquela thread.
+
+    O tempo de cada etapa da inicialização fica em `timings` (veja `report`).
+    """
+
+    def __init__(
+        self,
+        credentials_path: str = "credentials.json",
+        token_dir: str = "tokens",
+        discovery_cache: DiskCache | None = None,
+    ):
+        self.credentials_path = credentials_path
+        self.token_dir = token_dir
+        self.discovery_cache = discovery_cache
+        self.timings: dict[str, float] = {}
+        self._credentials: dict[str, Credentials] = {}
+        self._services: dict[tuple[str, str], Any] = {}
+        self._lock = threading.RLock()
+        self._local = threading.local()
+
+    @contextmanager
+    def timed(self, label: str) -> Iterator[None]:
+        """Soma o tempo do bloco à etapa `label` do relatório de inicialização."""
+        started = time.perf_counter()
         try:
-            creds = Credentials.from_authorized_user_file(token_path, scopes)
-        except Exception:
-            os.remove(token_path)
-            creds = None
-
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            flow = InstalledAppFlow.from_client_secrets_file(credentials_path, scopes)
-            creds = flow.run_local_server(port=0)
+            yield
+        finally:
+            self.timings[label] = self.timings.get(label, 0.0) + (
+                time.perf_counter() - started
+            )
+
+    def credentials(self, api_name: str) -> Credentials:
+        """Credenciais da API, com token separado por API (lidas uma vez)."""
+        with self._lock:
+            if api_name in self._credentials:
+                return self._credentials[api_name]
+
+            scopes = SCOPES_MAP.get(api_name)
+            if not scopes:
+                logger.error(f"Escopos não definidos para API: {api_name}")
+                raise ValueError(f"Escopos não definidos para API: {api_name}")
+
+            with self.timed(f"credenciais {api_name}"):
+                creds = self._load_credentials(api_name, scopes)
+            self._credentials[api_name] = creds
+            return creds
+
+    def _load_credentials(self, api_name: str, scopes: list[str]) -> Credentials:
+        os.makedirs(self.token_dir, exist_ok=True)
+        token_path = os.path.join(self.token_dir, f"token_{api_name}.json")
+        creds = None
+
+        # Apaga o token se escopos mudarem (previne conflitos)
+        if os.path.exists(token_path):
+            try:
+                creds = Credentials.from_authorized_user_file(token_path, scopes)
+            except Exception:
+                os.remove(token_path)
+                creds = None
+
+        if not creds or not creds.valid:
+            if creds and creds.expired and creds.refresh_token:
+                creds.refresh(Request())
+            else:
+                flow = InstalledAppFlow.from_client_secrets_file(
+                    self.credentials_path, scopes
+                )
+                creds = flow.run_local_server(port=0)
+            # Salva também o token renovado: sem isso, toda execução o renovaria
             with open(token_path, "w") as token:
                 token.write(creds.to_json())
-    return build(api_name, api_version, credentials=creds)
+        return creds
+
+    def _discovery_document(self, api_name: str, api_version: str) -> dict | None:
+        """Documento de descoberta do cache em disco, buscando-o se necessário."""
+        if self.discovery_cache is None:
+            return None
+        key = make_key(api_name, api_version)
+        if (cached := self.discovery_cache.get_text(key)) is not None:
+            return json.loads(cached)
+        response, content = httplib2.Http(timeout=30).request(
+            DISCOVERY_URL.format(api=api_name, version=api_version)
+        )
+        if response.status != 200:
+            raise UnknownApiNameOrVersion(f"{api_name} {api_version}")
+        self.discovery_cache.set(key, content)
+        return json.loads(content)
+
+    def authorized_http(self, api_name: str) -> google_auth_httplib2.AuthorizedHttp:
+        """Conexão autorizada da API para a thread atual, criada no primeiro uso.
+
+        O tempo limite do socket é definido na criação: o httplib2 só o aplica
+        ao abrir conexões, então alterá-lo depois não afetaria as reaproveitadas.
+        """
+        if not hasattr(self._local, "connections"):
+            self._local.connections = {}
+        connections: dict[str, Any] = self._local.connections
+        if api_name not in connections:
+            connections[api_name] = google_auth_httplib2.AuthorizedHttp(
+                self.credentials(api_name),
+                http=httplib2.Http(timeout=HTTP_SOCKET_TIMEOUT),
+            )
+        return connections[api_name]
+
+    def get(self, api_name: str, api_version: str) -> Any:
+        """Retorna o serviço da API, construindo-o na primeira chamada."""
+        with self._lock:
+            if (api_name, api_version) in self._services:
+                return self._services[(api_name, api_version)]
+
+            creds = self.credentials(api_name)
+
+            # O serviço é compartilhado pelas threads de avaliação: cada requisição
+            # usa a conexão autorizada da thread que a executa
+            def build_request(http, *args, **kwargs):
+                return HttpRequest(self.authorized_http(api_name), *args, **kwargs)
+
+            with self.timed(f"serviço {api_name}"):
+                try:
+                    service = build(
+                        api_name,
+                        api_version,
+                        credentials=creds,
+                        requestBuilder=build_request,
+                        static_discovery=True,
+                    )
+                except UnknownApiNameOrVersion:
+                    document = self._discovery_document(api_name, api_version)
+                    if document is None:
+                        raise
+                    service = build_from_document(
+                        document, credentials=creds, requestBuilder=build_request
+                    )
+            self._services[(api_name, api_version)] = service
+            return service
+
+    def report(self) -> str:
+        """Resumo de uma linha dos tempos de inicialização."""
+        steps = " · ".join(
+            f"{label} {elapsed:.2f}s" for label, elapsed in self.timings.items()
+        )
+        return f"{steps} · total {sum(self.timings.values()):.2f}s"
+
+
+services = ServiceRegistry(
+    discovery_cache=DiskCache(DISCOVERY_CACHE_DIR, max_age=DISCOVERY_CACHE_MAX_AGE)
+)
+
+
+def get_service(api_name: str, api_version: str) -> Any:
+    """Autentica e retorna um serviço da API do Google (compartilhado no processo)."""
+    return services.get(api_name, api_version)
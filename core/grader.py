@@ -1,15 +1,39 @@
 """Module for grading submissions."""
 
+import multiprocessing
+import os
+import threading
+from collections import defaultdict, deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from itertools import islice
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterable, Iterator, TypeVar
 
 import pandas as pd
 
 from core import logger
-from core.classroom import grade_submission, return_submission
+from core.batch import BatchBackend, build_batch_request, run_batch
+from core.budget import CONTEXT_BUDGET, ContextBudget
+from core.cache import DiskCache, shared_cache_dir
+from core.classroom import publish_grades
+from core.downloads import (
+    DOWNLOAD_CHUNK_SIZE,
+    DOWNLOAD_TIMEOUT,
+    DOWNLOAD_WORKERS,
+    DownloadManager,
+    drive_cache,
+    submission_drive_files,
+)
 from core.email import EmailSender
-from core.stringfy import AttachmentParser
-from core.users import get_user_profile
+from core.journal import RunJournal
+from core.outbox import Outbox
+from core.pipeline import Pipeline, Stage
+from core.similarity import SIMILARITY_THRESHOLD, SimilarityIndex, fingerprint
+from core.smtp import SMTP_POOL_SIZE
+from core.stringfy import ERROR_PLACEHOLDER, AttachmentParser, parsed_cache
+from core.users import CourseRoster
+from core.web import WebClient, web_cache
 from models import (
     Attachment,
     Course,
@@ -19,7 +43,43 @@ from models import (
     UserProfile,
 )
 
-from .llm import create_feedback
+from .llm import (
+    LLM_RPM,
+    LLM_TPM,
+    AsyncFeedbackClient,
+    TokenUsage,
+    create_feedback,
+    feedback_cache_key,
+    reuse_feedback,
+)
+
+LLM_CACHE_MAX_ENTRIES = 5000
+LLM_CACHE_MAX_AGE = 30 * 24 * 60 * 60  # segundos
+
+PARSE_WORKERS = max(1, min(4, os.cpu_count() or 1))
+
+T = TypeVar("T")
+
+
+@dataclass
+class SubmissionJob:
+    """Estado de uma submissão ao longo das etapas do pipeline de avaliação."""
+
+    idx: int
+    submission: Submission
+    outcome: dict[str, Any] = field(
+        default_factory=lambda: {
+            "erro": False,
+            "nota": None,
+            "aluno": None,
+            "retomado": False,
+        }
+    )
+    student: UserProfile | None = None
+    downloaded: dict[str, Path | None] = field(default_factory=dict)
+    context: str | None = None
+    digest: str | None = None
+    result: FeedbackResult | None = None
 
 
 class SubmissionsGrader:
@@ -35,44 +95,159 @@ class SubmissionsGrader:
         output_dir: Path,
         send_email: bool = False,
         send_email_copy: bool = False,
+        send_teacher_digest: bool = False,
+        digest_attach_report: bool = True,
         return_grades: bool = False,
+        max_workers: int = 1,
+        page_size: int = 100,
+        force_regrade: bool = False,
+        use_llm_cache: bool = True,
+        prompt_cache: bool = True,
+        batch_backend: BatchBackend | None = None,
+        batch_poll_interval: float = 60,
+        llm_rpm: int = LLM_RPM,
+        llm_tpm: int = LLM_TPM,
+        context_budget: int | None = CONTEXT_BUDGET,
+        download_workers: int = DOWNLOAD_WORKERS,
+        download_timeout: float = DOWNLOAD_TIMEOUT,
+        download_chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+        parse_workers: int = PARSE_WORKERS,
+        similarity_threshold: float = SIMILARITY_THRESHOLD,
     ):
-        """Inicializa o avaliador de submissões."""
+        """Inicializa o avaliador de submissões.
+
+        Args:
+            send_email_copy: Envia ao professor uma cópia de cada email de feedback
+            send_teacher_digest: Envia ao professor um único resumo ao final da
+                avaliação, com as notas, os links das submissões e as estatísticas
+            digest_attach_report: Anexa o relatório em Excel ao resumo
+            max_workers: Número de submissões avaliadas em paralelo (1 = sequencial)
+            page_size: Quantidade de submissões pedidas por página à API
+            force_regrade: Reavalia inclusive submissões já registradas no diário
+            use_llm_cache: Reaproveita feedbacks já gerados para o mesmo conteúdo
+            prompt_cache: Usa o layout de prompt com prefixo estável (instruções e
+                critérios primeiro), aproveitando o cache de prompts do provedor
+            batch_backend: Se informado, avalia todas as submissões de uma vez pela
+                API de lote (mais barata, porém assíncrona)
+            batch_poll_interval: Intervalo em segundos entre consultas ao lote
+            llm_rpm: Limite de requisições por minuto ao LLM, compartilhado entre as threads
+            llm_tpm: Limite de tokens por minuto ao LLM, compartilhado entre as threads
+            context_budget: Máximo de tokens do contexto de cada submissão (None = sem limite)
+            download_workers: Downloads simultâneos de anexos do Drive
+            download_timeout: Tempo máximo, em segundos, para baixar cada arquivo
+            download_chunk_size: Tamanho, em bytes, de cada requisição de download
+            parse_workers: Processos usados para extrair o texto dos anexos
+                (1 = na própria thread)
+            similarity_threshold: Similaridade mínima para listar duas submissões
+                no relatório de similaridade
+        """
         self.classroom_service = classroom_service
         self.drive_service = drive_service
         self.course = course
         self.coursework = coursework
         self.criteria_path = criteria_path
+        self.criteria = criteria_path.read_text(encoding="utf-8")
         self.output_dir = output_dir
         self.return_grades = return_grades
+        self.max_workers = max(1, max_workers)
+        self.page_size = page_size
+        self.fetch_stats = {"paginas": 0, "itens": 0}
+        self._errors_lock = threading.Lock()
+        # Notas aguardando publicação em lote: submission_id -> (aluno, nota)
+        self._pending_grades: dict[str, tuple[UserProfile, float]] = {}
+        self._pending_lock = threading.Lock()
+        self.prompt_cache = prompt_cache
+        self.token_usage = TokenUsage()
+        self.batch_backend = batch_backend
+        self.batch_poll_interval = batch_poll_interval
+        self.llm_rpm = llm_rpm
+        self.llm_tpm = llm_tpm
+        self.llm_client: AsyncFeedbackClient | None = None
+        self.download_workers = download_workers
+        self.download_timeout = download_timeout
+        self.download_chunk_size = download_chunk_size
+        self.downloads: DownloadManager | None = None
+        self.parse_workers = max(1, parse_workers)
+        self.parse_pool: ProcessPoolExecutor | None = None
+        self.similarity = SimilarityIndex(similarity_threshold)
+        # Dados de similaridade por aluno, guardados no diário junto da nota
+        self._fingerprints: dict[str, dict[str, Any]] = {}
+        # False se alguma submissão pulada não tem esses dados no diário
+        self._similarity_complete = True
+        # Avaliações compartilhadas entre submissões de conteúdo idêntico
+        self._shared_evaluations: dict[
+            str, Future[tuple[UserProfile, FeedbackResult | None]]
+        ] = {}
+        self._shared_lock = threading.Lock()
+        self.reused_evaluations = 0
+        self.drive_cache = drive_cache(output_dir)
+        self.parsed_cache = parsed_cache(output_dir)
+        self.web_cache = web_cache(output_dir)
+        self.web: WebClient | None = None
+        self.context_budget = (
+            ContextBudget(context_budget) if context_budget is not None else None
+        )
+        self.journal = RunJournal(output_dir, force=force_regrade)
+        # Compartilhado entre cursos e atividades: output/.cache/llm
+        self.llm_cache = DiskCache(
+            shared_cache_dir(output_dir, "llm"),
+            max_entries=LLM_CACHE_MAX_ENTRIES,
+            max_age=LLM_CACHE_MAX_AGE,
+            enabled=use_llm_cache,
+        )
+        self.roster = CourseRoster(
+            classroom_service,
+            course.id,
+            cache_file=output_dir.parent / "roster.json",
+        )
+        self.send_email = send_email
+        self.send_teacher_digest = send_teacher_digest
+        self.digest_attach_report = digest_attach_report
         self.email_sender = (
-            EmailSender.get_instance(send_email_copy) if send_email else None
+            EmailSender.get_instance(send_email and send_email_copy)
+            if send_email or send_teacher_digest
+            else None
         )
 
-    def _get_submissions(self) -> list[Submission]:
-        """Busca submissões de uma atividade."""
+    def _get_submissions(self) -> Iterator[Submission]:
+        """Busca submissões de uma atividade, página a página.
+
+        As submissões são validadas e entregues à medida que cada página chega,
+        permitindo que a avaliação comece antes do fim da paginação.
+        """
+        page_token = None
         try:
-            results = (
-                self.classroom_service.courses()
-                .courseWork()
-                .studentSubmissions()
-                .list(courseId=self.course.id, courseWorkId=self.coursework.id)
-                .execute()
-            )
-            return [
-                Submission.model_validate(submission)
-                for submission in results.get("studentSubmissions", [])
-            ]
+            while True:
+                results = (
+                    self.classroom_service.courses()
+                    .courseWork()
+                    .studentSubmissions()
+                    .list(
+                        courseId=self.course.id,
+                        courseWorkId=self.coursework.id,
+                        pageSize=self.page_size,
+                        pageToken=page_token,
+                    )
+                    .execute()
+                )
+                self.fetch_stats["paginas"] += 1
+                for submission in results.get("studentSubmissions", []):
+                    self.fetch_stats["itens"] += 1
+                    yield Submission.model_validate(submission)
+
+                page_token = results.get("nextPageToken")
+                if not page_token:
+                    break
         except Exception as e:
             logger.error(f"Erro ao buscar submissões: {str(e)}")
-            return []
+
+    def _feedback_path(self, student_id: str, student_name: str) -> Path:
+        return self.output_dir / f"{student_id}_{student_name}_feedback.md"
 
     def _save_feedback(self, student: UserProfile, feedback: str) -> None:
         """Salva feedback em arquivo markdown."""
         try:
-            student_file = (
-                self.output_dir / f"{student.id}_{student.full_name}_feedback.md"
-            )
+            student_file = self._feedback_path(student.id, student.full_name)
             student_file.write_text(feedback, encoding="utf-8")
         except Exception as e:
             logger.error(f"Erro ao salvar feedback: {str(e)}")
@@ -83,152 +258,684 @@ class SubmissionsGrader:
             error_file = self.output_dir / "errors.md"
             error_content = f"\n## Aluno: {student_name}\n{error}\n"
 
-            if error_file.exists():
-                current_content = error_file.read_text(encoding="utf-8")
-                error_file.write_text(current_content + error_content, encoding="utf-8")
-            else:
-                error_file.write_text(
-                    f"# Log de Erros\n\n{error_content}", encoding="utf-8"
-                )
+            with self._errors_lock:
+                if error_file.exists():
+                    current_content = error_file.read_text(encoding="utf-8")
+                    error_file.write_text(
+                        current_content + error_content, encoding="utf-8"
+                    )
+                else:
+                    error_file.write_text(
+                        f"# Log de Erros\n\n{error_content}", encoding="utf-8"
+                    )
         except Exception as e:
             logger.error(f"Erro ao registrar erro: {str(e)}")
 
-    def _get_submitted_context(self, attachments: list[Attachment]) -> str:
-        """Retorna em formato de string o contexto de tudo que foi submetido."""
-        return "\n\n".join(
-            AttachmentParser(attachment, self.drive_service, self.output_dir).stringfy()
-            for attachment in attachments
-        )
-
-    def _process_submission(
+    def _get_submitted_context(
         self,
-        submission: Submission,
-        student: UserProfile,
         attachments: list[Attachment],
-    ) -> FeedbackResult | None:
-        """Processa uma submissão individual."""
+        student: UserProfile,
+        downloaded: dict[str, Path | None] | None = None,
+    ) -> tuple[str, str | None]:
+        """Retorna em formato de string o contexto de tudo que foi submetido.
 
-        if not attachments:
-            self._log_error(
-                student.full_name,
-                "Nenhum arquivo encontrado",
-            )
-            return None
+        O contexto é limitado ao orçamento de tokens configurado; quando há
+        cortes, eles são exibidos e o contexto exato enviado ao modelo é salvo
+        em `contexts/` para conferência.
 
-        student_submitted_context = self._get_submitted_context(attachments)
-        result = create_feedback(student, student_submitted_context, self.criteria_path)
+        O conteúdo (sem os nomes dos arquivos) é indexado no relatório de
+        similaridade; o digest retornado identifica submissões idênticas. Ele é
+        None quando a submissão está vazia ou tem trechos de erro (download ou
+        processamento que falhou), que seriam iguais entre alunos diferentes.
+        """
+        parsed = [
+            AttachmentParser(
+                attachment,
+                self.drive_service,
+                self.output_dir,
+                self.downloads,
+                self.parsed_cache,
+                self.parse_pool,
+                self.web,
+                downloaded,
+            ).parse()
+            for attachment in attachments
+        ]
+        sections = [section for attachment in parsed for section in attachment.sections]
+        text = "\n".join(section.render() for section in sections)
+        self._fingerprints[student.id] = fingerprint(text)
+        digest: str | None = self.similarity.add_fingerprint(
+            student.full_name, self._fingerprints[student.id]
+        )
+        if not text.strip() or any(
+            section.text.startswith(ERROR_PLACEHOLDER) for section in sections
+        ):
+            digest = None
+        if self.context_budget is None:
+            return "\n\n".join(attachment.render() for attachment in parsed), digest
 
-        if isinstance(result, str):
-            self._log_error(student.full_name, result)
-            return None
+        parsed, decisions = self.context_budget.apply(parsed)
+        context = "\n\n".join(attachment.render() for attachment in parsed)
+        if decisions:
+            for decision in decisions:
+                logger.warning(f"[dim]✂ {decision}[/dim]")
+            self._save_context(student, context, decisions)
+        return context, digest
 
+    def _save_context(
+        self, student: UserProfile, context: str, decisions: list[str]
+    ) -> None:
+        """Salva o contexto reduzido enviado ao modelo, com as decisões de corte."""
+        try:
+            contexts_dir = self.output_dir / "contexts"
+            contexts_dir.mkdir(exist_ok=True)
+            header = "\n".join(f"- {decision}" for decision in decisions)
+            (contexts_dir / f"{student.id}_{student.full_name}_context.md").write_text(
+                f"# Cortes aplicados\n\n{header}\n\n# Contexto enviado\n\n{context}",
+                encoding="utf-8",
+            )
+        except Exception as e:
+            logger.error(f"Erro ao salvar contexto: {str(e)}")
+
+    def _deliver_feedback(
+        self, submission: Submission, student: UserProfile, result: FeedbackResult
+    ) -> FeedbackResult:
+        """Salva o feedback, enfileira a nota e o email ao aluno."""
         # Salva o feedback
         self._save_feedback(student, result.feedback)
 
-        # Processa notas
+        # Enfileira a nota para publicação em lote ao final da avaliação
         if submission.associatedWithDeveloper:
             logger.info(f"[bold green]Nota {result.grade}[/bold green]")
-            success = grade_submission(
-                self.classroom_service,
-                self.course.id,
-                self.coursework.id,
-                submission.id,
-                result.grade,
-                result.grade if self.return_grades else None,
-            )
-            if not success:
-                logger.error("❌ Falha ao atribuir nota")
-            elif self.return_grades:
-                return_submission(
-                    self.classroom_service,
-                    self.course.id,
-                    self.coursework.id,
-                    submission.id,
-                )
+            with self._pending_lock:
+                self._pending_grades[submission.id] = (student, result.grade)
         else:
             logger.warning(
                 "[yellow]Nota não definida (atividade de outra conta)[/yellow]"
             )
 
         # Send email if requested
-        if self.email_sender:
+        if self.send_email and self.email_sender:
             self.email_sender.send(
                 student.email,
                 result,
                 course=self.course,
                 coursework=self.coursework,
+                student_name=student.full_name,
             )
 
         return result
 
-    def _process_submissions_batch(self, submissions: list[Submission]) -> dict:
-        """Processa um lote de submissões."""
-        stats = {
-            "total": len(submissions),
-            "processados": 0,
-            "erros": 0,
-            "notas": [],
-            "alunos": [],
+    def _start_submission(
+        self, idx: int, submission: Submission
+    ) -> tuple[dict[str, Any], UserProfile | None]:
+        """
+        Prepara a avaliação de uma submissão.
+
+        Returns:
+            O resultado parcial para agregação e o aluno, ou None se a submissão
+            não precisa (ou não pode) ser avaliada.
+        """
+        outcome: dict[str, Any] = {
+            "erro": False,
+            "nota": None,
+            "aluno": None,
+            "retomado": False,
+            "link": submission.alternateLink,
+            "feedback": None,
         }
 
-        total = len(submissions)
-        for idx, submission in enumerate(submissions, 1):
-            print()
-            logger.info(f"[bold]Processando submissão {idx}/{total}[/bold]")
-            student_id = submission.userId
-            student = get_user_profile(self.classroom_service, student_id)
-            if student is None:
-                self._log_error(student_id, "Usuário não encontrado")
-                continue
+        print()
+        logger.info(f"[bold]Processando submissão {idx}[/bold]")
 
+        if entry := self.journal.get(submission):
             logger.info(
-                f"[bold cyan]➤ {student.full_name}[/bold cyan] ({student.email})"
+                f"[dim]↷ {entry['aluno']['Nome']}: já avaliada anteriormente, pulando[/dim]"
             )
+            if entry.get("similaridade"):
+                self.similarity.add_fingerprint(
+                    entry["aluno"]["Nome"], entry["similaridade"]
+                )
+            else:
+                self._similarity_complete = False
+            if not entry["publicado"]:
+                student = UserProfile(
+                    id=entry["userId"],
+                    full_name=entry["aluno"]["Nome"],
+                    email=entry["aluno"]["Email"],
+                )
+                with self._pending_lock:
+                    self._pending_grades[submission.id] = (student, entry["nota"])
+            outcome.update(
+                nota=entry["nota"],
+                aluno=entry["aluno"],
+                retomado=True,
+                feedback=self._feedback_path(entry["userId"], entry["aluno"]["Nome"]).name,
+            )
+            return outcome, None
 
-            try:
-                if (
-                    not submission.assignmentSubmission
-                    or not submission.assignmentSubmission.attachments
-                ):
-                    self._log_error(student_id, "Nenhum arquivo encontrado")
-                    stats["erros"] += 1
-                    continue
+        student_id = submission.userId
+        student = self.roster.get(student_id)
+        if student is None:
+            self._log_error(student_id, "Usuário não encontrado")
+            return outcome, None
+
+        logger.info(f"[bold cyan]➤ {student.full_name}[/bold cyan] ({student.email})")
+
+        if (
+            not submission.assignmentSubmission
+            or not submission.assignmentSubmission.attachments
+        ):
+            self._log_error(student_id, "Nenhum arquivo encontrado")
+            outcome["erro"] = True
+            return outcome, None
+
+        return outcome, student
 
-                result = self._process_submission(
-                    submission, student, submission.assignmentSubmission.attachments
+    def _record_result(
+        self,
+        outcome: dict[str, Any],
+        submission: Submission,
+        student: UserProfile,
+        result: FeedbackResult,
+    ) -> None:
+        """Preenche a linha do relatório e registra a submissão no diário."""
+        outcome["nota"] = result.grade
+        outcome["feedback"] = self._feedback_path(student.id, student.full_name).name
+        outcome["aluno"] = {
+            "Nome": student.full_name,
+            "Email": student.email,
+            "Nota": result.grade,
+            "Status": submission.state.value,
+            "Data de Submissão": submission.updateTime.split("T")[0],
+            "Atraso": "Sim" if submission.late else "Não",
+        }
+        self.journal.record(
+            submission,
+            result.grade,
+            outcome["aluno"],
+            published=not submission.associatedWithDeveloper,
+            similarity=self._fingerprints.pop(student.id, None),
+        )
+
+    def _fail(self, job: SubmissionJob, error: Exception) -> bool:
+        self._log_error(job.student.full_name, f"Erro: {str(error)}")  # type: ignore [union-attr]
+        job.outcome["erro"] = True
+        return False
+
+    def _stage_prepare(self, job: SubmissionJob) -> bool:
+        """Etapa "preparar": diário, aluno e anexos (I/O leve)."""
+        try:
+            job.outcome, job.student = self._start_submission(job.idx, job.submission)
+        except Exception as e:
+            self._log_error(job.submission.userId, f"Erro: {str(e)}")
+            job.outcome["erro"] = True
+            return False
+        return job.student is not None
+
+    def _stage_download(self, job: SubmissionJob) -> bool:
+        """Etapa "baixar": aguarda os downloads dos anexos, já agendados na leitura.
+
+        Os caminhos seguem no job para a etapa de processamento, que não
+        precisa aguardar (nem repetir um download que falhou) de novo.
+        """
+        assert self.downloads is not None
+        for drive_file in submission_drive_files(job.submission):
+            job.downloaded[drive_file.id] = self.downloads.get(drive_file)
+        return True
+
+    def _stage_parse(self, job: SubmissionJob) -> bool:
+        """Etapa "processar": extrai o texto dos anexos no pool de processos."""
+        try:
+            job.context, job.digest = self._get_submitted_context(
+                job.submission.assignmentSubmission.attachments,  # type: ignore [union-attr]
+                job.student,  # type: ignore [arg-type]
+                job.downloaded,
+            )
+            return True
+        except Exception as e:
+            return self._fail(job, e)
+
+    def _stage_grade(self, job: SubmissionJob) -> bool:
+        """Etapa "avaliar": gera o feedback pelo cliente assíncrono do LLM.
+
+        Submissões com conteúdo idêntico a uma já avaliada nesta execução
+        reaproveitam aquela avaliação em vez de chamar o modelo de novo, desde
+        que o feedback original não cite o aluno pelo nome.
+        """
+        assert job.student is not None and job.context is not None
+        owner, shared = False, None
+        if job.digest is not None:
+            with self._shared_lock:
+                shared = self._shared_evaluations.get(job.digest)
+                owner = shared is None
+                if shared is None:
+                    shared = self._shared_evaluations[job.digest] = Future()
+
+        if shared is not None and not owner:
+            source, shared_result = shared.result()
+            reused = (
+                reuse_feedback(shared_result, source)
+                if shared_result is not None
+                else None
+            )
+            if reused is not None:
+                logger.info(
+                    f"[dim]Avaliação reaproveitada de {source.full_name} "
+                    f"para {job.student.full_name} (conteúdo idêntico)[/dim]"
                 )
+                job.result = reused
+                with self._shared_lock:
+                    self.reused_evaluations += 1
+                return True
+            # A avaliação original falhou ou é pessoal: esta é avaliada normalmente
+
+        try:
+            result = create_feedback(
+                job.student,
+                job.context,
+                self.criteria,
+                self.llm_cache,
+                prompt_cache=self.prompt_cache,
+                usage=self.token_usage,
+                client=self.llm_client,
+            )
+        except Exception as e:
+            if owner:
+                shared.set_result((job.student, None))  # type: ignore [union-attr]
+            return self._fail(job, e)
 
-                if result and result.grade is not None:
-                    stats["notas"].append(result.grade)
-                    stats["alunos"].append(
-                        {
-                            "Nome": student.full_name,
-                            "Email": student.email,
-                            "Nota": result.grade,
-                            "Status": submission.state.value,
-                            "Data de Submissão": submission.updateTime.split("T")[0],
-                            "Atraso": "Sim" if submission.late else "Não",
-                        }
+        if owner:
+            shared.set_result(  # type: ignore [union-attr]
+                (job.student, None if isinstance(result, str) else result)
+            )
+        if isinstance(result, str):
+            self._log_error(job.student.full_name, result)
+            job.outcome["erro"] = True
+            return False
+        job.result = result
+        return True
+
+    def _stage_deliver(self, job: SubmissionJob) -> bool:
+        """Etapa "entregar": salva o feedback, envia o email e registra no diário."""
+        assert job.student is not None and job.result is not None
+        try:
+            self._deliver_feedback(job.submission, job.student, job.result)
+            if job.result.grade is not None:
+                self._record_result(job.outcome, job.submission, job.student, job.result)
+        except Exception as e:
+            return self._fail(job, e)
+        return True
+
+    def _grade_with_pipeline(
+        self, submissions: Iterable[Submission]
+    ) -> list[dict[str, Any]]:
+        """
+        Avalia as submissões em um pipeline de etapas com filas limitadas.
+
+        Cada etapa tem seus próprios recursos: threads para I/O (Classroom,
+        Drive, SMTP), um pool de processos para a extração de texto e o loop
+        assíncrono do cliente do LLM. As filas limitadas seguram a leitura das
+        submissões quando uma etapa fica para trás.
+        """
+        pipeline: Pipeline[SubmissionJob] = Pipeline(
+            [
+                Stage("preparar", self._stage_prepare, workers=2),
+                Stage("baixar", self._stage_download, workers=self.download_workers),
+                Stage("processar", self._stage_parse, workers=self.parse_workers),
+                Stage("avaliar", self._stage_grade, workers=self.max_workers),
+                Stage("entregar", self._stage_deliver, workers=SMTP_POOL_SIZE),
+            ],
+            source_name="buscar",
+        )
+        jobs = pipeline.run(
+            SubmissionJob(idx, submission)
+            for idx, submission in enumerate(submissions, 1)
+        )
+        print()
+        pipeline.report()
+        return [job.outcome for job in sorted(jobs, key=lambda job: job.idx)]
+
+    def _prepare_batch_item(
+        self, idx: int, submission: Submission
+    ) -> tuple[dict[str, Any], UserProfile | None, str | None, str | None]:
+        """Monta o contexto de uma submissão para o modo em lote.
+
+        Submissões cujo feedback já está no cache são concluídas imediatamente.
+        """
+        outcome, student = self._start_submission(idx, submission)
+        if student is None:
+            return outcome, None, None, None
+
+        try:
+            context, digest = self._get_submitted_context(
+                submission.assignmentSubmission.attachments,  # type: ignore [union-attr]
+                student,
+            )
+            cached = self.llm_cache.get_text(
+                feedback_cache_key(self.criteria, student.full_name, context)
+            )
+            if cached is not None:
+                result = FeedbackResult.model_validate_json(cached)
+                logger.info(
+                    f"[dim]Feedback reaproveitado do cache para {student.full_name}[/dim]"
+                )
+                self._deliver_feedback(submission, student, result)
+                self._record_result(outcome, submission, student, result)
+                return outcome, None, None, None
+            return outcome, student, context, digest
+
+        except Exception as e:
+            self._log_error(student.full_name, f"Erro: {str(e)}")
+            outcome["erro"] = True
+            return outcome, None, None, None
+
+    def _grade_with_batch(
+        self, submissions: Iterable[Submission]
+    ) -> list[dict[str, Any]]:
+        """Avalia as submissões pela API de lote e retorna os resultados em ordem."""
+        assert self.batch_backend is not None
+
+        prepared = self._map_submissions(self._prepare_batch_item, submissions)
+        pending = {
+            submission.id: (outcome, submission, student, context)
+            for submission, (outcome, student, context, _) in prepared
+            if student is not None and context is not None
+        }
+        # Um pedido por conteúdo: submissões idênticas reaproveitam a mesma avaliação
+        groups: dict[str, list[str]] = defaultdict(list)
+        for submission, (_, student, context, digest) in prepared:
+            if submission.id in pending:
+                groups[digest or submission.id].append(submission.id)
+
+        if pending:
+            requests = [
+                build_batch_request(
+                    submission_ids[0],
+                    self.criteria,
+                    pending[submission_ids[0]][2].full_name,
+                    pending[submission_ids[0]][3],
+                )
+                for submission_ids in groups.values()
+            ]
+            results = run_batch(
+                self.batch_backend,
+                requests,
+                self.output_dir / "batch",
+                poll_interval=self.batch_poll_interval,
+                usage=self.token_usage,
+            )
+
+            print()
+            for submission_ids in groups.values():
+                result = results.get(submission_ids[0])
+                if result is None:
+                    continue
+                source = pending[submission_ids[0]][2]
+                for submission_id in submission_ids:
+                    outcome, submission, student, context = pending[submission_id]
+                    if isinstance(result, str):
+                        self._log_error(student.full_name, result)
+                        outcome["erro"] = True
+                        continue
+                    try:
+                        student_result: FeedbackResult | str | None = result
+                        if submission_id != submission_ids[0]:
+                            student_result = reuse_feedback(result, source)
+                        if student_result is None:
+                            # Feedback pessoal do aluno original: avalia esta à parte
+                            student_result = create_feedback(
+                                student, context, self.criteria, self.llm_cache
+                            )
+                            if isinstance(student_result, str):
+                                self._log_error(student.full_name, student_result)
+                                outcome["erro"] = True
+                                continue
+                        else:
+                            if submission_id != submission_ids[0]:
+                                self.reused_evaluations += 1
+                            self.llm_cache.set_text(
+                                feedback_cache_key(
+                                    self.criteria, student.full_name, context
+                                ),
+                                student_result.model_dump_json(),
+                            )
+                        logger.info(f"[bold cyan]➤ {student.full_name}[/bold cyan]")
+                        self._deliver_feedback(submission, student, student_result)
+                        self._record_result(
+                            outcome, submission, student, student_result
+                        )
+                    except Exception as e:
+                        self._log_error(student.full_name, f"Erro: {str(e)}")
+                        outcome["erro"] = True
+
+        return [outcome for _, (outcome, *_) in prepared]
+
+    def _prefetching(
+        self, submissions: Iterable[Submission]
+    ) -> Iterator[Submission]:
+        """Agenda o download dos anexos das próximas submissões antes de entregá-las.
+
+        As submissões são lidas em blocos, para que os metadados dos anexos de
+        cada bloco sejam buscados em uma única requisição batch.
+        """
+        lookahead = max(4, 2 * self.max_workers)
+        submissions = iter(submissions)
+        buffer: deque[Submission] = deque()
+        while True:
+            if len(buffer) <= lookahead // 2:
+                chunk = list(islice(submissions, lookahead))
+                if self.downloads is not None:
+                    self.downloads.prefetch(
+                        drive_file
+                        for submission in chunk
+                        if self.journal.get(submission) is None
+                        for drive_file in submission_drive_files(submission)
                     )
-                    stats["processados"] += 1
+                buffer.extend(chunk)
+            if not buffer:
+                return
+            yield buffer.popleft()
+
+    def _map_submissions(
+        self, fn: Callable[[int, Submission], T], submissions: Iterable[Submission]
+    ) -> list[tuple[Submission, T]]:
+        """Aplica `fn` às submissões, em paralelo se configurado, preservando a ordem."""
+        if self.max_workers == 1:
+            return [
+                (submission, fn(idx, submission))
+                for idx, submission in enumerate(submissions, 1)
+            ]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [
+                (submission, executor.submit(fn, idx, submission))
+                for idx, submission in enumerate(submissions, 1)
+            ]
+            return [(submission, future.result()) for submission, future in futures]
+
+    def _publish_grades(self) -> int:
+        """Publica no Classroom as notas pendentes e retorna quantas falharam."""
+        if not self._pending_grades:
+            return 0
+
+        results = publish_grades(
+            self.classroom_service,
+            self.course.id,
+            self.coursework.id,
+            {
+                submission_id: grade
+                for submission_id, (_, grade) in self._pending_grades.items()
+            },
+            return_grades=self.return_grades,
+        )
+
+        self.journal.mark_published(
+            submission_id for submission_id, error in results.items() if error is None
+        )
 
-            except Exception as e:
-                self._log_error(student.full_name, f"Erro: {str(e)}")
+        failures = 0
+        for submission_id, error in results.items():
+            if error is not None:
+                student, _ = self._pending_grades[submission_id]
+                logger.error(f"❌ {student.full_name}: {error}")
+                self._log_error(student.full_name, error)
+                failures += 1
+
+        logger.success(
+            f"{len(results) - failures}/{len(results)} nota(s) publicada(s) no Classroom"
+        )
+        self._pending_grades.clear()
+        return failures
+
+    def _grade_all(self, submissions: Iterable[Submission]) -> list[dict[str, Any]]:
+        """Avalia as submissões pelo modo configurado (imediato ou em lote)."""
+        if self.batch_backend is not None:
+            return self._grade_with_batch(submissions)
+
+        self.llm_client = AsyncFeedbackClient(
+            rpm=self.llm_rpm, tpm=self.llm_tpm, usage=self.token_usage
+        )
+        if self.parse_workers > 1:
+            # spawn: fork com as threads do pipeline ativas pode travar os filhos
+            self.parse_pool = ProcessPoolExecutor(
+                max_workers=self.parse_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        try:
+            return self._grade_with_pipeline(submissions)
+        finally:
+            self.llm_client.close()
+            self.llm_client = None
+            if self.parse_pool is not None:
+                self.parse_pool.shutdown(cancel_futures=True)
+                self.parse_pool = None
+
+    def _process_submissions_batch(self, submissions: Iterable[Submission]) -> dict:
+        """Processa um lote de submissões.
+
+        As etapas trabalham em paralelo (veja `_grade_with_pipeline`), mas os
+        resultados são agregados na ordem original das submissões.
+        """
+        stats = {
+            "total": 0,
+            "processados": 0,
+            "retomados": 0,
+            "erros": 0,
+            "notas": [],
+            "alunos": [],
+            "entregas": [],
+        }
+
+        self.downloads = DownloadManager(
+            self.drive_service,
+            self.drive_cache,
+            max_workers=self.download_workers,
+            timeout=self.download_timeout,
+            chunk_size=self.download_chunk_size,
+        )
+        self.web = WebClient(self.web_cache)
+        if self.send_email and self.email_sender:
+            self.email_sender.open_outbox(self.output_dir / Outbox.DIRNAME)
+        submissions = self._prefetching(submissions)
+
+        try:
+            outcomes = self._grade_all(submissions)
+        finally:
+            self.downloads.close()
+            self.downloads = None
+            self.web.close()
+            self.web = None
+            if self.email_sender:
+                self.email_sender.close()
+            self.parsed_cache.evict()
+            self.web_cache.evict()
+
+        stats["total"] = len(outcomes)
+        for outcome in outcomes:
+            if outcome["erro"]:
                 stats["erros"] += 1
+            if outcome["retomado"]:
+                stats["retomados"] += 1
+            if outcome["aluno"] is not None:
+                stats["notas"].append(outcome["nota"])
+                stats["alunos"].append(outcome["aluno"])
+                stats["entregas"].append(
+                    {
+                        "name": outcome["aluno"]["Nome"],
+                        "email": outcome["aluno"]["Email"],
+                        "grade": outcome["nota"],
+                        "late": outcome["aluno"]["Atraso"],
+                        "link": outcome["link"],
+                        "feedback_file": outcome["feedback"],
+                    }
+                )
+                stats["processados"] += 1
 
         return stats
 
+    def _send_digest(
+        self, stats: dict, excel_path: Path | None, similar: int
+    ) -> None:
+        """Envia ao professor o resumo da execução pela caixa de saída."""
+        assert self.email_sender is not None
+        summary = [
+            ("Submissões", str(stats["total"])),
+            ("Avaliadas", str(stats["processados"])),
+            ("Reaproveitadas de execuções anteriores", str(stats["retomados"])),
+            ("Erros", str(stats["erros"])),
+        ]
+        if notas := stats["notas"]:
+            summary += [
+                ("Média", f"{sum(notas) / len(notas):.1f}"),
+                ("Maior nota", f"{max(notas):.1f}"),
+                ("Menor nota", f"{min(notas):.1f}"),
+            ]
+        if stats["falhas_publicacao"]:
+            summary.append(("Falhas ao publicar notas", str(stats["falhas_publicacao"])))
+        if self.reused_evaluations:
+            summary.append(
+                ("Avaliações reaproveitadas de submissões idênticas", str(self.reused_evaluations))
+            )
+        if similar:
+            summary.append(("Grupos de submissões idênticas ou semelhantes", str(similar)))
+
+        self.email_sender.open_outbox(self.output_dir / Outbox.DIRNAME)
+        try:
+            self.email_sender.send_digest(
+                sorted(stats["entregas"], key=lambda row: row["name"]),
+                summary,
+                course=self.course,
+                coursework=self.coursework,
+                attachment=excel_path if self.digest_attach_report else None,
+            )
+        finally:
+            self.email_sender.close()
+
     def grade(self) -> None:
         """Processa e avalia as submissões de uma atividade."""
         try:
-            submissions = self._get_submissions()
-            if not submissions:
+            self.roster.load()
+            stats = self._process_submissions_batch(self._get_submissions())
+            self.roster.save()
+            similarity_path = self.output_dir / "similaridade.md"
+            similar = 0
+            if self._similarity_complete:
+                similar = self.similarity.write_report(similarity_path)
+            else:
+                logger.warning(
+                    "Relatório de similaridade não atualizado: há submissões no "
+                    "diário registradas sem dados de similaridade (reavalie todas "
+                    "as submissões para refazê-lo)"
+                )
+            stats["falhas_publicacao"] = self._publish_grades()
+            self.llm_cache.evict()
+            if not stats["total"]:
                 logger.warning("Nenhuma submissão encontrada")
                 return
 
-            stats = self._process_submissions_batch(submissions)
-
             # Gera relatório Excel
+            excel_path = None
             if stats["alunos"]:
                 # Ordena por nome e formata o DataFrame
                 df = pd.DataFrame(stats["alunos"])
@@ -265,8 +972,19 @@ class SubmissionsGrader:
 
             # Exibe estatísticas
             logger.info("\n[bold]📊 Estatísticas da Avaliação:[/bold]")
-            logger.info(f"Total de submissões: {stats['total']}")
+            logger.info(
+                f"Total de submissões: {stats['total']} "
+                f"({self.fetch_stats['paginas']} página(s) buscada(s))"
+            )
             logger.info(f"Submissões processadas: {stats['processados']}")
+            if stats["retomados"]:
+                logger.info(
+                    f"Reaproveitadas de execuções anteriores: {stats['retomados']}"
+                )
+            if stats["falhas_publicacao"]:
+                logger.info(
+                    f"Falhas ao publicar notas: {stats['falhas_publicacao']}"
+                )
 
             if stats["notas"]:
                 notas = stats["notas"]
@@ -280,8 +998,31 @@ class SubmissionsGrader:
                 logger.info(f"Maior nota: {maior_nota:.1f}")
                 logger.info(f"Menor nota: {menor_nota:.1f}")
 
+            if self.llm_cache.enabled:
+                logger.info(f"Cache de feedbacks: {self.llm_cache.summary()}")
+            if self.drive_cache.hits or self.drive_cache.misses:
+                logger.info(f"Cache de downloads: {self.drive_cache.summary()}")
+            if self.parsed_cache.hits or self.parsed_cache.misses:
+                logger.info(f"Cache de anexos processados: {self.parsed_cache.summary()}")
+            if self.web_cache.hits or self.web_cache.misses:
+                logger.info(f"Cache de links: {self.web_cache.summary()}")
+            if self.token_usage.requests:
+                logger.info(f"Uso de tokens: {self.token_usage.summary()}")
+            if self.reused_evaluations:
+                logger.info(
+                    f"Avaliações reaproveitadas de submissões idênticas: {self.reused_evaluations}"
+                )
+            if similar:
+                logger.warning(
+                    f"{similar} grupo(s) de submissões idênticas ou semelhantes; "
+                    f"veja {similarity_path}"
+                )
+
             logger.info(f"\nTaxa de erros: {(stats['erros'] / stats['total']):.1%}")
 
+            if self.send_teacher_digest and self.email_sender:
+                self._send_digest(stats, excel_path, similar)
+
         except Exception as e:
             logger.error(f"Erro ao processar submissões: {str(e)}")
             raise
@@ -0,0 +1,103 @@
+"""Diário de execução para retomar avaliações interrompidas."""
+
+import json
+import threading
+from pathlib import Path
+from typing import Any, Iterable
+
+from core import logger
+from models import Submission
+
+
+class RunJournal:
+    """
+    Registro das submissões já avaliadas de uma atividade.
+
+    Cada submissão concluída é anexada a `journal.jsonl` com seu `id` e o
+    momento da última entrega (`turnedIn`). Em uma nova execução, submissões
+    presentes no diário são puladas, a menos que o aluno tenha reenviado o
+    trabalho desde então. O `updateTime` não serve para isso: ele muda quando
+    a nota é publicada ou a submissão é devolvida.
+    """
+
+    FILENAME = "journal.jsonl"
+
+    def __init__(self, output_dir: Path, force: bool = False):
+        """
+        Args:
+            output_dir: Diretório de saída da atividade
+            force: Se True, descarta o diário existente e reavalia tudo
+        """
+        self.path = output_dir / self.FILENAME
+        self.entries: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+        if force:
+            self.path.unlink(missing_ok=True)
+        else:
+            self._load()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        for line in self.path.read_text(encoding="utf-8").splitlines():
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # Linha truncada por uma interrupção durante a escrita
+                continue
+            self.entries[entry["id"]] = entry
+
+        if self.entries:
+            logger.info(
+                f"[dim]📒 {len(self.entries)} submissão(ões) no diário de execução[/dim]"
+            )
+
+    def _append(self, entry: dict[str, Any]) -> None:
+        with self._lock:
+            self.entries[entry["id"]] = entry
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def get(self, submission: Submission) -> dict[str, Any] | None:
+        """Retorna o registro da submissão se ela não mudou desde a avaliação."""
+        entry = self.entries.get(submission.id)
+        if entry is None:
+            return None
+        turned_in = submission.turned_in_time
+        if entry.get("turnedIn") is not None and turned_in is not None:
+            return entry if entry["turnedIn"] == turned_in else None
+        # Registros antigos ou submissões sem histórico de entrega
+        return entry if entry["updateTime"] == submission.updateTime else None
+
+    def record(
+        self,
+        submission: Submission,
+        grade: float,
+        report_row: dict[str, Any],
+        published: bool,
+        similarity: dict[str, Any] | None = None,
+    ) -> None:
+        """Registra uma submissão avaliada.
+
+        `similarity` (de `core.similarity.fingerprint`) é guardado para que a
+        submissão continue no relatório de similaridade nas execuções retomadas.
+        """
+        self._append(
+            {
+                "id": submission.id,
+                "updateTime": submission.updateTime,
+                "turnedIn": submission.turned_in_time,
+                "userId": submission.userId,
+                "nota": grade,
+                "aluno": report_row,
+                "publicado": published,
+                "similaridade": similarity,
+            }
+        )
+
+    def mark_published(self, submission_ids: Iterable[str]) -> None:
+        """Marca as notas das submissões como publicadas no Classroom."""
+        for submission_id in submission_ids:
+            if entry := self.entries.get(submission_id):
+                self._append({**entry, "publicado": True})
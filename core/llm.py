@@ -1,16 +1,43 @@
 """Module for LLM integration."""
 
-from pathlib import Path
+import asyncio
+import re
+import threading
+import unicodedata
+from typing import Any, Coroutine, TypeVar
 
 import magentic
+import openai
 
 from core import logger
+from core.cache import DiskCache, make_key
+from core.ratelimit import CircuitBreaker, RateLimiter, call_with_retry
 from models import FeedbackResult, UserProfile
 
+MODEL_NAME = "gpt-4o-mini"
+
+# Incrementar sempre que o prompt de avaliação mudar, invalidando o cache de feedbacks
+FEEDBACK_PROMPT_VERSION = "3"
+
+# Limites padrão da conta para o modelo (requisições e tokens por minuto)
+LLM_RPM = 500
+LLM_TPM = 200_000
+
+# Estimativa de tokens gerados por feedback, usada na reserva de TPM
+FEEDBACK_OUTPUT_TOKENS = 1_500
+
+# Partes menores do nome (de, da, dos...) não identificam o aluno
+NAME_MIN_LENGTH = 3
+
+T = TypeVar("T")
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimativa grosseira do número de tokens de um texto (~4 caracteres por token)."""
+    return len(text) // 4 + 1
 
-@magentic.prompt(
-    """Você é um professor experiente avaliando o trabalho do aluno {student_name}.
-Seu objetivo é fornecer um feedback personalizado, construtivo e motivador.
+
+FEEDBACK_GUIDELINES = """Seu objetivo é fornecer um feedback personalizado, construtivo e motivador.
 
 ## Diretrizes para o feedback:
 - Mantenha um tom amigável mas profissional
@@ -20,6 +47,7 @@ Seu objetivo é fornecer um feedback personalizado, construtivo e motivador.
 - Priorize comentários práticos e acionáveis
 - Evite repetir o título da atividade ou informações que já estarão no template HTML
 - Seja específico sobre o que está bom e o que precisa melhorar
+- Não use o nome do aluno no feedback: o email já o cumprimenta pelo nome
 
 ## Formato do feedback:
 ### Pontos Positivos ✅
@@ -37,15 +65,23 @@ Seu objetivo é fornecer um feedback personalizado, construtivo e motivador.
 
 ## Atribuição de Nota:
 Avalie o trabalho de acordo com os critérios fornecidos, atribuindo uma nota justa que reflita tanto as conquistas quanto as áreas de melhoria.
+"""
+
 
+LEGACY_FEEDBACK_PROMPT = (
+    "Você é um professor experiente avaliando o trabalho do aluno {student_name}.\n"
+    + FEEDBACK_GUIDELINES
+    + """
 ## Trabalho do aluno:
 {context}
 
 ## Critérios de avaliação:
 {criteria}
-""",
-    model=magentic.OpenaiChatModel("gpt-4o-mini"),
+"""
 )
+
+
+@magentic.prompt(LEGACY_FEEDBACK_PROMPT, model=magentic.OpenaiChatModel(MODEL_NAME))
 def evaluate_student_submissions(
     context: str, criteria: str, student_name: str
 ) -> FeedbackResult:
@@ -53,18 +89,291 @@ def evaluate_student_submissions(
     ...
 
 
+@magentic.prompt(LEGACY_FEEDBACK_PROMPT, model=magentic.OpenaiChatModel(MODEL_NAME))
+async def aevaluate_student_submissions(
+    context: str, criteria: str, student_name: str
+) -> FeedbackResult:
+    """Versão assíncrona de `evaluate_student_submissions`."""
+    ...
+
+
+def build_feedback_messages(
+    criteria: str, student_name: str, context: str
+) -> list[dict[str, str]]:
+    """
+    Monta as mensagens do prompt de avaliação com prefixo estável.
+
+    Instruções e critérios (idênticos para toda a turma) ficam na mensagem de
+    sistema, e os dados do aluno vêm por último. Assim o prefixo compartilhado
+    pode ser reaproveitado pelo cache automático de prompts do provedor.
+    """
+    system = (
+        "Você é um professor experiente avaliando o trabalho de um aluno.\n"
+        + FEEDBACK_GUIDELINES
+        + f"\n## Critérios de avaliação:\n{criteria}\n"
+    )
+    user = f"## Aluno: {student_name}\n\n## Trabalho do aluno:\n{context}\n"
+    return [
+        {"role": "system", "content": system},
+        {"role": "user", "content": user},
+    ]
+
+
+class TokenUsage:
+    """Acumula o uso de tokens reportado pelo provedor ao longo de uma execução."""
+
+    def __init__(self):
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.completion_tokens = 0
+        self._lock = threading.Lock()
+
+    def add(self, usage: Any) -> None:
+        """Soma o campo `usage` de uma resposta de chat completion (objeto ou dict)."""
+        if usage is None:
+            return
+        if not isinstance(usage, dict):
+            usage = usage.model_dump()
+        details = usage.get("prompt_tokens_details") or {}
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += usage.get("prompt_tokens") or 0
+            self.completion_tokens += usage.get("completion_tokens") or 0
+            self.cached_tokens += details.get("cached_tokens") or 0
+
+    def summary(self) -> str:
+        """Resumo legível do uso de tokens."""
+        rate = self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+        return (
+            f"{self.prompt_tokens} tokens de entrada ({self.cached_tokens} em cache, "
+            f"{rate:.0%}), {self.completion_tokens} de saída em {self.requests} chamada(s)"
+        )
+
+
+_openai_client: openai.OpenAI | None = None
+
+
+def _get_openai_client() -> openai.OpenAI:
+    global _openai_client
+    if _openai_client is None:
+        _openai_client = openai.OpenAI()
+    return _openai_client
+
+
+def evaluate_with_prompt_cache(
+    criteria: str,
+    student_name: str,
+    context: str,
+    usage: TokenUsage | None = None,
+) -> FeedbackResult:
+    """Avalia a submissão usando o layout de prompt com prefixo estável."""
+    completion = _get_openai_client().beta.chat.completions.parse(
+        model=MODEL_NAME,
+        messages=build_feedback_messages(criteria, student_name, context),  # type: ignore [arg-type]
+        response_format=FeedbackResult,
+    )
+    if usage is not None:
+        usage.add(completion.usage)
+
+    result = completion.choices[0].message.parsed
+    if result is None:
+        raise ValueError(
+            f"Resposta do modelo não pôde ser interpretada: {completion.choices[0].message.refusal}"
+        )
+    return result
+
+
+class AsyncFeedbackClient:
+    """
+    Cliente assíncrono de avaliação compartilhado pelas threads do avaliador.
+
+    As chamadas rodam em um event loop dedicado, atrás de um único limitador de
+    RPM/TPM e de um circuit breaker, com novas tentativas para erros 429/5xx.
+    Threads síncronas usam `evaluate`, que aguarda o resultado da corrotina.
+    """
+
+    def __init__(
+        self,
+        rpm: int = LLM_RPM,
+        tpm: int = LLM_TPM,
+        max_retries: int = 5,
+        usage: TokenUsage | None = None,
+    ):
+        self.usage = usage
+        self.max_retries = max_retries
+        self._client: openai.AsyncOpenAI | None = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="llm-event-loop", daemon=True
+        )
+        self._thread.start()
+        # Primitivas asyncio precisam ser criadas dentro do loop
+        self.limiter, self.breaker = self._run(self._create_primitives(rpm, tpm))
+
+    async def _create_primitives(
+        self, rpm: int, tpm: int
+    ) -> tuple[RateLimiter, CircuitBreaker]:
+        return RateLimiter(rpm, tpm), CircuitBreaker()
+
+    def _run(self, coroutine: Coroutine[Any, Any, T]) -> T:
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def _get_client(self) -> openai.AsyncOpenAI:
+        if self._client is None:
+            # As novas tentativas são controladas por `call_with_retry`
+            self._client = openai.AsyncOpenAI(max_retries=0)
+        return self._client
+
+    async def _parse(self, criteria: str, student_name: str, context: str) -> Any:
+        return await self._get_client().beta.chat.completions.parse(
+            model=MODEL_NAME,
+            messages=build_feedback_messages(criteria, student_name, context),  # type: ignore [arg-type]
+            response_format=FeedbackResult,
+        )
+
+    async def aevaluate(
+        self,
+        criteria: str,
+        student_name: str,
+        context: str,
+        prompt_cache: bool = True,
+    ) -> FeedbackResult:
+        """Avalia uma submissão respeitando os limites compartilhados."""
+        estimated_tokens = estimate_tokens(criteria + context) + FEEDBACK_OUTPUT_TOKENS
+
+        if not prompt_cache:
+            return await call_with_retry(
+                lambda: aevaluate_student_submissions(context, criteria, student_name),
+                limiter=self.limiter,
+                breaker=self.breaker,
+                estimated_tokens=estimated_tokens,
+                max_retries=self.max_retries,
+            )
+
+        completion = await call_with_retry(
+            lambda: self._parse(criteria, student_name, context),
+            limiter=self.limiter,
+            breaker=self.breaker,
+            estimated_tokens=estimated_tokens,
+            max_retries=self.max_retries,
+        )
+        if completion.usage is not None:
+            self.limiter.correct(estimated_tokens, completion.usage.total_tokens)
+        if self.usage is not None:
+            self.usage.add(completion.usage)
+
+        result = completion.choices[0].message.parsed
+        if result is None:
+            raise ValueError(
+                f"Resposta do modelo não pôde ser interpretada: {completion.choices[0].message.refusal}"
+            )
+        return result
+
+    def evaluate(
+        self,
+        criteria: str,
+        student_name: str,
+        context: str,
+        prompt_cache: bool = True,
+    ) -> FeedbackResult:
+        """Versão bloqueante de `aevaluate`, para uso a partir de threads."""
+        return self._run(self.aevaluate(criteria, student_name, context, prompt_cache))
+
+    def close(self) -> None:
+        """Fecha o cliente HTTP e encerra o event loop dedicado."""
+        if self._client is not None:
+            self._run(self._client.close())
+            self._client = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+def feedback_cache_key(
+    criteria: str, student_name: str, context: str, prompt_cache: bool = True
+) -> str:
+    """Chave do cache de feedbacks para a combinação de modelo, prompt e aluno."""
+    return make_key(
+        MODEL_NAME,
+        FEEDBACK_PROMPT_VERSION,
+        "prefix" if prompt_cache else "legacy",
+        criteria,
+        student_name,
+        context,
+    )
+
+
+def _name_words(text: str) -> set[str]:
+    """Palavras do texto sem acentos e em minúsculas, para comparar nomes."""
+    folded = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    return set(re.findall(r"\w+", folded.casefold()))
+
+
+def reuse_feedback(
+    result: FeedbackResult, source: UserProfile
+) -> FeedbackResult | None:
+    """
+    Avaliação de `source` para reaproveitar em outra submissão idêntica.
+
+    O texto do modelo não é alterado: se o feedback citar o aluno original
+    por qualquer parte do nome, retorna None e a outra submissão deve ser
+    avaliada à parte.
+    """
+    name_parts = {
+        word for word in _name_words(source.full_name) if len(word) >= NAME_MIN_LENGTH
+    }
+    if name_parts & _name_words(result.feedback):
+        return None
+    return result.model_copy()
+
+
 def create_feedback(
     student: UserProfile,
     context: str,
-    criteria_file: Path,
+    criteria: str,
+    cache: DiskCache | None = None,
+    prompt_cache: bool = True,
+    usage: TokenUsage | None = None,
+    client: AsyncFeedbackClient | None = None,
 ) -> FeedbackResult | str:
-    """Cria feedback para uma submissão."""
+    """Cria feedback para uma submissão.
+
+    Se `cache` for informado, o resultado é reaproveitado quando modelo, versão
+    do prompt, critérios e contexto do aluno forem idênticos a uma execução
+    anterior. Com `prompt_cache`, usa o layout de prompt com prefixo estável e
+    contabiliza o uso de tokens (incluindo tokens em cache) em `usage`. Com
+    `client`, a chamada passa pelo limitador de taxa compartilhado e é refeita
+    em caso de erros transitórios.
+    """
     try:
-        criteria = criteria_file.read_text(encoding="utf-8")
+        cache_key = feedback_cache_key(
+            criteria, student.full_name, context, prompt_cache
+        )
+        if cache is not None and (cached := cache.get_text(cache_key)) is not None:
+            result = FeedbackResult.model_validate_json(cached)
+            logger.info(
+                f"[dim]Feedback reaproveitado do cache para {student.full_name}, Nota: {result.grade}[/dim]"
+            )
+            return result
 
         with logger.status("Gerando feedback personalizado..."):
             # Gera o feedback usando LLM
-            result = evaluate_student_submissions(context, criteria, student.full_name)
+            if client is not None:
+                result = client.evaluate(
+                    criteria, student.full_name, context, prompt_cache
+                )
+            elif prompt_cache:
+                result = evaluate_with_prompt_cache(
+                    criteria, student.full_name, context, usage
+                )
+            else:
+                result = evaluate_student_submissions(
+                    context, criteria, student.full_name
+                )
+
+        if cache is not None:
+            cache.set_text(cache_key, result.model_dump_json())
 
         logger.info(
             f"[dim]Feedback gerado para {student.full_name}, Nota: {result.grade}[/dim]"
@@ -96,7 +405,7 @@ Para atividades de programação, inclua critérios sobre:
 
 Enunciado da atividade:
 {context}""",
-    model=magentic.OpenaiChatModel("gpt-4o-mini"),
+    model=magentic.OpenaiChatModel(MODEL_NAME),
 )
 def generate_criteria(context: str) -> str:
     """Gera critérios de avaliação detalhados usando LLM."""
@@ -1,10 +1,13 @@
 """Module for processing Jupyter notebooks."""
 
+import re
+from pathlib import Path
 from typing import Any
 
 import nbformat
 
 from core import logger
+from models import ContentSection
 
 
 def extract_cells(notebook: dict[str, Any]) -> list[dict[str, Any]]:
@@ -24,11 +27,95 @@ def extract_cells(notebook: dict[str, Any]) -> list[dict[str, Any]]:
     return cells
 
 
-def process_notebook(notebook_stream: bytes) -> list[dict[str, Any]] | None:
-    """Processa um notebook Jupyter e retorna suas células."""
+def process_notebook(notebook_stream: bytes | Path) -> list[dict[str, Any]] | None:
+    """Processa um notebook Jupyter (bytes ou caminho do arquivo) e retorna suas células."""
     try:
-        notebook = nbformat.reads(notebook_stream.decode("utf-8"), as_version=4)
+        if isinstance(notebook_stream, Path):
+            with open(notebook_stream, encoding="utf-8") as f:
+                notebook = nbformat.read(f, as_version=4)
+        else:
+            notebook = nbformat.reads(notebook_stream.decode("utf-8"), as_version=4)
         return extract_cells(notebook)
     except Exception as e:
         logger.error(f"❌ Erro no notebook: {str(e)}")
         return None
+
+
+OUTPUT_MAX_CHARS = 2_000  # caracteres mantidos de cada saída de texto
+TRACEBACK_MAX_CHARS = 1_000
+
+_ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+_INLINE_IMAGE = re.compile(r"!\[([^\]]*)\]\((?:data:|attachment:)[^)]*\)")
+_WIDGET_MIME = "application/vnd.jupyter.widget-view+json"
+
+
+def _join(text: str | list[str]) -> str:
+    return "".join(text) if isinstance(text, list) else text
+
+
+def _truncate(text: str, max_chars: int, keep_tail: bool = False) -> str:
+    """Corta o texto mantendo o início e o fim (ou só o fim, em tracebacks)."""
+    if len(text) <= max_chars:
+        return text
+    if keep_tail:
+        return f"[... {len(text) - max_chars} caracteres omitidos ...]\n{text[-max_chars:]}"
+    head, tail = text[: max_chars * 3 // 4], text[-(max_chars // 4) :]
+    omitted = len(text) - len(head) - len(tail)
+    return f"{head}\n[... {omitted} caracteres omitidos ...]\n{tail}"
+
+
+def render_output(output: dict[str, Any]) -> str:
+    """
+    Converte uma saída de célula em texto compacto.
+
+    Textos são mantidos (truncados se muito longos); imagens, widgets e HTML
+    viram marcadores curtos, já que seu conteúdo (base64, scripts) só consome
+    tokens sem ajudar na avaliação.
+    """
+    output_type = output.get("output_type")
+    if output_type == "stream":
+        text = _ANSI_ESCAPE.sub("", _join(output.get("text", "")))
+        return _truncate(text.rstrip("\n"), OUTPUT_MAX_CHARS)
+
+    if output_type == "error":
+        traceback = _ANSI_ESCAPE.sub("", "\n".join(output.get("traceback", [])))
+        summary = f"{output.get('ename', 'Erro')}: {output.get('evalue', '')}"
+        if not traceback:
+            return summary
+        return _truncate(traceback, TRACEBACK_MAX_CHARS, keep_tail=True)
+
+    data = output.get("data", {})
+    images = [mime for mime in data if mime.startswith("image/")]
+    if images:
+        return f"[imagem {images[0]}]"
+    if _WIDGET_MIME in data:
+        return "[widget interativo]"
+    for mime in ("text/plain", "text/markdown", "text/latex"):
+        if mime in data:
+            return _truncate(_join(data[mime]).rstrip("\n"), OUTPUT_MAX_CHARS)
+    if "text/html" in data:
+        return f"[HTML omitido: {len(_join(data['text/html']))} caracteres]"
+    if data:
+        return f"[saída {next(iter(data))} omitida]"
+    return ""
+
+
+def notebook_sections(cells: list[dict[str, Any]]) -> list[ContentSection]:
+    """
+    Converte as células extraídas em trechos compactos: código em blocos,
+    markdown como está (sem imagens embutidas) e as saídas de cada célula
+    agrupadas em um único trecho.
+    """
+    sections = []
+    for cell in cells:
+        source = _join(cell["source"]).strip()
+        if cell["type"] == "markdown":
+            source = _INLINE_IMAGE.sub(r"[imagem \1]", source)
+        if source:
+            sections.append(ContentSection(kind=cell["type"], text=source))
+
+        outputs = [render_output(output) for output in cell["outputs"]]
+        outputs = [output for output in outputs if output]
+        if outputs:
+            sections.append(ContentSection(kind="output", text="\n".join(outputs)))
+    return sections
@@ -0,0 +1,230 @@
+"""Caixa de saída de emails em disco, esvaziada por threads em segundo plano."""
+
+import heapq
+import json
+import os
+import smtplib
+import threading
+import time
+import uuid
+from email import message_from_bytes, policy
+from email.message import Message
+from pathlib import Path
+from typing import Any
+
+from core import logger
+from core.delivery import DeliveryBackend
+
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_DELAY = 15  # segundos; dobra a cada nova tentativa
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+class Outbox:
+    """
+    Mensagens MIME já renderizadas, guardadas até a confirmação do envio.
+
+    Cada mensagem fica em `pending/` como `<id>.eml` (a mensagem) e
+    `<id>.json` (destinatários e tentativas). Enviadas vão para `sent/`;
+    as que esgotaram as tentativas vão para `failed/` e podem ser reenviadas
+    depois com `python -m cli.outbox`, sem reavaliar as submissões.
+    """
+
+    DIRNAME = "outbox"
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.pending_dir = directory / "pending"
+        self.sent_dir = directory / "sent"
+        self.failed_dir = directory / "failed"
+        for path in (self.pending_dir, self.sent_dir, self.failed_dir):
+            path.mkdir(parents=True, exist_ok=True)
+
+    def put(self, msg: Message, to_addrs: list[str], from_addr: str) -> str:
+        """Guarda a mensagem na caixa de saída e retorna seu identificador."""
+        message_id = f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+        meta = {"from_addr": from_addr, "to_addrs": to_addrs, "attempts": 0}
+        meta_path = self.pending_dir / f"{message_id}.json"
+        _write_atomic(meta_path, json.dumps(meta).encode())
+        # O .eml é gravado por último: sua presença indica mensagem completa
+        _write_atomic(self.pending_dir / f"{message_id}.eml", msg.as_bytes())
+        return message_id
+
+    def pending(self) -> list[str]:
+        """Identificadores das mensagens pendentes, na ordem em que foram criadas."""
+        return sorted(
+            path.stem
+            for path in self.pending_dir.glob("*.eml")
+            if path.with_suffix(".json").exists()
+        )
+
+    def load(self, message_id: str) -> tuple[Message, dict[str, Any]]:
+        eml = (self.pending_dir / f"{message_id}.eml").read_bytes()
+        meta = json.loads((self.pending_dir / f"{message_id}.json").read_text())
+        return message_from_bytes(eml, policy=policy.SMTP), meta
+
+    def _move(self, message_id: str, target: Path) -> None:
+        # O .eml sai primeiro: uma interrupção no meio deixa em `pending/` só o
+        # .json, e não uma mensagem sem metadados que nunca seria entregue
+        for suffix in (".eml", ".json"):
+            name = f"{message_id}{suffix}"
+            os.replace(self.pending_dir / name, target / name)
+
+    def mark_sent(self, message_id: str) -> None:
+        self._move(message_id, self.sent_dir)
+
+    def mark_failed(self, message_id: str, error: str, max_attempts: int) -> int:
+        """Registra a falha; retorna as tentativas feitas e move a mensagem
+        para `failed/` ao atingir `max_attempts`."""
+        meta_path = self.pending_dir / f"{message_id}.json"
+        meta = json.loads(meta_path.read_text())
+        meta["attempts"] += 1
+        meta["last_error"] = error
+        _write_atomic(meta_path, json.dumps(meta).encode())
+        if meta["attempts"] >= max_attempts:
+            self._move(message_id, self.failed_dir)
+        return meta["attempts"]
+
+    def requeue_failed(self) -> int:
+        """Devolve as mensagens de `failed/` para `pending/`, zerando as tentativas."""
+        count = 0
+        for eml in sorted(self.failed_dir.glob("*.eml")):
+            meta_path = eml.with_suffix(".json")
+            if not meta_path.exists():
+                # Movida pela metade: o .json ficou em `pending/`
+                meta_path = self.pending_dir / meta_path.name
+            meta = json.loads(meta_path.read_text())
+            meta["attempts"] = 0
+            _write_atomic(self.pending_dir / meta_path.name, json.dumps(meta).encode())
+            if meta_path.parent == self.failed_dir:
+                meta_path.unlink()
+            os.replace(eml, self.pending_dir / eml.name)
+            count += 1
+        return count
+
+    def counts(self) -> dict[str, int]:
+        return {
+            "pendentes": len(list(self.pending_dir.glob("*.eml"))),
+            "enviados": len(list(self.sent_dir.glob("*.eml"))),
+            "falhas": len(list(self.failed_dir.glob("*.eml"))),
+        }
+
+
+class OutboxSender:
+    """
+    Envia em segundo plano as mensagens da caixa de saída.
+
+    Ao iniciar, as pendentes de execuções anteriores entram na fila junto com
+    as novas (`submit`). Falhas são tentadas de novo com espera exponencial.
+    `stop` aguarda o envio das mensagens prontas; as que ainda aguardam nova
+    tentativa continuam em `pending/` para a próxima execução.
+    """
+
+    def __init__(
+        self,
+        outbox: Outbox,
+        backend: DeliveryBackend,
+        workers: int = 1,
+        max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+        retry_delay: float = OUTBOX_RETRY_DELAY,
+    ):
+        self.outbox = outbox
+        self.backend = backend
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.sent = 0
+        self.failed = 0
+        self._queue: list[tuple[float, str]] = []
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._active = 0
+        self._threads: list[threading.Thread] = []
+
+    def submit(self, message_id: str, due: float = 0.0) -> None:
+        """Agenda o envio de uma mensagem já guardada na caixa de saída."""
+        with self._cond:
+            heapq.heappush(self._queue, (due, message_id))
+            self._cond.notify_all()
+
+    def _next(self) -> str | None:
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if self._queue and self._queue[0][0] <= now:
+                    self._active += 1
+                    return heapq.heappop(self._queue)[1]
+                if self._stopping:
+                    return None
+                timeout = self._queue[0][0] - now if self._queue else None
+                self._cond.wait(timeout)
+
+    def _deliver(self, message_id: str) -> None:
+        msg, meta = self.outbox.load(message_id)
+        try:
+            self.backend.send_message(
+                msg, from_addr=meta["from_addr"], to_addrs=meta["to_addrs"]
+            )
+        except (smtplib.SMTPException, OSError) as e:
+            attempts = self.outbox.mark_failed(message_id, str(e), self.max_attempts)
+            recipients = ", ".join(meta["to_addrs"])
+            if attempts < self.max_attempts:
+                delay = self.retry_delay * 2 ** (attempts - 1)
+                logger.warning(
+                    f"Falha ao enviar email para {recipients} ({str(e)}); "
+                    f"nova tentativa em {delay:.0f}s"
+                )
+                self.submit(message_id, time.monotonic() + delay)
+            else:
+                with self._cond:
+                    self.failed += 1
+                logger.error(f"Email para {recipients} não enviado: {str(e)}")
+            return
+        self.outbox.mark_sent(message_id)
+        with self._cond:
+            self.sent += 1
+        logger.info(f"[dim]✉️  Email enviado para {', '.join(meta['to_addrs'])}[/dim]")
+
+    def _worker(self) -> None:
+        while (message_id := self._next()) is not None:
+            try:
+                self._deliver(message_id)
+            except Exception as e:
+                logger.error(f"Erro na caixa de saída ({message_id}): {str(e)}")
+            with self._cond:
+                self._active -= 1
+                self._cond.notify_all()
+
+    def start(self) -> "OutboxSender":
+        self._stopping = False
+        for message_id in self.outbox.pending():
+            self.submit(message_id)
+        self._threads = [
+            threading.Thread(target=self._worker, name="outbox-sender", daemon=True)
+            for _ in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Envia as mensagens prontas e encerra as threads."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def drain(self) -> None:
+        """Envia todas as pendentes, inclusive aguardando as novas tentativas."""
+        self.start()
+        with self._cond:
+            while self._queue or self._active:
+                self._cond.wait()
+        self.stop()
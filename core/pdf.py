@@ -0,0 +1,130 @@
+"""Extração de texto de PDFs em paralelo, por faixas de páginas."""
+
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import pymupdf
+
+PDF_PARALLEL_MIN_PAGES = 64  # abaixo disso o custo de abrir processos não compensa
+PDF_PAGES_PER_TASK = 32
+PDF_WORKERS = max(1, min(4, os.cpu_count() or 1))
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+@dataclass
+class PdfExtraction:
+    """Texto extraído de um PDF, página a página."""
+
+    pages: list[str]
+    total_pages: int
+    elapsed: float
+    truncated: bool = False
+
+    @property
+    def text(self) -> str:
+        return "".join(self.pages)
+
+
+def _open(source: bytes | Path) -> pymupdf.Document:
+    if isinstance(source, Path):
+        return pymupdf.Document(source, filetype="pdf")
+    return pymupdf.Document(stream=source, filetype="pdf")
+
+
+def _extract_range(source: bytes | Path, start: int, stop: int) -> list[str]:
+    """Extrai o texto das páginas [start, stop); executado nos processos do pool."""
+    doc = _open(source)
+    try:
+        return [doc[index].get_text() for index in range(start, stop)]
+    finally:
+        doc.close()
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: o processo principal tem várias threads, e fork com
+            # threads ativas pode deixar locks herdados travados
+            _pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            atexit.register(_pool.shutdown, cancel_futures=True)
+        return _pool
+
+
+def extract_pdf(
+    source: bytes | Path,
+    max_pages: int | None = None,
+    max_chars: int | None = None,
+    workers: int = PDF_WORKERS,
+    pages_per_task: int = PDF_PAGES_PER_TASK,
+) -> PdfExtraction:
+    """
+    Extrai o texto de cada página de um PDF.
+
+    Documentos longos têm as faixas de páginas distribuídas em um pool de
+    processos (o pymupdf não libera o GIL); documentos curtos são extraídos no
+    próprio processo.
+
+    Args:
+        source: Conteúdo do PDF ou caminho do arquivo
+        max_pages: Quantidade máxima de páginas extraídas
+        max_chars: Quantidade máxima de caracteres no total; a página que
+            ultrapassa o limite é cortada e as seguintes descartadas
+        workers: Quantidade de processos do pool
+        pages_per_task: Páginas por tarefa enviada ao pool
+
+    Returns:
+        Páginas extraídas, total de páginas do documento e tempo gasto
+    """
+    started = time.perf_counter()
+    try:
+        doc = _open(source)
+        total_pages = doc.page_count
+        doc.close()
+        page_count = min(total_pages, max_pages or total_pages)
+
+        if workers > 1 and page_count >= PDF_PARALLEL_MIN_PAGES:
+            pool = _get_pool(workers)
+            futures = [
+                pool.submit(
+                    _extract_range,
+                    source,
+                    start,
+                    min(start + pages_per_task, page_count),
+                )
+                for start in range(0, page_count, pages_per_task)
+            ]
+            pages = [page for future in futures for page in future.result()]
+        else:
+            pages = _extract_range(source, 0, page_count)
+    except Exception as e:
+        raise ValueError(f"Erro ao processar PDF: {str(e)}")
+
+    truncated = page_count < total_pages
+    if max_chars is not None:
+        kept, remaining = [], max_chars
+        for page in pages:
+            if len(page) > remaining:
+                kept.append(page[:remaining])
+                truncated = True
+                break
+            kept.append(page)
+            remaining -= len(page)
+        pages = kept
+
+    return PdfExtraction(
+        pages=pages,
+        total_pages=total_pages,
+        elapsed=time.perf_counter() - started,
+        truncated=truncated,
+    )
@@ -0,0 +1,201 @@
+"""Pipeline de etapas conectadas por filas limitadas."""
+
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Generic, Iterable, TypeVar
+
+from core import logger
+
+T = TypeVar("T")
+
+_DONE = object()
+
+
+@dataclass
+class Stage(Generic[T]):
+    """
+    Etapa do pipeline.
+
+    `fn` processa o item no lugar e retorna True para encaminhá-lo à próxima
+    etapa ou False quando ele já terminou (pulado, com erro etc.). Cada etapa
+    tem `workers` threads próprias; etapas que fazem trabalho pesado de CPU ou
+    chamadas assíncronas usam seus próprios executores dentro de `fn`, e as
+    threads apenas aguardam o resultado.
+    """
+
+    name: str
+    fn: Callable[[T], bool]
+    workers: int = 1
+    queue_size: int | None = None
+
+
+@dataclass
+class StageMetrics:
+    """Métricas de uma etapa, usadas para encontrar o gargalo do pipeline."""
+
+    name: str
+    workers: int
+    queue_size: int
+    processed: int = 0
+    errors: int = 0
+    busy: float = 0.0
+    depth_total: int = 0
+    depth_samples: int = 0
+    max_depth: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def sample_depth(self, depth: int) -> None:
+        with self._lock:
+            self.depth_total += depth
+            self.depth_samples += 1
+            self.max_depth = max(self.max_depth, depth)
+
+    def record(self, elapsed: float, error: bool = False) -> None:
+        with self._lock:
+            self.processed += 1
+            self.busy += elapsed
+            self.errors += error
+
+    @property
+    def mean_depth(self) -> float:
+        return self.depth_total / self.depth_samples if self.depth_samples else 0.0
+
+
+class Pipeline(Generic[T]):
+    """
+    Executa itens por uma sequência de etapas conectadas por filas limitadas.
+
+    A fonte é consumida na thread que chama `run` e cada etapa tem um pool de
+    threads próprio. Como as filas são limitadas, uma etapa lenta bloqueia as
+    anteriores (inclusive a leitura da fonte), mantendo a memória constante
+    independentemente do tamanho da turma.
+    """
+
+    def __init__(self, stages: list[Stage[T]], source_name: str = "fonte"):
+        self.stages = stages
+        self.source_name = source_name
+        self.metrics = [
+            StageMetrics(
+                stage.name,
+                stage.workers,
+                stage.queue_size or 2 * stage.workers,
+            )
+            for stage in stages
+        ]
+        self.source_count = 0
+        self.source_time = 0.0
+        self.elapsed = 0.0
+
+    def run(self, items: Iterable[T]) -> list[T]:
+        """Processa todos os itens e retorna os que terminaram, em ordem de término."""
+        queues: list[queue.Queue] = [
+            queue.Queue(maxsize=metrics.queue_size) for metrics in self.metrics
+        ]
+        done: list[T] = []
+        done_lock = threading.Lock()
+        remaining = [stage.workers for stage in self.stages]
+        remaining_lock = threading.Lock()
+
+        def put(index: int, item: object) -> None:
+            queues[index].put(item)
+            self.metrics[index].sample_depth(queues[index].qsize())
+
+        def finish(item: T) -> None:
+            with done_lock:
+                done.append(item)
+
+        def worker(index: int) -> None:
+            stage, metrics = self.stages[index], self.metrics[index]
+            is_last = index == len(self.stages) - 1
+            while True:
+                item = queues[index].get()
+                if item is _DONE:
+                    break
+                started = time.perf_counter()
+                try:
+                    forward = stage.fn(item)
+                    error = False
+                except Exception as e:
+                    logger.error(f"Erro na etapa {stage.name}: {str(e)}")
+                    forward, error = False, True
+                metrics.record(time.perf_counter() - started, error)
+
+                if forward and not is_last:
+                    put(index + 1, item)
+                else:
+                    finish(item)
+
+            # A última thread a sair encerra a etapa seguinte
+            with remaining_lock:
+                remaining[index] -= 1
+                last_worker = remaining[index] == 0
+            if last_worker and not is_last:
+                for _ in range(self.stages[index + 1].workers):
+                    queues[index + 1].put(_DONE)
+
+        threads = [
+            threading.Thread(
+                target=worker, args=(index,), name=f"pipeline-{stage.name}", daemon=True
+            )
+            for index, stage in enumerate(self.stages)
+            for _ in range(stage.workers)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+
+        # Se a leitura da fonte falhar, a exceção é propagada sem aguardar as
+        # threads (daemon), que podem estar bloqueadas em filas cheias
+        iterator = iter(items)
+        while True:
+            fetch_started = time.perf_counter()
+            item = next(iterator, _DONE)
+            self.source_time += time.perf_counter() - fetch_started
+            if item is _DONE:
+                break
+            self.source_count += 1
+            put(0, item)
+
+        for _ in range(self.stages[0].workers):
+            queues[0].put(_DONE)
+        for thread in threads:
+            thread.join()
+        self.elapsed = time.perf_counter() - started
+
+        return done
+
+    def report(self) -> None:
+        """Exibe a vazão, a ocupação e a profundidade das filas de cada etapa."""
+        elapsed = self.elapsed or 1e-9
+        rows = [
+            [
+                self.source_name,
+                "1",
+                str(self.source_count),
+                f"{self.source_count / elapsed:.2f}",
+                f"{self.source_time / elapsed:.0%}",
+                "-",
+                "-",
+                "-",
+            ]
+        ]
+        for metrics in self.metrics:
+            rows.append(
+                [
+                    metrics.name,
+                    str(metrics.workers),
+                    str(metrics.processed),
+                    f"{metrics.processed / elapsed:.2f}",
+                    f"{metrics.busy / (metrics.workers * elapsed):.0%}",
+                    f"{metrics.mean_depth:.1f}/{metrics.queue_size}",
+                    str(metrics.max_depth),
+                    str(metrics.errors),
+                ]
+            )
+        logger.table(
+            f"Pipeline ({elapsed:.1f}s)",
+            ["Etapa", "Threads", "Itens", "Itens/s", "Ocup.", "Fila", "Máx.", "Erros"],
+            rows,
+        )
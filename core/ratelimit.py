@@ -0,0 +1,199 @@
+"""Limitação de taxa, novas tentativas e circuit breaker para chamadas ao LLM."""
+
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, TypeVar
+
+import openai
+
+from core import logger
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """Balde de tokens reabastecido continuamente até `capacity` a cada `period` segundos."""
+
+    def __init__(self, capacity: float, period: float = 60.0):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay_for(self, amount: float) -> float:
+        """Tempo de espera, em segundos, até haver `amount` tokens disponíveis."""
+        self._refill()
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float) -> None:
+        """Consome tokens (o saldo pode ficar negativo ao corrigir estimativas)."""
+        self._refill()
+        self.tokens -= amount
+
+
+class RateLimiter:
+    """Limites compartilhados de requisições (RPM) e tokens (TPM) por minuto."""
+
+    def __init__(self, rpm: int, tpm: int):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: int) -> None:
+        """Aguarda até que uma requisição de `tokens` tokens estimados caiba nos limites."""
+        tokens = min(tokens, int(self.tokens.capacity))
+        async with self._lock:
+            while True:
+                delay = max(self.requests.delay_for(1), self.tokens.delay_for(tokens))
+                if delay <= 0:
+                    break
+                await asyncio.sleep(delay)
+            self.requests.consume(1)
+            self.tokens.consume(tokens)
+
+    def correct(self, estimated: int, actual: int) -> None:
+        """Ajusta o balde de tokens com o uso real reportado pelo provedor."""
+        self.tokens.consume(actual - estimated)
+
+
+class CircuitBreaker:
+    """
+    Interrompe as chamadas quando o provedor parece fora do ar.
+
+    Após `failure_threshold` falhas transitórias consecutivas o circuito abre e
+    todas as chamadas aguardam `cooldown` segundos. Depois disso uma única
+    chamada de teste é liberada; se falhar, o circuito reabre com espera
+    dobrada (até `max_cooldown`).
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        cooldown: float = 30.0,
+        max_cooldown: float = 600.0,
+    ):
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial = asyncio.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    async def wait(self) -> bool:
+        """
+        Aguarda até que o circuito permita uma chamada.
+
+        Returns:
+            True se a chamada liberada é a chamada de teste (circuito semiaberto)
+        """
+        while self.opened_at is not None:
+            remaining = self.opened_at + self.cooldown - time.monotonic()
+            if remaining > 0:
+                await asyncio.sleep(remaining)
+                continue
+            if not self._trial.locked():
+                await self._trial.acquire()
+                return True
+            await asyncio.sleep(1)
+        return False
+
+    def release_trial(self) -> None:
+        """Libera a vaga da chamada de teste, inclusive se ela foi interrompida."""
+        if self._trial.locked():
+            self._trial.release()
+
+    def record_success(self, trial: bool) -> None:
+        if trial:
+            logger.success("Provedor do LLM respondeu, retomando avaliações")
+        self.failures = 0
+        self.opened_at = None
+        self.cooldown = self.base_cooldown
+
+    def record_failure(self, trial: bool) -> None:
+        self.failures += 1
+        if trial:
+            self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+            self.opened_at = time.monotonic()
+        elif self.opened_at is None and self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        else:
+            return
+        logger.warning(
+            f"Provedor do LLM indisponível, pausando avaliações por {self.cooldown:.0f}s"
+        )
+
+
+def is_retryable(error: Exception) -> bool:
+    """Erros transitórios: limite de taxa (429), erros 5xx, timeout e conexão."""
+    if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def _retry_after(error: Exception) -> float:
+    """Lê o cabeçalho Retry-After da resposta de erro, se houver."""
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers.get("retry-after", 0)) if response else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+
+async def call_with_retry(
+    call: Callable[[], Awaitable[T]],
+    *,
+    limiter: RateLimiter,
+    breaker: CircuitBreaker,
+    estimated_tokens: int,
+    max_retries: int = 5,
+    base_delay: float = 1.0,
+    max_delay: float = 60.0,
+) -> T:
+    """
+    Executa `call` respeitando os limites de taxa, com novas tentativas e
+    backoff exponencial com jitter para erros transitórios.
+
+    Falhas da chamada de teste com o circuito aberto não consomem tentativas:
+    enquanto o provedor estiver fora do ar a avaliação fica pausada. Erros não
+    transitórios são repassados sem fechar nem reabrir o circuito.
+    """
+    attempt = 0
+    while True:
+        trial = await breaker.wait()
+        try:
+            await limiter.acquire(estimated_tokens)
+            result = await call()
+        except Exception as e:
+            if not is_retryable(e):
+                raise
+            breaker.record_failure(trial)
+            if not trial:
+                attempt += 1
+                if attempt > max_retries:
+                    raise
+            error = e
+        else:
+            breaker.record_success(trial)
+            return result
+        finally:
+            # Também em cancelamentos: senão nenhuma chamada de teste seria liberada
+            if trial:
+                breaker.release_trial()
+
+        delay = random.uniform(0, min(max_delay, base_delay * 2**attempt))
+        await asyncio.sleep(max(delay, _retry_after(error)))
@@ -0,0 +1,212 @@
+"""Índice de similaridade entre as submissões de uma turma (MinHash + LSH)."""
+
+import hashlib
+import re
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from itertools import combinations
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+SIMILARITY_THRESHOLD = 0.8
+NUM_PERM = 128
+LSH_BANDS = 16  # 16 faixas de 8 linhas: pares com similaridade ~0.7+ viram candidatos
+SHINGLE_SIZE = 5  # palavras por shingle
+MIN_SHINGLES = 20  # textos menores não entram na comparação aproximada
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_CHUNK = 4096
+_WORD = re.compile(r"\w+")
+
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+
+
+def normalize(text: str) -> str:
+    """Normaliza o texto para comparação: minúsculas e espaços colapsados."""
+    return " ".join(text.lower().split())
+
+
+def content_digest(text: str) -> str:
+    """Identificador do texto exatamente como extraído; iguais indicam duplicatas exatas.
+
+    Não normaliza: em Python, indentação e maiúsculas mudam o programa.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _shingles(text: str) -> np.ndarray:
+    words = _WORD.findall(text.lower())
+    grams = {
+        " ".join(words[i : i + SHINGLE_SIZE])
+        for i in range(max(1, len(words) - SHINGLE_SIZE + 1))
+    }
+    return np.fromiter(
+        (
+            int.from_bytes(
+                hashlib.blake2b(gram.encode(), digest_size=4).digest(), "big"
+            )
+            for gram in grams
+        ),
+        dtype=np.uint64,
+        count=len(grams),
+    )
+
+
+def minhash(text: str) -> np.ndarray | None:
+    """Assinatura MinHash dos shingles de palavras; None para textos muito curtos."""
+    shingles = _shingles(text)
+    if len(shingles) < MIN_SHINGLES:
+        return None
+    signature = np.full(NUM_PERM, _MAX_HASH, dtype=np.uint64)
+    for start in range(0, len(shingles), _CHUNK):
+        chunk = shingles[start : start + _CHUNK]
+        hashes = (np.outer(chunk, _PERM_A) + _PERM_B) % _MERSENNE_PRIME & _MAX_HASH
+        signature = np.minimum(signature, hashes.min(axis=0))
+    return signature
+
+
+def fingerprint(text: str) -> dict[str, Any]:
+    """Digests e assinatura MinHash do texto, serializáveis em JSON.
+
+    Guardado no diário de execução, permite reindexar submissões puladas em
+    uma execução retomada sem baixá-las e processá-las de novo.
+    """
+    signature = minhash(text)
+    return {
+        "digest": content_digest(text),
+        "group": content_digest(normalize(text)),
+        "signature": signature.tolist() if signature is not None else None,
+    }
+
+
+@dataclass
+class _Entry:
+    label: str
+    digest: str
+    group: str
+    signature: np.ndarray | None
+
+
+class SimilarityIndex:
+    """
+    Índice das submissões de uma turma para encontrar duplicatas.
+
+    Duplicatas exatas são identificadas pelo `digest` retornado em `add`. O
+    relatório agrupa como idênticos os textos iguais após `normalize`, e as
+    quase duplicatas são encontradas por LSH sobre assinaturas MinHash e
+    confirmadas pela similaridade estimada.
+    """
+
+    def __init__(
+        self, threshold: float = SIMILARITY_THRESHOLD, bands: int = LSH_BANDS
+    ):
+        self.threshold = threshold
+        self.bands = bands
+        self._entries: list[_Entry] = []
+        self._lock = threading.Lock()
+
+    def add(self, label: str, text: str) -> str:
+        """Indexa o texto de uma submissão e retorna o digest do seu conteúdo."""
+        return self.add_fingerprint(label, fingerprint(text))
+
+    def add_fingerprint(self, label: str, data: dict[str, Any]) -> str:
+        """Indexa uma submissão pelo resultado de `fingerprint` e retorna o digest."""
+        signature = data["signature"]
+        entry = _Entry(
+            label,
+            data["digest"],
+            data["group"],
+            np.array(signature, dtype=np.uint64) if signature is not None else None,
+        )
+        with self._lock:
+            self._entries.append(entry)
+        return entry.digest
+
+    def _groups(self) -> dict[str, list[_Entry]]:
+        # Ordenado por rótulo: as submissões são indexadas na ordem em que o
+        # processamento paralelo termina, e o relatório não deve depender dela
+        groups: dict[str, list[_Entry]] = defaultdict(list)
+        for entry in sorted(self._entries, key=lambda entry: entry.label):
+            groups[entry.group].append(entry)
+        return groups
+
+    def exact_groups(self) -> list[list[str]]:
+        """Grupos (rótulos) de submissões idênticas a menos de maiúsculas e espaços."""
+        return [
+            [entry.label for entry in entries]
+            for entries in self._groups().values()
+            if len(entries) > 1
+        ]
+
+    def near_duplicates(self) -> list[tuple[str, str, float]]:
+        """
+        Pares de submissões diferentes com similaridade acima do limiar.
+
+        Cada grupo de submissões idênticas entra uma vez só, representado pela
+        primeira submissão (com a quantidade de cópias no rótulo).
+        """
+        entries = []
+        for group in self._groups().values():
+            if group[0].signature is None:
+                continue
+            label = group[0].label
+            if len(group) > 1:
+                label += f" (+{len(group) - 1} idêntica(s))"
+            entries.append((label, group[0].signature))
+
+        rows = NUM_PERM // self.bands
+        buckets: dict[tuple[int, bytes], list[int]] = defaultdict(list)
+        for index, (_, signature) in enumerate(entries):
+            for band in range(self.bands):
+                band_hash = signature[band * rows : (band + 1) * rows].tobytes()
+                buckets[(band, band_hash)].append(index)
+
+        candidates = {
+            pair
+            for members in buckets.values()
+            if len(members) > 1
+            for pair in combinations(members, 2)
+        }
+        pairs = []
+        for first, second in candidates:
+            (label_a, signature_a), (label_b, signature_b) = (
+                entries[first],
+                entries[second],
+            )
+            similarity = float(np.mean(signature_a == signature_b))
+            if similarity >= self.threshold:
+                pairs.append((label_a, label_b, similarity))
+        return sorted(pairs, key=lambda pair: (-pair[2], pair[0], pair[1]))
+
+    def write_report(self, path: Path) -> int:
+        """Salva o relatório de similaridade e retorna quantos grupos/pares listou."""
+        groups = self.exact_groups()
+        pairs = self.near_duplicates()
+        if not groups and not pairs:
+            path.unlink(missing_ok=True)
+            return 0
+
+        lines = ["# Relatório de Similaridade", ""]
+        if groups:
+            lines += ["## Submissões idênticas", ""]
+            for number, labels in enumerate(groups, 1):
+                lines.append(f"{number}. {', '.join(sorted(labels))}")
+            lines.append("")
+        if pairs:
+            lines += [
+                f"## Submissões semelhantes (similaridade ≥ {self.threshold:.0%})",
+                "",
+                "| Aluno | Aluno | Similaridade estimada |",
+                "|---|---|---|",
+            ]
+            lines += [f"| {a} | {b} | {similarity:.0%} |" for a, b, similarity in pairs]
+            lines.append("")
+
+        path.write_text("\n".join(lines), encoding="utf-8")
+        return len(groups) + len(pairs)
@@ -0,0 +1,137 @@
+"""Pool de sessões SMTP com conexão sob demanda e reconexão automática."""
+
+import queue
+import smtplib
+import time
+from dataclasses import dataclass
+from email.message import Message
+
+from core import logger
+
+SMTP_POOL_SIZE = 2
+SMTP_MAX_MESSAGES = 50  # mensagens por sessão antes de reconectar
+SMTP_NOOP_AFTER = 30  # segundos ociosa antes de conferir a sessão com NOOP
+SMTP_TIMEOUT = 30
+
+# Erros que indicam sessão perdida: vale reconectar e tentar de novo
+_DISCONNECTED = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+@dataclass
+class _Session:
+    smtp: smtplib.SMTP | None = None
+    sent: int = 0
+    last_used: float = 0.0
+
+
+class SmtpPool:
+    """
+    Conjunto de sessões SMTP autenticadas, compartilhado entre threads.
+
+    As sessões só são abertas no primeiro envio, e não quando o avaliador é
+    criado: as chamadas ao modelo podem levar minutos e o servidor derruba
+    conexões ociosas. Antes de reutilizar uma sessão parada há mais de
+    `noop_after` segundos ela é conferida com NOOP. Sessões que caíram são
+    reabertas com novo login, e cada sessão é renovada após `max_messages`
+    envios, já que alguns provedores limitam as mensagens por conexão.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: str,
+        password: str,
+        *,
+        size: int = SMTP_POOL_SIZE,
+        max_messages: int = SMTP_MAX_MESSAGES,
+        noop_after: float = SMTP_NOOP_AFTER,
+        timeout: float = SMTP_TIMEOUT,
+        smtp_class: type[smtplib.SMTP] = smtplib.SMTP_SSL,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.max_messages = max_messages
+        self.noop_after = noop_after
+        self.timeout = timeout
+        self.smtp_class = smtp_class
+        self._sessions: queue.LifoQueue[_Session] = queue.LifoQueue()
+        for _ in range(max(1, size)):
+            self._sessions.put(_Session())
+
+    def _connect(self, session: _Session) -> None:
+        self._disconnect(session)
+        smtp = self.smtp_class(self.host, self.port, timeout=self.timeout)
+        try:
+            smtp.login(self.username, self.password)
+        except BaseException:
+            smtp.close()
+            raise
+        session.smtp, session.sent = smtp, 0
+
+    @staticmethod
+    def _disconnect(session: _Session) -> None:
+        if session.smtp is None:
+            return
+        try:
+            session.smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            session.smtp.close()
+        session.smtp = None
+
+    def _is_alive(self, session: _Session) -> bool:
+        if session.smtp is None:
+            return False
+        if time.monotonic() - session.last_used < self.noop_after:
+            return True
+        try:
+            return session.smtp.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def _ready(self, session: _Session) -> None:
+        """Garante uma sessão conectada e autenticada, dentro do limite de mensagens."""
+        if session.sent >= self.max_messages or not self._is_alive(session):
+            self._connect(session)
+
+    def send_message(self, msg: Message, **kwargs) -> None:
+        """
+        Envia a mensagem por uma das sessões livres, aguardando se todas
+        estiverem ocupadas. Se a sessão tiver caído, reconecta e tenta mais uma vez.
+
+        Raises:
+            smtplib.SMTPException: Em falhas de autenticação ou recusa da mensagem
+        """
+        session = self._sessions.get()
+        try:
+            for attempt in range(2):
+                try:
+                    self._ready(session)
+                    session.smtp.send_message(msg, **kwargs)
+                    break
+                except (*_DISCONNECTED, smtplib.SMTPResponseException) as e:
+                    # 421: o servidor encerrou a sessão (ex.: limite de mensagens)
+                    if getattr(e, "smtp_code", 421) != 421:
+                        raise
+                    self._disconnect(session)
+                    if attempt:
+                        raise
+                    logger.warning(f"Conexão SMTP perdida ({str(e)}), reconectando...")
+            session.sent += 1
+            session.last_used = time.monotonic()
+        finally:
+            self._sessions.put(session)
+
+    def close(self) -> None:
+        """Encerra as sessões abertas; o pool pode voltar a ser usado depois."""
+        sessions = []
+        while True:
+            try:
+                sessions.append(self._sessions.get_nowait())
+            except queue.Empty:
+                break
+        for session in sessions:
+            self._disconnect(session)
+            self._sessions.put(session)
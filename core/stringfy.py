@@ -1,27 +1,181 @@
-from pathlib import Path
-from typing import Callable, Optional
+import hashlib
+import json
+import mmap
+import re
+import shutil
+import tarfile
+import tempfile
+import zipfile
+from concurrent.futures import Executor
+from pathlib import Path, PurePosixPath
+from typing import Callable
+from urllib.parse import urlencode, urlparse
 
-import pymupdf
+import httpx
 
 from core import logger
-from core.drive import download_file
-from models import Attachment, DriveFile, Form, Link, SharedDriveFile, YouTubeVideo
-from utils import sanitize_string
+from core.archive import ArchiveReader, is_archive
+from core.cache import DiskCache, file_digest, make_key, shared_cache_dir
+from core.downloads import DownloadManager, drive_cache
+from core.pdf import PDF_WORKERS, extract_pdf
+from core.web import WebClient, WebResponse, html_to_text, web_cache
+from models import (
+    Attachment,
+    ContentSection,
+    DriveFile,
+    Form,
+    Link,
+    ParsedAttachment,
+    SharedDriveFile,
+    YouTubeVideo,
+)
 
-from .notebook import process_notebook
+from .notebook import notebook_sections, process_notebook
 
+# Limites de segurança da extração; o orçamento de contexto corta bem antes
+PDF_EXTRACT_MAX_PAGES = 500
+PDF_EXTRACT_MAX_CHARS = 2_000_000
 
-def _parse_pdf(bytes: bytes) -> str:
-    """Extrai texto de um arquivo PDF usando pymupdf."""
+# Incremente ao mudar a saída de qualquer parser: invalida o cache de anexos processados
+PARSER_VERSION = "3"
+PARSED_CACHE_MAX_BYTES = 512 * 1024**2  # 512 MiB
+
+# Início dos trechos que registram falhas de download, acesso ou processamento
+ERROR_PLACEHOLDER = "[Erro"
+
+YOUTUBE_OEMBED_URL = "https://www.youtube.com/oembed"
+_COLAB_URL = re.compile(r"colab\.research\.google\.com/drive/([\w-]+)")
+_GITHUB_BLOB_URL = re.compile(r"https?://github\.com/([^/]+/[^/]+)/blob/(.+)")
+
+
+def parsed_cache(output_dir: Path) -> DiskCache:
+    """
+    Cache dos anexos já processados, por (ID do arquivo, conteúdo, versão do parser).
+
+    Cada versão do parser tem seu próprio diretório; os de versões anteriores
+    são removidos ao abrir o cache.
+    """
+    root = shared_cache_dir(output_dir, "parsed")
+    current = root / f"v{PARSER_VERSION}"
+    if root.exists():
+        for directory in root.iterdir():
+            if directory.is_dir() and directory != current:
+                shutil.rmtree(directory, ignore_errors=True)
+    return DiskCache(current, max_bytes=PARSED_CACHE_MAX_BYTES)
+
+
+def _decode(data: bytes | mmap.mmap) -> str:
     try:
-        doc = pymupdf.Document(stream=bytes, filetype="pdf")
-        text = ""
-        for page in doc:
-            text += page.get_text()  # type: ignore [hope]
-        doc.close()
-        return text
+        return str(data, "utf-8")
+    except UnicodeDecodeError:
+        return str(data, "latin-1")
     except Exception as e:
-        raise ValueError(f"Erro ao processar PDF: {str(e)}")
+        raise ValueError(f"Erro ao decodificar bytes: {str(e)}")
+
+
+def _parse_text(source: bytes | Path) -> str:
+    """Decodifica um arquivo de texto (UTF-8, com fallback para latin-1).
+
+    Com um caminho, o arquivo é mapeado em memória (mmap), então o único
+    buffer completo é o da string decodificada.
+    """
+    if not isinstance(source, Path):
+        return _decode(source)
+    if source.stat().st_size == 0:
+        return ""
+    with open(source, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return _decode(mapped)
+
+
+def _parse_pdf_sections(
+    source: bytes | Path, pdf_workers: int
+) -> list[ContentSection]:
+    extraction = extract_pdf(
+        source,
+        max_pages=PDF_EXTRACT_MAX_PAGES,
+        max_chars=PDF_EXTRACT_MAX_CHARS,
+        workers=pdf_workers,
+    )
+    logger.info(
+        f"[dim]   {extraction.total_pages} página(s) em {extraction.elapsed:.2f}s[/dim]"
+    )
+    sections = [ContentSection(kind="page", text=page) for page in extraction.pages]
+    if extraction.truncated:
+        sections.append(
+            ContentSection(
+                kind="text",
+                text=f"[PDF truncado: {len(extraction.pages)} de {extraction.total_pages} páginas extraídas]",
+            )
+        )
+    return sections
+
+
+def _parse_sections(
+    source: bytes | Path, name: str, pdf_workers: int
+) -> list[ContentSection]:
+    """Escolhe o parser pela extensão do arquivo."""
+    file_extension = Path(name).suffix.lstrip(".").lower()
+    if file_extension == "ipynb":
+        cells = process_notebook(source)
+        if cells is None:
+            return [ContentSection(kind="text", text="[Erro ao processar notebook]")]
+        return notebook_sections(cells)
+    if file_extension == "pdf":
+        return _parse_pdf_sections(source, pdf_workers)
+    return [ContentSection(kind="text", text=_parse_text(source))]
+
+
+def _parse_archive(source: bytes | Path, pdf_workers: int) -> list[ContentSection]:
+    """Processa cada arquivo de um ZIP/TAR com o parser da sua extensão."""
+    reader = ArchiveReader(source)
+    sections = []
+    try:
+        for member in reader:
+            sections.append(ContentSection(kind="text", text=f"--- {member.name} ---"))
+            try:
+                sections.extend(_parse_sections(member.data, member.name, pdf_workers))
+            except ValueError as e:
+                sections.append(ContentSection(kind="text", text=f"[{str(e)}]"))
+    except (zipfile.BadZipFile, tarfile.TarError, EOFError, OSError) as e:
+        sections.append(
+            ContentSection(
+                kind="text", text=f"[Erro ao abrir arquivo compactado: {str(e)}]"
+            )
+        )
+
+    if reader.skipped:
+        shown = ", ".join(reader.skipped)
+        extra = reader.skipped_count - len(reader.skipped)
+        if extra > 0:
+            shown += f" e mais {extra}"
+        sections.append(
+            ContentSection(kind="text", text=f"[Arquivos ignorados: {shown}]")
+        )
+    if reader.limit_reached:
+        sections.append(
+            ContentSection(
+                kind="text",
+                text=f"[Leitura do arquivo compactado interrompida: {reader.limit_reached}]",
+            )
+        )
+    return sections
+
+
+def parse_file(
+    file_path: Path, title: str, pdf_workers: int = PDF_WORKERS
+) -> ParsedAttachment:
+    """
+    Processa um arquivo já baixado conforme sua extensão.
+
+    Função de módulo (e não método) para poder ser executada em um pool de
+    processos; nesse caso use `pdf_workers=1`, evitando um pool dentro do outro.
+    """
+    if is_archive(title):
+        sections = _parse_archive(file_path, pdf_workers)
+    else:
+        sections = _parse_sections(file_path, title, pdf_workers)
+    return ParsedAttachment(title=title, sections=sections)
 
 
 class AttachmentParser:
@@ -31,73 +185,212 @@ class AttachmentParser:
     adequadamente, incluindo o download e análise de formatos específicos de arquivos como notebooks.
     """
 
-    def __init__(self, attachment: Attachment, drive_service: ..., output_dir: Path):
+    def __init__(
+        self,
+        attachment: Attachment,
+        drive_service: ...,
+        output_dir: Path,
+        downloads: DownloadManager | None = None,
+        cache: DiskCache | None = None,
+        parse_pool: Executor | None = None,
+        web: WebClient | None = None,
+        downloaded: dict[str, Path | None] | None = None,
+    ):
         self.attachment = attachment
         self.drive_service = drive_service
-        self.output_dir = output_dir / "downloads"
-        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.output_dir = output_dir
+        self.downloads = downloads
+        self.cache = cache
+        self.parse_pool = parse_pool
+        self.web = web
+        # Caminhos já baixados pela etapa de download, por ID do Drive
+        self.downloaded = downloaded or {}
+
+    def __parse_file(self, drive_file: DriveFile, file_path: Path) -> ParsedAttachment:
+        if self.parse_pool is None:
+            return parse_file(file_path, drive_file.title)
+        return self.parse_pool.submit(
+            parse_file, file_path, drive_file.title, 1
+        ).result()
+
+    def __parse_drive_file(
+        self, drive_file: DriveFile | SharedDriveFile
+    ) -> ParsedAttachment:
+        if isinstance(drive_file, SharedDriveFile):
+            drive_file = drive_file.driveFile
 
-    def __download_drive_file(
-        self, drive_file: DriveFile, filename: str
-    ) -> Optional[bytes]:
-        file_path = self.output_dir / filename
-        if file_path.exists():
-            with file_path.open("rb") as f:
-                return f.read()
+        logger.info(f"[dim]📄 {drive_file.title}[/dim]")
+        downloads = self.downloads or DownloadManager(
+            self.drive_service, drive_cache(self.output_dir), max_workers=1
+        )
+        try:
+            return self.__parse_cached(drive_file, downloads)
+        finally:
+            if downloads is not self.downloads:
+                downloads.close()
+
+    def __parse_cached(
+        self, drive_file: DriveFile, downloads: DownloadManager
+    ) -> ParsedAttachment:
+        """Consulta o cache de anexos processados antes de baixar e processar o arquivo."""
+        key = None
+        if self.cache is not None and (version := downloads.version(drive_file)):
+            key = make_key(drive_file.id, version, PARSER_VERSION)
+            if (parsed := self.__from_cache(key, drive_file)) is not None:
+                return parsed
 
-        file_bytes = download_file(drive_file.id, self.drive_service, silent=True)
-        if file_bytes is None:
-            return
+        if drive_file.id in self.downloaded:
+            file_path = self.downloaded[drive_file.id]
+        else:
+            file_path = downloads.get(drive_file)
+        if file_path is None or not file_path.exists():
+            return ParsedAttachment.from_text(
+                f"[Erro ao processar arquivo: {drive_file.title}]"
+            )
+        if self.cache is None:
+            return self.__parse_file(drive_file, file_path)
 
-        file_path.write_bytes(file_bytes)
-        return file_bytes
+        if key is None:
+            # Sem metadados do Drive, o conteúdo é identificado pelo próprio hash
+            key = make_key(drive_file.id, file_digest(file_path), PARSER_VERSION)
+            if (parsed := self.__from_cache(key, drive_file)) is not None:
+                return parsed
 
-    def __parse_bare_text(self, bytes: bytes) -> str:
+        # Falhas de parsing também são guardadas: o mesmo conteúdo falharia de novo
+        parsed = self.__parse_file(drive_file, file_path)
+        self.cache.set_text(key, parsed.model_dump_json())
+        return parsed
+
+    def __from_cache(self, key: str, drive_file: DriveFile) -> ParsedAttachment | None:
+        cached = self.cache.get_text(key) if self.cache is not None else None
+        if cached is None:
+            return None
+        parsed = ParsedAttachment.model_validate_json(cached)
+        # O arquivo pode ter sido renomeado sem mudar de conteúdo
+        return parsed.model_copy(update={"title": drive_file.title})
+
+    def __fetch(self, url: str) -> WebResponse:
+        """Busca a URL no cliente compartilhado (ou em um temporário, sem ele)."""
+        if self.web is not None:
+            return self.web.get(url)
+        web = WebClient(web_cache(self.output_dir))
         try:
-            return bytes.decode("utf-8")
-        except UnicodeDecodeError:
-            return bytes.decode("latin-1")
-        except Exception as e:
-            raise ValueError(f"Erro ao decodificar bytes: {str(e)}")
+            return web.get(url)
+        finally:
+            web.close()
 
-    def __stringfy_drive_file(self, drive_file: DriveFile | SharedDriveFile) -> str:
-        if isinstance(drive_file, SharedDriveFile):
-            drive_file = drive_file.driveFile
+    def __parse_response(
+        self, response: WebResponse, title: str
+    ) -> list[ContentSection]:
+        """Escolhe o parser pelo tipo de conteúdo (ou pela extensão da URL)."""
+        content_type = response.content_type.split(";")[0].strip().lower()
+        name = PurePosixPath(urlparse(response.url).path).name or title
+        if content_type == "text/html":
+            page_title, text = html_to_text(response.text)
+            sections = [ContentSection(kind="text", text=text)]
+            if page_title:
+                sections.insert(
+                    0, ContentSection(kind="text", text=f"Título da página: {page_title}")
+                )
+        elif content_type == "application/pdf" or name.lower().endswith(".pdf"):
+            sections = self.__parse_pdf_body(response)
+        else:
+            sections = _parse_sections(response.content, name, PDF_WORKERS)
+        if response.truncated:
+            sections.append(
+                ContentSection(
+                    kind="text", text="[Conteúdo truncado: limite de tamanho atingido]"
+                )
+            )
+        return sections
 
-        logger.info(f"[dim]📄 {drive_file.title}[/dim]")
-        filename = f"{drive_file.id}_{sanitize_string(drive_file.title)}"
-        file_bytes = self.__download_drive_file(drive_file, filename)
-        if file_bytes is None:
-            return f"[Erro ao processar arquivo: {drive_file.title}]"
-
-        file_extension = Path(filename).suffix.lstrip(".")
-        file_parsers = {
-            "ipynb": process_notebook,
-            "pdf": _parse_pdf,
-        }
+    def __parse_pdf_body(self, response: WebResponse) -> list[ContentSection]:
+        """Grava o PDF baixado em disco e o extrai pelo caminho, como os do Drive.
 
-        parsed_file = file_parsers.get(file_extension, self.__parse_bare_text)(
-            file_bytes
-        )
-        return f"{drive_file.title}\n{parsed_file}"
+        Assim o pool de processos recebe o caminho, e não uma cópia do
+        documento inteiro para cada faixa de páginas.
+        """
+        cache = self.web.cache if self.web is not None else None
+        if cache is not None:
+            key = make_key("body", hashlib.sha256(response.content).hexdigest())
+            if (path := cache.set(key, response.content)) is not None:
+                return _parse_pdf_sections(path, PDF_WORKERS)
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "link.pdf"
+            path.write_bytes(response.content)
+            return _parse_pdf_sections(path, PDF_WORKERS)
 
-    # TODO: implementar demais parsers
-    def __stringfy_youtube_video(self, youtube_video: YouTubeVideo) -> str: ...
+    def __parse_youtube_video(self, youtube_video: YouTubeVideo) -> ParsedAttachment:
+        logger.info(f"[dim]🎬 {youtube_video.title}[/dim]")
+        lines = [f"Vídeo do YouTube: {youtube_video.alternateLink}"]
+        query = urlencode({"url": youtube_video.alternateLink, "format": "json"})
+        try:
+            details = json.loads(self.__fetch(f"{YOUTUBE_OEMBED_URL}?{query}").text)
+            if author := details.get("author_name"):
+                lines.append(f"Canal: {author}")
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning(f"Não foi possível obter os dados do vídeo: {str(e)}")
+        return ParsedAttachment.from_text("\n".join(lines), title=youtube_video.title)
 
-    def __stringfy_link(self, link: Link) -> str: ...
+    def __parse_link(self, link: Link) -> ParsedAttachment:
+        title = link.title or link.url
+        # Notebooks do Colab são arquivos do Drive: usa o download autenticado
+        if match := _COLAB_URL.search(link.url):
+            return self.__parse_drive_file(
+                DriveFile(
+                    id=match.group(1),
+                    title=title if title.endswith(".ipynb") else f"{title}.ipynb",
+                    alternateLink=link.url,
+                )
+            )
 
-    def __stringfy_form(self, form: Form) -> str: ...
+        logger.info(f"[dim]🔗 {title}[/dim]")
+        url = link.url
+        # Arquivos no GitHub: o conteúdo bruto em vez da página renderizada
+        if match := _GITHUB_BLOB_URL.match(url):
+            url = f"https://raw.githubusercontent.com/{match.group(1)}/{match.group(2)}"
+        sections = [ContentSection(kind="text", text=f"Link: {link.url}")]
+        try:
+            sections += self.__parse_response(self.__fetch(url), title)
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning(f"Não foi possível acessar o link {link.url}: {str(e)}")
+            sections.append(
+                ContentSection(kind="text", text=f"[Erro ao acessar link: {str(e)}]")
+            )
+        return ParsedAttachment(title=title, sections=sections)
 
-    def stringfy(self) -> str:
-        attachment_stringfiers: dict[str, Callable] = {
-            "driveFile": self.__stringfy_drive_file,
-            "youTubeVideo": self.__stringfy_youtube_video,
-            "link": self.__stringfy_link,
-            "form": self.__stringfy_form,
+    def __parse_form(self, form: Form) -> ParsedAttachment:
+        logger.info(f"[dim]📝 {form.title}[/dim]")
+        sections = [ContentSection(kind="text", text=f"Formulário: {form.formUrl}")]
+        try:
+            sections += self.__parse_response(self.__fetch(form.formUrl), form.title)
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning(
+                f"Não foi possível acessar o formulário {form.formUrl}: {str(e)}"
+            )
+            sections.append(
+                ContentSection(
+                    kind="text", text=f"[Erro ao acessar formulário: {str(e)}]"
+                )
+            )
+        return ParsedAttachment(title=form.title, sections=sections)
+
+    def parse(self) -> ParsedAttachment:
+        """Extrai o conteúdo do anexo dividido em trechos."""
+        if self.attachment.driveFile is not None:
+            return self.__parse_drive_file(self.attachment.driveFile)
+
+        attachment_parsers: dict[str, Callable[..., ParsedAttachment]] = {
+            "youTubeVideo": self.__parse_youtube_video,
+            "link": self.__parse_link,
+            "form": self.__parse_form,
         }
 
-        for attachment_type, stringfier in attachment_stringfiers.items():
+        for attachment_type, parser in attachment_parsers.items():
             if (value := getattr(self.attachment, attachment_type)) is not None:
-                return stringfier(value)
+                return parser(value)
 
-        return ""
+        return ParsedAttachment.from_text("")
+
+    def stringfy(self) -> str:
+        return self.parse().render()
@@ -1,10 +1,16 @@
 """Google Classroom users module."""
 
+import json
+import threading
+import time
+from pathlib import Path
 from typing import Any, Optional
 
 from core import logger
 from models import UserProfile
 
+ROSTER_CACHE_TTL = 6 * 60 * 60  # segundos
+
 
 def get_user_profile(classroom_service: Any, user_id: str) -> Optional[UserProfile]:
     """
@@ -29,3 +35,128 @@ def get_user_profile(classroom_service: Any, user_id: str) -> Optional[UserProfi
             f"Não foi possível carregar perfil do usuário {user_id}: {str(e)}"
         )
         return None
+
+
+class CourseRoster:
+    """
+    Índice `userId -> UserProfile` dos alunos de um curso.
+
+    A lista de alunos é carregada uma única vez por curso (paginando
+    `courses().students().list`) e mantida em cache em disco por `ttl` segundos.
+    `get_user_profile` só é chamado para IDs ausentes da lista.
+    """
+
+    def __init__(
+        self,
+        classroom_service: Any,
+        course_id: str,
+        cache_file: Path | None = None,
+        ttl: float = ROSTER_CACHE_TTL,
+        page_size: int = 100,
+    ):
+        self.classroom_service = classroom_service
+        self.course_id = course_id
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.page_size = page_size
+        self.profiles: dict[str, UserProfile] = {}
+        self.fetched_at = 0.0
+        self.fallbacks = 0
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def _load_cache(self) -> bool:
+        """Carrega a lista do cache em disco se ainda estiver válida."""
+        if self.cache_file is None or not self.cache_file.exists():
+            return False
+        try:
+            data = json.loads(self.cache_file.read_text(encoding="utf-8"))
+            if time.time() - data["fetched_at"] > self.ttl:
+                return False
+            self.profiles = {
+                profile["id"]: UserProfile.model_validate(profile)
+                for profile in data["students"]
+            }
+            self.fetched_at = data["fetched_at"]
+            return True
+        except Exception as e:
+            logger.warning(f"Cache de alunos inválido, ignorando: {str(e)}")
+            return False
+
+    def _fetch(self) -> bool:
+        """Busca todos os alunos do curso, página a página."""
+        page_token = None
+        try:
+            while True:
+                results = (
+                    self.classroom_service.courses()
+                    .students()
+                    .list(
+                        courseId=self.course_id,
+                        pageSize=self.page_size,
+                        pageToken=page_token,
+                    )
+                    .execute()
+                )
+                for student in results.get("students", []):
+                    profile = student.get("profile", {})
+                    self.profiles[student["userId"]] = UserProfile(
+                        id=student["userId"],
+                        full_name=profile.get("name", {}).get("fullName", ""),
+                        email=profile.get("emailAddress", ""),
+                    )
+
+                page_token = results.get("nextPageToken")
+                if not page_token:
+                    break
+        except Exception as e:
+            logger.warning(f"Não foi possível carregar a lista de alunos: {str(e)}")
+            return False
+
+        self.fetched_at = time.time()
+        self._dirty = True
+        return True
+
+    def load(self) -> None:
+        """Carrega a lista de alunos do cache ou da API."""
+        if self._load_cache():
+            logger.info(
+                f"[dim]👥 {len(self.profiles)} aluno(s) carregado(s) do cache[/dim]"
+            )
+            return
+
+        if self._fetch():
+            logger.info(f"[dim]👥 {len(self.profiles)} aluno(s) carregado(s)[/dim]")
+            self.save()
+
+    def get(self, user_id: str) -> Optional[UserProfile]:
+        """Retorna o perfil do aluno, consultando a API apenas se necessário."""
+        with self._lock:
+            if user_id in self.profiles:
+                return self.profiles[user_id]
+
+        profile = get_user_profile(self.classroom_service, user_id)
+        if profile is not None:
+            with self._lock:
+                self.profiles[user_id] = profile
+                self.fallbacks += 1
+                self._dirty = True
+        return profile
+
+    def save(self) -> None:
+        """Persiste a lista em disco se houve alterações."""
+        if self.cache_file is None or not self._dirty or not self.fetched_at:
+            return
+        try:
+            with self._lock:
+                data = {
+                    "fetched_at": self.fetched_at,
+                    "students": [
+                        profile.model_dump() for profile in self.profiles.values()
+                    ],
+                }
+                self._dirty = False
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            self.cache_file.write_text(json.dumps(data), encoding="utf-8")
+        except Exception as e:
+            logger.warning(f"Não foi possível salvar o cache de alunos: {str(e)}")
@@ -0,0 +1,190 @@
+"""Cliente HTTP compartilhado, com cache validado por ETag/Last-Modified."""
+
+import json
+import time
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from pathlib import Path
+
+import httpx
+
+from core.cache import DiskCache, make_key, shared_cache_dir
+
+HTTP_TIMEOUT = 10  # segundos por requisição, incluindo a leitura do corpo
+HTTP_MAX_BYTES = 2 * 1024 * 1024
+HTTP_MAX_CONNECTIONS = 10
+HTTP_CACHE_MAX_BYTES = 256 * 1024**2
+USER_AGENT = "classroom-autograder/0.1"
+
+
+def web_cache(output_dir: Path) -> DiskCache:
+    """Cache de respostas HTTP compartilhado entre cursos e atividades."""
+    return DiskCache(shared_cache_dir(output_dir, "http"), max_bytes=HTTP_CACHE_MAX_BYTES)
+
+
+@dataclass
+class WebResponse:
+    url: str
+    status: int
+    content_type: str
+    content: bytes
+    truncated: bool = False
+    from_cache: bool = False
+
+    @property
+    def text(self) -> str:
+        charset = "utf-8"
+        if "charset=" in self.content_type:
+            charset = self.content_type.split("charset=")[-1].split(";")[0].strip()
+        try:
+            return self.content.decode(charset, errors="replace")
+        except LookupError:
+            return self.content.decode("utf-8", errors="replace")
+
+
+class WebClient:
+    """
+    Cliente HTTP com pool de conexões para os links enviados pelos alunos.
+
+    Respostas com ETag ou Last-Modified ficam em cache e são revalidadas com
+    requisições condicionais (304 reaproveita o corpo guardado). Cada
+    requisição tem tempo limite total e tamanho máximo de corpo, para que uma
+    URL lenta ou enorme não segure a avaliação.
+    """
+
+    def __init__(
+        self,
+        cache: DiskCache | None = None,
+        timeout: float = HTTP_TIMEOUT,
+        max_bytes: int = HTTP_MAX_BYTES,
+        client: httpx.Client | None = None,
+    ):
+        self.cache = cache
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.client = client or httpx.Client(
+            follow_redirects=True,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_CONNECTIONS,
+            ),
+            headers={"User-Agent": USER_AGENT},
+        )
+
+    def _load(self, key: str) -> tuple[dict, bytes] | None:
+        data = self.cache.get(key) if self.cache is not None else None
+        if data is None:
+            return None
+        header, _, body = data.partition(b"\n")
+        return json.loads(header), body
+
+    def _store(self, key: str, response: WebResponse, meta: dict) -> None:
+        if self.cache is None or response.truncated:
+            return
+        meta = {
+            **meta,
+            "url": response.url,
+            "status": response.status,
+            "content_type": response.content_type,
+        }
+        self.cache.set(key, json.dumps(meta).encode("utf-8") + b"\n" + response.content)
+
+    def get(self, url: str) -> WebResponse:
+        """
+        Busca a URL, usando o cache quando o servidor confirma que nada mudou.
+
+        Raises:
+            httpx.HTTPError: Em erros de rede, de status HTTP ou de tempo limite
+        """
+        key = make_key(url)
+        cached = self._load(key)
+        headers = {}
+        if cached is not None:
+            meta, _ = cached
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        deadline = time.monotonic() + self.timeout
+        with self.client.stream("GET", url, headers=headers) as response:
+            if response.status_code == 304 and cached is not None:
+                meta, body = cached
+                return WebResponse(
+                    meta["url"], meta["status"], meta["content_type"], body, from_cache=True
+                )
+            if response.is_error:
+                raise httpx.HTTPStatusError(
+                    f"HTTP {response.status_code}",
+                    request=response.request,
+                    response=response,
+                )
+
+            chunks, size, truncated = [], 0, False
+            for chunk in response.iter_bytes():
+                if time.monotonic() > deadline:
+                    raise httpx.ReadTimeout(f"download excedeu {self.timeout:.0f}s")
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= self.max_bytes:
+                    truncated = True
+                    break
+
+            result = WebResponse(
+                url=str(response.url),
+                status=response.status_code,
+                content_type=response.headers.get("content-type", ""),
+                content=b"".join(chunks)[: self.max_bytes],
+                truncated=truncated,
+            )
+            validators = {
+                "etag": response.headers.get("etag"),
+                "last_modified": response.headers.get("last-modified"),
+            }
+        if validators["etag"] or validators["last_modified"]:
+            self._store(key, result, validators)
+        return result
+
+    def close(self) -> None:
+        self.client.close()
+
+
+class _TextExtractor(HTMLParser):
+    SKIPPED_TAGS = {"script", "style", "noscript", "svg", "template", "head"}
+    BLOCK_TAGS = {"p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "pre", "section"}
+
+    def __init__(self):
+        super().__init__()
+        self.title = ""
+        self.parts: list[str] = []
+        self._skipping = 0
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "title":
+            self._in_title = True
+        elif tag in self.SKIPPED_TAGS:
+            self._skipping += 1
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self._in_title = False
+        elif tag in self.SKIPPED_TAGS and self._skipping:
+            self._skipping -= 1
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        elif not self._skipping:
+            self.parts.append(data)
+
+
+def html_to_text(html: str) -> tuple[str, str]:
+    """Extrai o título e o texto visível de uma página HTML."""
+    extractor = _TextExtractor()
+    extractor.feed(html)
+    lines = (" ".join(line.split()) for line in "".join(extractor.parts).splitlines())
+    return " ".join(extractor.title.split()), "\n".join(line for line in lines if line)
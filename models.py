@@ -1,5 +1,6 @@
 from enum import Enum
 from pathlib import Path
+from typing import Literal
 
 from pydantic import BaseModel, EmailStr, Field
 
@@ -11,6 +12,35 @@ class FeedbackResult(BaseModel):
     grade: float = Field(ge=0.0, description="Nota do aluno (calculada pelo LLM)")
 
 
+class ContentSection(BaseModel):
+    """Trecho do conteúdo extraído de um anexo."""
+
+    kind: Literal["text", "code", "markdown", "output", "page"]
+    text: str
+
+    def render(self) -> str:
+        if self.kind == "code":
+            return f"```\n{self.text}\n```"
+        if self.kind == "output":
+            return f"Saída:\n{self.text}"
+        return self.text
+
+
+class ParsedAttachment(BaseModel):
+    """Conteúdo de um anexo dividido em trechos, antes de virar texto para o LLM."""
+
+    title: str
+    sections: list[ContentSection] = []
+
+    @classmethod
+    def from_text(cls, text: str, title: str = "") -> "ParsedAttachment":
+        return cls(title=title, sections=[ContentSection(kind="text", text=text)])
+
+    def render(self) -> str:
+        body = "\n".join(section.render() for section in self.sections)
+        return f"{self.title}\n{body}" if self.title else body
+
+
 class SubmissionState(Enum):
     SUBMISSION_STATE_UNSPECIFIED = (
         "SUBMISSION_STATE_UNSPECIFIED"  # this shloud never be returned.
@@ -91,6 +121,16 @@ class MultipleChoiceSubmission(BaseModel):
     answer: str
 
 
+class StateHistory(BaseModel):
+    state: str  # The workflow pipeline stage (CREATED, TURNED_IN, RETURNED, ...).
+    stateTimestamp: str | None = None  # When the submission entered this state.
+    actorUserId: str | None = None  # The teacher or student who made the change.
+
+
+class SubmissionHistory(BaseModel):
+    stateHistory: StateHistory | None = None  # Only state changes are used; gradeHistory entries are ignored.
+
+
 class Submission(BaseModel):
     courseId: str  # Identifier of the course. Read-only.
     courseWorkId: str  # Identifier for the course work this corresponds to. Read-only.
@@ -113,7 +153,7 @@ class Submission(BaseModel):
         CourseWorkType  # Type of course work this submission is for. Read-only.
     )
     associatedWithDeveloper: bool = False  # Whether this student submission is associated with the Developer Console project making the request. Read-only.
-    # submissionHistory: list[SubmissionHistory]  # The history of the submission (includes state and grade histories). Read-only.
+    submissionHistory: list[SubmissionHistory] = []  # The history of the submission (includes state and grade histories). Read-only.
 
     # Submission content union field - only one of these will be populated based on courseWorkType
     assignmentSubmission: AssignmentSubmission | None = (
@@ -126,6 +166,21 @@ class Submission(BaseModel):
         None  # Submission content for MULTIPLE_CHOICE_QUESTION type
     )
 
+    @property
+    def turned_in_time(self) -> str | None:
+        """Momento da última entrega pelo aluno (None se nunca foi entregue).
+
+        Diferente de `updateTime`, não muda quando o professor atribui a nota
+        ou devolve a submissão.
+        """
+        turned_in = [
+            history.stateHistory.stateTimestamp
+            for history in self.submissionHistory
+            if history.stateHistory is not None
+            and history.stateHistory.state == SubmissionState.TURNED_IN.value
+        ]
+        return turned_in[-1] if turned_in else None
+
 
 class UserProfile(BaseModel):
     id: str
@@ -155,15 +210,24 @@ class Course(BaseModel):
     guardiansEnabled: bool = False
 
 
+class EmailBackend(str, Enum):
+    SMTP = "smtp"  # Envio real pelo servidor SMTP
+    EML = "eml"  # Um arquivo .eml por mensagem em um diretório
+    MBOX = "mbox"  # Todas as mensagens em um único arquivo mbox
+    NULL = "null"  # Descarta as mensagens (simulações e benchmarks)
+
+
 class TeacherProfile(BaseModel):
     """Perfil do professor com informações para comunicação."""
 
     name: str
     whatsapp: str  # Formato: 5511999999999
     email: EmailStr
-    smtp_server: str
+    smtp_server: str = ""
     smtp_port: int = 465
-    smtp_password: str
+    smtp_password: str = ""
+    email_backend: EmailBackend = EmailBackend.SMTP
+    email_backend_path: str | None = None  # Destino dos backends eml e mbox
 
     @property
     def whatsapp_link(self) -> str:
@@ -0,0 +1,4 @@
+import os
+
+# core.llm cria os prompts do magentic na importação, o que exige uma chave
+os.environ.setdefault("OPENAI_API_KEY", "test")
@@ -0,0 +1,94 @@
+import io
+import tarfile
+import zipfile
+
+from core.archive import ArchiveReader, is_archive
+
+
+def make_zip(files: dict[str, bytes]) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in files.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def make_tar(files: dict[str, bytes]) -> bytes:
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        for name, data in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+def test_is_archive():
+    assert is_archive("entrega.ZIP")
+    assert is_archive("entrega.tar.gz")
+    assert not is_archive("entrega.py")
+
+
+def test_reads_parseable_members_and_skips_the_rest():
+    data = make_zip(
+        {
+            "lista/main.py": b"print('oi')",
+            "lista/notas.md": b"# Notas",
+            "lista/foto.png": b"\x89PNG",
+            "lista/__pycache__/main.cpython-312.pyc": b"\x00",
+            "__MACOSX/lista/._main.py": b"\x00",
+        }
+    )
+    reader = ArchiveReader(data)
+    members = {member.name: member.data for member in reader}
+    assert members == {"lista/main.py": b"print('oi')", "lista/notas.md": b"# Notas"}
+    assert reader.skipped == ["lista/foto.png"]
+    assert reader.limit_reached is None
+
+
+def test_reads_tar_from_a_path(tmp_path):
+    path = tmp_path / "entrega.tar.gz"
+    path.write_bytes(make_tar({"a.py": b"x = 1", "b.bin": b"\x00"}))
+    reader = ArchiveReader(path)
+    assert [(member.name, member.data) for member in reader] == [("a.py", b"x = 1")]
+    assert reader.skipped == ["b.bin"]
+
+
+def test_oversized_member_is_skipped():
+    data = make_zip({"grande.txt": b"x" * 2000, "pequeno.txt": b"ok"})
+    reader = ArchiveReader(data, max_member_bytes=1000)
+    assert [member.name for member in reader] == ["pequeno.txt"]
+    assert reader.skipped == ["grande.txt (maior que 0 MB)"]
+
+
+def test_total_size_limit_stops_a_zip_bomb():
+    # Altamente compressível: poucos bytes compactados, muitos descompactados
+    data = make_zip({f"parte{n}.txt": b"0" * 4000 for n in range(10)})
+    assert len(data) < 4000
+    reader = ArchiveReader(data, max_bytes=10_000, max_member_bytes=5000)
+    assert [member.name for member in reader] == ["parte0.txt", "parte1.txt"]
+    assert reader.limit_reached == "limite de 0 MB descompactados"
+
+
+def test_member_count_limit():
+    data = make_tar({f"q{n}.py": b"pass" for n in range(5)})
+    reader = ArchiveReader(data, max_members=3)
+    assert len(list(reader)) == 3
+    assert reader.limit_reached == "limite de 3 arquivos"
+
+
+def test_entry_limit_counts_skipped_entries():
+    # Milhares de entradas vazias e ignoradas não podem ser percorridas sem limite
+    data = make_tar({f"lixo{n}.bin": b"" for n in range(1000)} | {"main.py": b"pass"})
+    reader = ArchiveReader(data, max_entries=100)
+    assert list(reader) == []
+    assert reader.limit_reached == "limite de 100 entradas"
+    assert reader.skipped_count == 100
+
+
+def test_skipped_list_is_capped():
+    data = make_zip({f"foto{n}.png": b"\x89PNG" for n in range(30)})
+    reader = ArchiveReader(data, max_skipped=5)
+    assert list(reader) == []
+    assert reader.skipped == [f"foto{n}.png" for n in range(5)]
+    assert reader.skipped_count == 30
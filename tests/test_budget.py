@@ -0,0 +1,72 @@
+from core.budget import ContextBudget, count_tokens
+from models import ContentSection, ParsedAttachment
+
+
+def notebook(*sections: tuple[str, str], title: str = "lista.ipynb") -> ParsedAttachment:
+    return ParsedAttachment(
+        title=title,
+        sections=[ContentSection(kind=kind, text=text) for kind, text in sections],
+    )
+
+
+def test_context_within_budget_is_unchanged():
+    attachments = [notebook(("code", "print('oi')"), ("output", "oi"))]
+    result, decisions = ContextBudget(max_tokens=1000).apply(attachments)
+    assert decisions == []
+    assert result == attachments
+    assert result[0] is not attachments[0]
+
+
+def test_large_outputs_are_truncated_first():
+    code = "def f(x):\n    return x * 2\n"
+    attachments = [
+        notebook(("code", code), ("output", "0123456789" * 2000), ("output", "ok"))
+    ]
+    result, decisions = ContextBudget(max_tokens=1000, output_max_tokens=200).apply(
+        attachments
+    )
+
+    sections = result[0].sections
+    assert sections[0].text == code
+    assert "caracteres omitidos" in sections[1].text
+    assert sections[2].text == "ok"
+    assert count_tokens(result) <= 1000
+    assert any("saída de célula truncada" in decision for decision in decisions)
+    # A entrada não é modificada
+    assert len(attachments[0].sections[1].text) == 20000
+
+
+def test_repeated_output_lines_are_collapsed():
+    lines = "\n".join(["Epoch concluída"] * 400 + ["acurácia 0.9"])
+    attachments = [notebook(("output", lines))]
+    result, decisions = ContextBudget(max_tokens=200, output_max_tokens=10_000).apply(
+        attachments
+    )
+    assert "[linha repetida 400x]" in result[0].sections[0].text
+    assert "acurácia 0.9" in result[0].sections[0].text
+    assert any("linhas repetidas" in decision for decision in decisions)
+
+
+def test_extra_pdf_pages_are_dropped():
+    pdf = ParsedAttachment(
+        title="relatorio.pdf",
+        sections=[
+            ContentSection(kind="page", text=f"página {n} " + "texto " * 50)
+            for n in range(1, 31)
+        ],
+    )
+    result, decisions = ContextBudget(max_tokens=1000, pdf_max_pages=3).apply([pdf])
+    pages = [section for section in result[0].sections if section.kind == "page"]
+    assert len(pages) == 3
+    assert "páginas 4–30 omitidas" in result[0].sections[-1].text
+    assert any("páginas 4–30 do PDF omitidas" in decision for decision in decisions)
+
+
+def test_largest_attachment_is_cut_as_last_resort():
+    small = ParsedAttachment.from_text("resposta curta", title="a.txt")
+    large = ParsedAttachment.from_text("x" * 40_000, title="b.txt")
+    result, decisions = ContextBudget(max_tokens=1000).apply([small, large])
+    assert result[0].render() == small.render()
+    assert result[1].sections[0].text.endswith("cortado por limite de tokens ...]")
+    assert count_tokens(result) <= 1000
+    assert decisions[-1].startswith("b.txt: final cortado")
@@ -0,0 +1,123 @@
+import os
+import time
+from pathlib import Path
+
+from core.cache import DiskCache, file_digest, make_key
+
+
+def age(path: Path, seconds: float) -> None:
+    mtime = time.time() - seconds
+    os.utime(path, (mtime, mtime))
+
+
+def test_set_and_get(tmp_path):
+    cache = DiskCache(tmp_path)
+    key = make_key("arquivo", "v1")
+    path = cache.set(key, b"conteudo")
+    assert path == cache.path(key)
+    assert cache.get(key) == b"conteudo"
+    assert cache.get(make_key("outro")) is None
+    assert (cache.hits, cache.misses, cache.bytes_saved) == (1, 1, 8)
+
+
+def test_make_key_separates_parts():
+    assert make_key("ab", "c") != make_key("a", "bc")
+
+
+def test_file_digest_reads_in_chunks(tmp_path):
+    path = tmp_path / "f.bin"
+    path.write_bytes(b"x" * 10)
+    assert file_digest(path, chunk_size=3) == file_digest(path)
+
+
+def test_disabled_cache_ignores_reads_and_writes(tmp_path):
+    cache = DiskCache(tmp_path, enabled=False)
+    assert cache.set("k" * 64, b"v") is None
+    assert cache.get("k" * 64) is None
+    assert cache.evict() == 0
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = DiskCache(tmp_path, max_age=60)
+    key = make_key("k")
+    cache.set(key, b"v")
+    age(cache.path(key), 120)
+    assert cache.get(key) is None
+    assert not cache.path(key).exists()
+
+
+def test_set_stream_discards_incomplete_writes(tmp_path):
+    cache = DiskCache(tmp_path)
+    key = make_key("k")
+
+    def partial(file) -> bool:
+        file.write(b"metade")
+        return False
+
+    def failing(file) -> bool:
+        file.write(b"metade")
+        raise OSError("conexão perdida")
+
+    assert cache.set_stream(key, partial) is None
+    assert cache.set_stream(key, failing) is None
+    assert [path for path in tmp_path.rglob("*") if path.is_file()] == []
+
+
+def test_evict_keeps_most_recently_used(tmp_path):
+    cache = DiskCache(tmp_path, max_entries=2)
+    keys = [make_key(str(n)) for n in range(3)]
+    for seconds, key in zip((30, 20, 10), keys):
+        cache.set(key, b"v")
+        age(cache.path(key), seconds)
+    # Ler a entrada mais antiga a torna a mais recente
+    assert cache.get(keys[0]) == b"v"
+
+    assert cache.evict() == 1
+    assert cache.path(keys[0]).exists()
+    assert not cache.path(keys[1]).exists()
+    assert cache.path(keys[2]).exists()
+
+
+def test_evict_enforces_size_and_age(tmp_path):
+    cache = DiskCache(tmp_path, max_bytes=10, max_age=60)
+    old, big, small = make_key("old"), make_key("big"), make_key("small")
+    cache.set(old, b"v")
+    age(cache.path(old), 120)
+    cache.set(big, b"x" * 8)
+    age(cache.path(big), 10)
+    cache.set(small, b"x" * 4)
+
+    assert cache.evict() == 2
+    assert cache.get(small) == b"x" * 4
+    assert cache.get(big) is None
+    assert cache.get(old) is None
+
+
+def test_evict_skips_entries_removed_concurrently(tmp_path, monkeypatch):
+    cache = DiskCache(tmp_path, max_entries=1)
+    keys = [make_key(str(n)) for n in range(3)]
+    for key in keys:
+        cache.set(key, b"v")
+    vanished = cache.path(keys[1])
+    real_stat = Path.stat
+
+    def stat(path, *args, **kwargs):
+        if path == vanished:
+            # Outra execução despejou a entrada entre a listagem e o stat
+            path.unlink(missing_ok=True)
+            raise FileNotFoundError(path)
+        return real_stat(path, *args, **kwargs)
+
+    monkeypatch.setattr(Path, "stat", stat)
+    assert cache.evict() == 1
+    monkeypatch.undo()
+    assert sum(cache.path(key).exists() for key in keys) == 1
+
+
+def test_evict_ignores_temporary_files(tmp_path):
+    cache = DiskCache(tmp_path, max_entries=0)
+    tmp_file = tmp_path / "ab" / ".tmp-abc123"
+    tmp_file.parent.mkdir()
+    tmp_file.write_bytes(b"em andamento")
+    assert cache.evict() == 0
+    assert tmp_file.exists()
@@ -0,0 +1,35 @@
+import time
+
+import core.downloads
+from core.cache import DiskCache
+from core.downloads import DownloadManager
+from models import DriveFile
+
+
+def drive_file(file_id: str) -> DriveFile:
+    return DriveFile(id=file_id, title=f"{file_id}.py", alternateLink="")
+
+
+def test_queue_time_does_not_count_against_the_timeout(tmp_path, monkeypatch):
+    def fake_download(file_id, drive_service, file, **kwargs):
+        time.sleep(0.2)
+        file.write(file_id.encode())
+        return True
+
+    monkeypatch.setattr(
+        core.downloads,
+        "get_files_metadata",
+        lambda ids, service: {i: {"md5Checksum": i} for i in ids},
+    )
+    monkeypatch.setattr(core.downloads, "download_to", fake_download)
+
+    # Um único worker: o último arquivo espera os outros na fila por mais
+    # tempo que o limite, mas seu próprio download termina dentro dele
+    downloads = DownloadManager(None, DiskCache(tmp_path), max_workers=1, timeout=0.3)
+    try:
+        downloads.prefetch([drive_file("a"), drive_file("b"), drive_file("c")])
+        path = downloads.get(drive_file("c"))
+    finally:
+        downloads.close()
+    assert path is not None
+    assert path.read_bytes() == b"c"
@@ -0,0 +1,159 @@
+import json
+
+import pytest
+
+import core.grader
+from core.grader import SubmissionsGrader
+from core.journal import RunJournal
+from core.web import WebResponse
+from models import Course, CourseWork, FeedbackResult, UserProfile
+
+PROGRAM = "\n".join(
+    f"def questao_{n}(valores):\n    total = 0\n    for v in valores:\n"
+    f"        total += v * {n}\n    return total"
+    for n in range(1, 8)
+)
+SUBMISSIONS = {
+    "ana": PROGRAM,
+    "bruno": PROGRAM + "\nprint(questao_1([1, 2, 3]))",
+    "carla": " ".join(f"palavra{n}" for n in range(200)),
+}
+
+
+class Chain:
+    """Imita a interface encadeada dos serviços do Google (a().b().execute())."""
+
+    def __init__(self, result):
+        self.result = result
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        return self.result
+
+
+class FakeWeb:
+    def __init__(self, cache=None):
+        pass
+
+    def get(self, url):
+        student = url.rsplit("/", 2)[-2]
+        return WebResponse(url, 200, "text/plain", SUBMISSIONS[student].encode())
+
+    def close(self):
+        pass
+
+
+class FakeLLMClient:
+    def __init__(self, **kwargs):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeRoster:
+    def load(self):
+        pass
+
+    def save(self):
+        pass
+
+    def get(self, user_id):
+        return UserProfile(
+            id=user_id, full_name=user_id.title(), email=f"{user_id}@example.com"
+        )
+
+
+def submission(student: str) -> dict:
+    return {
+        "courseId": "c1",
+        "courseWorkId": "w1",
+        "id": f"s-{student}",
+        "userId": student,
+        "creationTime": "2025-01-01T00:00:00Z",
+        "updateTime": "2025-01-02T10:00:00Z",
+        "state": "TURNED_IN",
+        "alternateLink": f"https://classroom.google.com/{student}",
+        "courseWorkType": "ASSIGNMENT",
+        "submissionHistory": [
+            {"stateHistory": {"state": "TURNED_IN", "stateTimestamp": "2025-01-02"}}
+        ],
+        "assignmentSubmission": {
+            "attachments": [
+                {"link": {"url": f"https://example.com/{student}/main.py"}}
+            ]
+        },
+    }
+
+
+@pytest.fixture
+def run_grader(tmp_path, monkeypatch):
+    graded = []
+
+    def create_feedback(student, context, criteria, cache=None, **kwargs):
+        graded.append(student.id)
+        return FeedbackResult(feedback="Bom trabalho.", grade=8.0)
+
+    monkeypatch.setattr(core.grader, "WebClient", FakeWeb)
+    monkeypatch.setattr(core.grader, "AsyncFeedbackClient", FakeLLMClient)
+    monkeypatch.setattr(core.grader, "create_feedback", create_feedback)
+    output_dir = tmp_path / "output" / "curso" / "atividade"
+    output_dir.mkdir(parents=True)
+    criteria = tmp_path / "criterios.md"
+    criteria.write_text("Critérios", encoding="utf-8")
+    service = Chain({"studentSubmissions": [submission(s) for s in SUBMISSIONS]})
+
+    def run():
+        graded.clear()
+        grader = SubmissionsGrader(
+            service,
+            None,
+            Course.model_construct(id="c1", name="Curso"),
+            CourseWork.model_construct(
+                courseId="c1", id="w1", title="Lista", maxPoints=10.0
+            ),
+            criteria,
+            output_dir,
+            use_llm_cache=False,
+            parse_workers=1,
+            similarity_threshold=0.5,
+        )
+        grader.roster = FakeRoster()
+        grader.grade()
+        return list(graded)
+
+    return run, output_dir
+
+
+def test_resumed_run_keeps_the_similarity_report(run_grader):
+    run, output_dir = run_grader
+    report = output_dir / "similaridade.md"
+
+    assert sorted(run()) == ["ana", "bruno", "carla"]
+    first = report.read_text(encoding="utf-8")
+    assert "| Ana | Bruno |" in first or "| Bruno | Ana |" in first
+
+    # Todas puladas pelo diário: o relatório é refeito com os dados guardados
+    assert run() == []
+    assert report.read_text(encoding="utf-8") == first
+
+
+def test_report_is_kept_when_journal_lacks_similarity_data(run_grader):
+    run, output_dir = run_grader
+    run()
+    report = output_dir / "similaridade.md"
+    first = report.read_text(encoding="utf-8")
+
+    # Diário gravado antes de os dados de similaridade serem guardados
+    journal = output_dir / RunJournal.FILENAME
+    entries = [json.loads(line) for line in journal.read_text().splitlines()]
+    journal.write_text(
+        "".join(
+            json.dumps({**entry, "similaridade": None}) + "\n" for entry in entries
+        )
+    )
+
+    assert run() == []
+    assert report.read_text(encoding="utf-8") == first
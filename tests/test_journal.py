@@ -0,0 +1,107 @@
+from core.journal import RunJournal
+from models import Submission
+
+
+def make_submission(update_time: str, history: list[tuple[str, str]]) -> Submission:
+    return Submission.model_validate(
+        {
+            "courseId": "c1",
+            "courseWorkId": "w1",
+            "id": "s1",
+            "userId": "u1",
+            "creationTime": "2025-01-01T00:00:00Z",
+            "updateTime": update_time,
+            "state": "TURNED_IN",
+            "alternateLink": "https://classroom.google.com/s1",
+            "courseWorkType": "ASSIGNMENT",
+            "submissionHistory": [
+                {"stateHistory": {"state": state, "stateTimestamp": timestamp}}
+                for state, timestamp in history
+            ],
+        }
+    )
+
+
+TURNED_IN = [
+    ("CREATED", "2025-01-01T00:00:00Z"),
+    ("TURNED_IN", "2025-01-02T10:00:00Z"),
+]
+
+
+def test_turned_in_time_is_the_last_turn_in():
+    submission = make_submission(
+        "t",
+        TURNED_IN
+        + [
+            ("RECLAIMED_BY_STUDENT", "2025-01-03T10:00:00Z"),
+            ("TURNED_IN", "2025-01-04T10:00:00Z"),
+            ("RETURNED", "2025-01-05T10:00:00Z"),
+        ],
+    )
+    assert submission.turned_in_time == "2025-01-04T10:00:00Z"
+    assert make_submission("t", []).turned_in_time is None
+
+
+def test_recorded_submission_is_skipped(tmp_path):
+    journal = RunJournal(tmp_path)
+    submission = make_submission("2025-01-02T10:00:01Z", TURNED_IN)
+    journal.record(submission, 8.0, {"nome": "Ana"}, published=False)
+
+    entry = RunJournal(tmp_path).get(submission)
+    assert entry is not None
+    assert entry["nota"] == 8.0
+    assert entry["aluno"] == {"nome": "Ana"}
+
+
+def test_publishing_grades_does_not_look_like_a_resubmission(tmp_path):
+    journal = RunJournal(tmp_path)
+    journal.record(
+        make_submission("2025-01-02T10:00:01Z", TURNED_IN),
+        8.0,
+        {},
+        published=False,
+    )
+    journal.mark_published(["s1"])
+
+    # Publicar a nota e devolver a submissão mudam o updateTime
+    returned = make_submission(
+        "2025-01-06T09:00:00Z", TURNED_IN + [("RETURNED", "2025-01-06T09:00:00Z")]
+    )
+    entry = RunJournal(tmp_path).get(returned)
+    assert entry is not None
+    assert entry["publicado"] is True
+
+
+def test_resubmission_is_graded_again(tmp_path):
+    journal = RunJournal(tmp_path)
+    journal.record(
+        make_submission("2025-01-02T10:00:01Z", TURNED_IN), 8.0, {}, published=True
+    )
+    resubmitted = make_submission(
+        "2025-01-08T10:00:00Z",
+        TURNED_IN
+        + [
+            ("RECLAIMED_BY_STUDENT", "2025-01-07T10:00:00Z"),
+            ("TURNED_IN", "2025-01-08T10:00:00Z"),
+        ],
+    )
+    assert RunJournal(tmp_path).get(resubmitted) is None
+
+
+def test_legacy_entries_fall_back_to_update_time(tmp_path):
+    (tmp_path / RunJournal.FILENAME).write_text(
+        '{"id": "s1", "updateTime": "2025-01-02T10:00:01Z", "nota": 5.0}\n'
+        "{truncado\n",
+        encoding="utf-8",
+    )
+    journal = RunJournal(tmp_path)
+    assert journal.get(make_submission("2025-01-02T10:00:01Z", TURNED_IN))
+    assert journal.get(make_submission("2025-01-03T00:00:00Z", TURNED_IN)) is None
+
+
+def test_force_discards_the_journal(tmp_path):
+    RunJournal(tmp_path).record(
+        make_submission("t", TURNED_IN), 8.0, {}, published=False
+    )
+    assert RunJournal(tmp_path, force=True).get(make_submission("t", TURNED_IN)) is None
+    assert not (tmp_path / RunJournal.FILENAME).exists()
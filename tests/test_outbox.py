@@ -0,0 +1,122 @@
+import os
+import smtplib
+from email.message import EmailMessage
+
+from core.outbox import Outbox, OutboxSender
+
+
+def make_message(to: str = "aluno@example.com") -> EmailMessage:
+    msg = EmailMessage()
+    msg["Subject"] = "Feedback"
+    msg["From"] = "professor@example.com"
+    msg["To"] = to
+    msg.set_content("Bom trabalho!")
+    return msg
+
+
+class FlakyBackend:
+    """Falha nas primeiras `failures` entregas e registra as demais."""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.delivered: list[tuple[str, list[str]]] = []
+
+    def send_message(self, msg, from_addr=None, to_addrs=None):
+        if self.failures:
+            self.failures -= 1
+            raise smtplib.SMTPServerDisconnected("conexão perdida")
+        self.delivered.append((msg["Subject"], to_addrs))
+
+    def close(self):
+        pass
+
+
+def test_put_and_load(tmp_path):
+    outbox = Outbox(tmp_path)
+    message_id = outbox.put(make_message(), ["aluno@example.com"], "prof@example.com")
+    assert outbox.pending() == [message_id]
+
+    msg, meta = outbox.load(message_id)
+    assert msg["Subject"] == "Feedback"
+    assert meta == {
+        "from_addr": "prof@example.com",
+        "to_addrs": ["aluno@example.com"],
+        "attempts": 0,
+    }
+
+
+def test_state_transitions(tmp_path):
+    outbox = Outbox(tmp_path)
+    sent = outbox.put(make_message(), ["a@example.com"], "p@example.com")
+    failed = outbox.put(make_message(), ["b@example.com"], "p@example.com")
+
+    outbox.mark_sent(sent)
+    assert outbox.mark_failed(failed, "recusado", max_attempts=2) == 1
+    assert outbox.counts() == {"pendentes": 1, "enviados": 1, "falhas": 0}
+    assert outbox.mark_failed(failed, "recusado", max_attempts=2) == 2
+    assert outbox.counts() == {"pendentes": 0, "enviados": 1, "falhas": 1}
+
+    assert outbox.requeue_failed() == 1
+    assert outbox.pending() == [failed]
+    assert outbox.load(failed)[1]["attempts"] == 0
+
+
+def test_pending_skips_messages_without_metadata(tmp_path):
+    outbox = Outbox(tmp_path)
+    message_id = outbox.put(make_message(), ["a@example.com"], "p@example.com")
+    (outbox.pending_dir / f"{message_id}.json").unlink()
+    assert outbox.pending() == []
+
+
+def test_requeue_recovers_a_move_interrupted_halfway(tmp_path):
+    outbox = Outbox(tmp_path)
+    message_id = outbox.put(make_message(), ["a@example.com"], "p@example.com")
+    # Interrupção entre as duas renomeações de `_move`: o .eml já foi movido
+    os.replace(
+        outbox.pending_dir / f"{message_id}.eml",
+        outbox.failed_dir / f"{message_id}.eml",
+    )
+
+    assert outbox.requeue_failed() == 1
+    assert outbox.pending() == [message_id]
+    assert outbox.load(message_id)[1]["to_addrs"] == ["a@example.com"]
+
+
+def test_drain_retries_until_delivered(tmp_path):
+    outbox = Outbox(tmp_path)
+    for to in ("a@example.com", "b@example.com"):
+        outbox.put(make_message(to), [to], "p@example.com")
+    backend = FlakyBackend(failures=2)
+
+    sender = OutboxSender(outbox, backend, workers=2, retry_delay=0.01)
+    sender.drain()
+
+    assert sorted(to for _, (to,) in backend.delivered) == [
+        "a@example.com",
+        "b@example.com",
+    ]
+    assert (sender.sent, sender.failed) == (2, 0)
+    assert outbox.counts() == {"pendentes": 0, "enviados": 2, "falhas": 0}
+
+
+def test_message_fails_after_max_attempts(tmp_path):
+    outbox = Outbox(tmp_path)
+    outbox.put(make_message(), ["a@example.com"], "p@example.com")
+    sender = OutboxSender(
+        outbox, FlakyBackend(failures=10), max_attempts=3, retry_delay=0.01
+    )
+    sender.drain()
+
+    assert (sender.sent, sender.failed) == (0, 1)
+    assert outbox.counts() == {"pendentes": 0, "enviados": 0, "falhas": 1}
+
+
+def test_stop_leaves_scheduled_retries_pending(tmp_path):
+    outbox = Outbox(tmp_path)
+    sender = OutboxSender(
+        outbox, FlakyBackend(failures=1), max_attempts=3, retry_delay=3600
+    ).start()
+    sender.submit(outbox.put(make_message(), ["a@example.com"], "p@example.com"))
+    sender.stop()
+
+    assert outbox.counts() == {"pendentes": 1, "enviados": 0, "falhas": 0}
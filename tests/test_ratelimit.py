@@ -0,0 +1,172 @@
+import asyncio
+
+import httpx
+import openai
+import pytest
+
+from core import ratelimit
+from core.ratelimit import CircuitBreaker, RateLimiter, TokenBucket, call_with_retry
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(ratelimit.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    """As esperas retornam na hora, mas ainda cedem a vez ao event loop."""
+    real_sleep = asyncio.sleep
+    monkeypatch.setattr(ratelimit.asyncio, "sleep", lambda delay: real_sleep(0))
+
+
+def server_error(status: int = 503) -> openai.APIStatusError:
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(status, request=request)
+    return openai.APIStatusError("erro", response=response, body=None)
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_token_bucket_refills_over_time(clock):
+    bucket = TokenBucket(60, period=60.0)
+    assert bucket.delay_for(60) == 0.0
+    bucket.consume(60)
+    assert bucket.delay_for(1) == pytest.approx(1.0)
+    clock.now += 30
+    assert bucket.delay_for(30) == 0.0
+    assert bucket.delay_for(31) == pytest.approx(1.0)
+
+
+def test_token_bucket_never_exceeds_capacity(clock):
+    bucket = TokenBucket(10, period=60.0)
+    clock.now += 3600
+    assert bucket.delay_for(11) == pytest.approx(6.0)
+
+
+def test_rate_limiter_correction_charges_the_real_usage(clock):
+    limiter = RateLimiter(rpm=100, tpm=1000)
+    run(limiter.acquire(100))
+    limiter.correct(estimated=100, actual=600)
+    assert limiter.tokens.delay_for(500) == pytest.approx(6.0)
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3)
+    for _ in range(2):
+        breaker.record_failure(trial=False)
+    assert not breaker.is_open
+    breaker.record_failure(trial=False)
+    assert breaker.is_open
+
+
+def test_failed_trial_doubles_the_cooldown():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=10, max_cooldown=15)
+    breaker.record_failure(trial=False)
+    breaker.record_failure(trial=True)
+    assert breaker.cooldown == 15
+    breaker.record_success(trial=True)
+    assert not breaker.is_open
+    assert breaker.cooldown == 10
+
+
+def test_retries_transient_errors(no_sleep):
+    calls = []
+
+    async def call():
+        calls.append(1)
+        if len(calls) < 3:
+            raise server_error(429)
+        return "ok"
+
+    async def main():
+        return await call_with_retry(
+            call,
+            limiter=RateLimiter(1000, 10**6),
+            breaker=CircuitBreaker(),
+            estimated_tokens=10,
+        )
+
+    assert run(main()) == "ok"
+    assert len(calls) == 3
+
+
+def test_gives_up_after_max_retries(no_sleep):
+    async def call():
+        raise server_error(500)
+
+    async def main():
+        await call_with_retry(
+            call,
+            limiter=RateLimiter(1000, 10**6),
+            breaker=CircuitBreaker(failure_threshold=100),
+            estimated_tokens=10,
+            max_retries=2,
+        )
+
+    with pytest.raises(openai.APIStatusError):
+        run(main())
+
+
+def test_cancelled_trial_releases_the_breaker(no_sleep):
+    async def main():
+        breaker = CircuitBreaker(failure_threshold=1, cooldown=0)
+        breaker.record_failure(trial=False)
+        limiter = RateLimiter(1000, 10**6)
+        started = asyncio.Event()
+
+        async def hang():
+            started.set()
+            await asyncio.Event().wait()
+
+        task = asyncio.create_task(
+            call_with_retry(hang, limiter=limiter, breaker=breaker, estimated_tokens=1)
+        )
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        async def ok():
+            return "ok"
+
+        # Sem liberar a chamada de teste, esta ficaria esperando para sempre
+        result = await asyncio.wait_for(
+            call_with_retry(ok, limiter=limiter, breaker=breaker, estimated_tokens=1),
+            timeout=1,
+        )
+        return result, breaker.is_open
+
+    assert run(main()) == ("ok", False)
+
+
+def test_non_retryable_trial_error_keeps_the_circuit_open(no_sleep):
+    async def main():
+        breaker = CircuitBreaker(failure_threshold=1, cooldown=0)
+        breaker.record_failure(trial=False)
+
+        async def bad_request():
+            raise ValueError("requisição inválida")
+
+        with pytest.raises(ValueError):
+            await call_with_retry(
+                bad_request,
+                limiter=RateLimiter(1000, 10**6),
+                breaker=breaker,
+                estimated_tokens=1,
+            )
+        return breaker.is_open, breaker._trial.locked()
+
+    assert run(main()) == (True, False)
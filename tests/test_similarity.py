@@ -0,0 +1,97 @@
+from core.llm import reuse_feedback
+from core.similarity import SimilarityIndex, content_digest, minhash, normalize
+from models import FeedbackResult, UserProfile
+
+PROGRAM = "\n".join(
+    f"def questao_{n}(valores):\n    total = 0\n    for v in valores:\n"
+    f"        total += v * {n}\n    return total"
+    for n in range(1, 8)
+)
+
+
+def test_normalize_collapses_case_and_whitespace():
+    assert normalize("  Def F():\n\tReturn 1 ") == "def f(): return 1"
+
+
+def test_digest_keeps_indentation_and_case():
+    code = "if x:\n    y()\nz()"
+    assert content_digest(code) == content_digest(code)
+    assert content_digest(code) != content_digest("if x:\n    y()\n    z()")
+    assert content_digest("X = 1") != content_digest("x = 1")
+
+
+def test_short_texts_have_no_signature():
+    assert minhash("print('oi')") is None
+    assert minhash(PROGRAM) is not None
+
+
+def test_identical_submissions_share_a_digest():
+    index = SimilarityIndex()
+    first = index.add("Ana", PROGRAM)
+    assert index.add("Bruno", PROGRAM) == first
+    assert index.add("Carla", PROGRAM.replace("    ", "  ")) != first
+    assert index.add("Davi", "outra coisa") != first
+
+
+def test_report_groups_texts_equal_after_normalization():
+    index = SimilarityIndex()
+    index.add("Ana", PROGRAM)
+    index.add("Bruno", PROGRAM.upper())
+    index.add("Carla", "resposta totalmente diferente")
+    assert index.exact_groups() == [["Ana", "Bruno"]]
+
+
+def test_near_duplicates_are_reported_once_per_group(tmp_path):
+    index = SimilarityIndex(threshold=0.5)
+    index.add("Ana", PROGRAM)
+    index.add("Bruno", PROGRAM)
+    index.add("Carla", PROGRAM.replace("total", "soma", 1))
+    index.add("Davi", " ".join(f"palavra{n}" for n in range(200)))
+
+    pairs = index.near_duplicates()
+    assert len(pairs) == 1
+    labels = {pairs[0][0], pairs[0][1]}
+    assert labels == {"Ana (+1 idêntica(s))", "Carla"}
+    assert pairs[0][2] >= 0.5
+
+    report = tmp_path / "similaridade.md"
+    assert index.write_report(report) == 2
+    assert "1. Ana, Bruno" in report.read_text(encoding="utf-8")
+
+
+def test_report_is_removed_when_nothing_is_similar(tmp_path):
+    report = tmp_path / "similaridade.md"
+    report.write_text("antigo", encoding="utf-8")
+    index = SimilarityIndex()
+    index.add("Ana", PROGRAM)
+    assert index.write_report(report) == 0
+    assert not report.exists()
+
+
+SOURCE = UserProfile(id="1", full_name="João da Silva", email="joao@example.com")
+
+
+def test_reuse_keeps_feedback_without_names():
+    result = FeedbackResult(
+        feedback="### Pontos Positivos ✅\n- A função da questão 2 está correta.",
+        grade=9.0,
+    )
+    reused = reuse_feedback(result, SOURCE)
+    assert reused == result
+    assert reused is not result
+
+
+def test_reuse_refuses_feedback_that_names_the_student():
+    for text in (
+        "Parabéns, João!",
+        "Ótimo trabalho, joao.",
+        "O código do Silva's grupo",
+        "SILVA, revise a questão 3",
+    ):
+        assert reuse_feedback(FeedbackResult(feedback=text, grade=7.0), SOURCE) is None
+
+
+def test_reuse_ignores_short_name_particles():
+    # "da" faz parte do nome, mas não identifica o aluno
+    result = FeedbackResult(feedback="A saída da função está correta.", grade=8.0)
+    assert reuse_feedback(result, SOURCE) == result